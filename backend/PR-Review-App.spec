@@ -3,7 +3,7 @@ from PyInstaller.utils.hooks import collect_all
 
 datas = [('app', 'app'), ('tiktoken_cache', 'tiktoken_cache')]
 binaries = []
-hiddenimports = []
+hiddenimports = ['aiosqlite', 'sqlalchemy.dialects.sqlite.aiosqlite']
 tmp_ret = collect_all('tiktoken')
 datas += tmp_ret[0]; binaries += tmp_ret[1]; hiddenimports += tmp_ret[2]
 tmp_ret = collect_all('tiktoken_ext')
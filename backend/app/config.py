@@ -12,6 +12,43 @@ class EnvSettings(BaseSettings):
     database_url: str = "sqlite:///./pr_review.db"
     pr_review_app_data_dir: str | None = None  # App data directory from Tauri
 
+    # Review job queue
+    review_workers: int = 2  # Max reviews processed at the same time
+    review_github_concurrency: int = 2  # Max concurrent reviews per provider
+    review_gitlab_concurrency: int = 2
+
+    # SQLite tuning, applied to every new connection
+    sqlite_journal_mode: str = "wal"  # WAL lets readers run while a review commits
+    sqlite_synchronous: str = "normal"  # Safe with WAL, avoids an fsync per commit
+    sqlite_busy_timeout_ms: int = 10000  # Wait for locks instead of "database is locked"
+    sqlite_cache_size_kib: int = 32768
+    sqlite_mmap_size_mb: int = 256
+    sqlite_temp_store: str = "memory"
+    db_pool_size: int = 10
+    db_max_overflow: int = 20
+
+    # Review result cache (0 disables it)
+    review_cache_ttl_hours: int = 168
+    review_cache_max_entries: int = 500
+
+    # Max pooled HTTP connections per GitHub/GitLab API client
+    provider_pool_size: int = 10
+
+    # On-disk cache of provider API responses, revalidated with ETags
+    http_cache_enabled: bool = True
+    http_cache_max_mb: int = 512
+
+    # Provider API rate limits: hold queued reviews when fewer requests than the
+    # reserve are left (a review hitting the limit is requeued until the reset)
+    rate_limit_reserve: int = 100
+
+    # PRs over the model's token budget are reviewed in chunks of the diff
+    review_shard_parallelism: int = 4  # Chunks of one review sent to the model at the same time
+    review_shard_tokens: int = 0  # Patch tokens per chunk (0: derived from max_tokens)
+
+    # Seconds between health checks of the configured AI endpoints (0 disables them)
+    ai_endpoint_health_interval_seconds: int = 30
+
     class Config:
         env_file = ".env"
         env_file_encoding = "utf-8"
@@ -37,6 +74,8 @@ class DatabaseSettings:
         self.ai_api_key = db_settings.ai_api_key or ""
         self.ai_base_url = db_settings.ai_base_url or "http://localhost:11434"
         self.max_tokens = db_settings.max_tokens or 128000
+        self.ai_endpoints = db_settings.ai_endpoints or []
+        self.tool_models = db_settings.tool_models or {}
 
 
 
@@ -110,3 +149,11 @@ def clear_settings_cache():
     """Clear settings cache - call after updating settings"""
     global _settings_cache
     _settings_cache = None
+    
+    # API clients were built with the old tokens / URLs
+    from .services.client_registry import client_registry
+    client_registry.clear()
+
+    # Model calls go to the endpoints of the new settings
+    from .services.endpoint_pool import endpoint_pool
+    endpoint_pool.configure_from_settings(get_settings())
@@ -1,22 +1,123 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
-from .config import get_database_url
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .config import get_database_url, get_env_settings, EnvSettings
 
 # Use get_database_url() which only reads from env, avoiding circular dependency
 database_url = get_database_url()
 
-# Configure engine
-connect_args = {}
-if database_url.startswith("sqlite"):
-    connect_args["check_same_thread"] = False
 
-engine = create_engine(
-    database_url,
-    connect_args=connect_args,
-    pool_pre_ping=True
-)
+def sqlite_pragmas(env_settings: EnvSettings) -> dict:
+    """PRAGMA statements of the SQLite performance profile"""
+    return {
+        "journal_mode": env_settings.sqlite_journal_mode,
+        "synchronous": env_settings.sqlite_synchronous,
+        "busy_timeout": env_settings.sqlite_busy_timeout_ms,
+        # Negative cache_size is in KiB rather than pages
+        "cache_size": -abs(env_settings.sqlite_cache_size_kib),
+        "mmap_size": env_settings.sqlite_mmap_size_mb * 1024 * 1024,
+        "temp_store": env_settings.sqlite_temp_store,
+    }
+
+
+def create_db_engine(url: str, env_settings: EnvSettings = None) -> Engine:
+    """Create the SQLAlchemy engine, applying the SQLite profile on connect"""
+    env_settings = env_settings or get_env_settings()
+    
+    # Configure engine
+    connect_args = {}
+    engine_args = {}
+    if url.startswith("sqlite"):
+        connect_args["check_same_thread"] = False
+        connect_args["timeout"] = env_settings.sqlite_busy_timeout_ms / 1000
+        if ":memory:" not in url:
+            # Reviews commit from worker threads while requests read, so keep
+            # enough connections around for both
+            engine_args["pool_size"] = env_settings.db_pool_size
+            engine_args["max_overflow"] = env_settings.db_max_overflow
+    
+    db_engine = create_engine(
+        url,
+        connect_args=connect_args,
+        pool_pre_ping=True,
+        **engine_args
+    )
+    
+    if url.startswith("sqlite"):
+        _apply_sqlite_profile(db_engine, env_settings)
+    
+    return db_engine
+
+
+# Async drivers used in place of the default sync driver of each backend
+ASYNC_DRIVERS = {
+    "sqlite": "aiosqlite",
+    "postgresql": "asyncpg",
+    "mysql": "aiomysql",
+}
+
+
+def get_async_database_url(url: str) -> str:
+    """Rewrite a database URL to use the async driver of its backend"""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend in ASYNC_DRIVERS:
+        parsed = parsed.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    return parsed.render_as_string(hide_password=False)
+
+
+def create_async_db_engine(url: str, env_settings: EnvSettings = None) -> AsyncEngine:
+    """Create the async engine used by the review pipeline, with the same SQLite profile"""
+    env_settings = env_settings or get_env_settings()
+    url = get_async_database_url(url)
+    
+    connect_args = {}
+    engine_args = {}
+    if url.startswith("sqlite"):
+        connect_args["timeout"] = env_settings.sqlite_busy_timeout_ms / 1000
+        if ":memory:" not in url:
+            # aiosqlite defaults to NullPool, which starts a new connection
+            # (and its thread) for every session
+            engine_args["poolclass"] = AsyncAdaptedQueuePool
+            engine_args["pool_size"] = env_settings.db_pool_size
+            engine_args["max_overflow"] = env_settings.db_max_overflow
+    
+    db_engine = create_async_engine(
+        url,
+        connect_args=connect_args,
+        pool_pre_ping=True,
+        **engine_args
+    )
+    
+    if url.startswith("sqlite"):
+        _apply_sqlite_profile(db_engine.sync_engine, env_settings)
+    
+    return db_engine
+
+
+def _apply_sqlite_profile(db_engine: Engine, env_settings: EnvSettings):
+    pragmas = sqlite_pragmas(env_settings)
+    
+    @event.listens_for(db_engine, "connect")
+    def apply_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f"PRAGMA {name}={value}")
+        finally:
+            cursor.close()
+
+
+engine = create_db_engine(database_url)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+async_engine = create_async_db_engine(database_url)
+# Objects stay usable after commit: the pipeline keeps working with them and
+# an expired attribute cannot be lazy-loaded in async code
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 Base = declarative_base()
 
 
@@ -30,3 +131,8 @@ def get_db():
         except Exception:
             # Ignore errors during close, as the connection might already be dead
             pass
+
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
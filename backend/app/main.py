@@ -1,22 +1,48 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
-from .config import get_diagnostics
-from .database import engine, Base
+from .config import get_diagnostics, get_settings
+from .database import async_engine
+from .migrations import run_migrations
 from . import models  # Explicitly import models to ensure they are registered with Base.metadata
 from .routers import reviews_router, settings_router, rule_sets_router
+from .routers.reviews import run_review_job
+from .services.review_queue import review_queue
+from .services.http_cache import install_http_cache
+from .services.rate_limits import rate_limits
+from .services.endpoint_pool import endpoint_pool
 from .log_buffer import install_buffer_handler, get_recent_logs
 
 # In-memory log buffer for About / diagnostics (install before other code logs)
 install_buffer_handler()
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+# Revalidate GitHub/GitLab API responses (ours and pr-agent's) from the disk cache
+install_http_cache()
+
+# Create database tables and apply pending schema migrations
+run_migrations()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Run the review queue workers and AI endpoint health checks for the lifetime of the app"""
+    await review_queue.start(run_review_job)
+    endpoint_pool.configure_from_settings(get_settings())
+    await endpoint_pool.start()
+    yield
+    await endpoint_pool.stop()
+    await review_queue.stop()
+    # aiosqlite runs every connection in a thread that would keep the process alive
+    await async_engine.dispose()
+
 
 app = FastAPI(
     title="PR Review API",
     description="API for reviewing GitLab Merge Requests using local LLM",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # CORS middleware for React frontend
@@ -42,8 +68,13 @@ def health_check():
 
 @app.get("/api/info")
 def get_info():
-    """Diagnostics for About: database path, app data dir, cwd (no secrets)."""
-    return {"version": "1.0.0", **get_diagnostics()}
+    """Diagnostics for About: database path, app data dir, cwd, API rate limits, AI endpoints (no secrets)."""
+    return {
+        "version": "1.0.0",
+        **get_diagnostics(),
+        "rate_limits": rate_limits.snapshot(),
+        "ai_endpoints": endpoint_pool.snapshot(),
+    }
 
 
 @app.get("/api/logs")
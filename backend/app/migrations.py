@@ -0,0 +1,126 @@
+"""
+Schema migrations applied at application startup.
+
+Tables and columns missing from an existing database are added from the model
+metadata. Everything create_all() cannot do on an existing database (indexes on
+existing tables, data changes) is a numbered migration, applied once and
+recorded in the schema_migrations table.
+"""
+import logging
+from datetime import datetime
+from typing import Callable, List, Tuple
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+
+from .database import Base, engine as default_engine
+from . import models  # Register all models with Base.metadata
+
+logger = logging.getLogger(__name__)
+
+
+def _create_model_indexes(*index_names: str) -> Callable[[Connection], None]:
+    """Migration step creating indexes declared on the models, if missing"""
+    def apply(conn: Connection):
+        indexes = {
+            index.name: index
+            for table in Base.metadata.tables.values()
+            for index in table.indexes
+        }
+        for name in index_names:
+            indexes[name].create(conn, checkfirst=True)
+    return apply
+
+
+# (version, description, apply) - append only, never renumber
+MIGRATIONS: List[Tuple[int, str, Callable[[Connection], None]]] = [
+    (1, "Index review history, PR URL and suggestion lookups", _create_model_indexes(
+        "ix_pr_reviews_status_created_at",
+        "ix_pr_reviews_created_at",
+        "ix_pr_reviews_pr_url",
+        "ix_suggestions_review_id",
+    )),
+    (2, "Index reviews by batch", _create_model_indexes("ix_pr_reviews_batch_id")),
+]
+
+# Hot queries that must be served by an index: (description, SQL, params)
+HOT_QUERIES = [
+    ("history list", "SELECT id FROM pr_reviews ORDER BY created_at DESC, id DESC LIMIT 21", {}),
+    ("history list by status",
+     "SELECT id FROM pr_reviews WHERE status = :status ORDER BY created_at DESC, id DESC LIMIT 21",
+     {"status": "completed"}),
+    ("reviews of a PR", "SELECT id FROM pr_reviews WHERE pr_url = :pr_url", {"pr_url": ""}),
+    ("suggestions of a review", "SELECT id FROM suggestions WHERE review_id = :review_id", {"review_id": 0}),
+    ("new log entries", "SELECT id FROM review_logs WHERE review_id = :review_id AND id > :after ORDER BY id",
+     {"review_id": 0, "after": 0}),
+    ("reviews of a batch", "SELECT status FROM pr_reviews WHERE batch_id = :batch_id", {"batch_id": 0}),
+]
+
+
+def _sync_tables_and_columns(engine: Engine):
+    """Create missing tables and add columns introduced after a database was created"""
+    Base.metadata.create_all(bind=engine)
+
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {col["name"] for col in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                logger.info(f"[MIGRATIONS] Adding column {table.name}.{column.name}")
+                conn.execute(text(f'ALTER TABLE {table.name} ADD COLUMN "{column.name}" {col_type}'))
+
+
+def _apply_migrations(engine: Engine):
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE IF NOT EXISTS schema_migrations ("
+            "version INTEGER PRIMARY KEY, description TEXT, applied_at TIMESTAMP)"
+        ))
+        applied = {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+    for version, description, apply in MIGRATIONS:
+        if version in applied:
+            continue
+        logger.info(f"[MIGRATIONS] Applying {version}: {description}")
+        with engine.begin() as conn:
+            apply(conn)
+            conn.execute(
+                text("INSERT INTO schema_migrations (version, description, applied_at) VALUES (:v, :d, :t)"),
+                {"v": version, "d": description, "t": datetime.utcnow()}
+            )
+
+
+def explain_hot_queries(engine: Engine) -> List[dict]:
+    """
+    Return the SQLite query plan of each hot query.
+
+    `uses_index` is False when SQLite would scan a whole table or sort the
+    result in a temporary b-tree instead of reading an index in order.
+    """
+    results = []
+    with engine.connect() as conn:
+        # EXPLAIN alone does not notice schema changes made by other connections;
+        # reading the schema table first makes SQLite reload it
+        conn.execute(text("SELECT count(*) FROM sqlite_master")).scalar()
+        for name, sql, params in HOT_QUERIES:
+            plan = [row[-1] for row in conn.execute(text(f"EXPLAIN QUERY PLAN {sql}"), params)]
+            full_scan = any(
+                (step.startswith("SCAN ") and " USING " not in step) or "TEMP B-TREE" in step
+                for step in plan
+            )
+            results.append({"query": name, "plan": plan, "uses_index": not full_scan})
+    return results
+
+
+def run_migrations(engine: Engine = default_engine):
+    """Bring the database schema up to date with the models"""
+    _sync_tables_and_columns(engine)
+    _apply_migrations(engine)
+
+    if engine.dialect.name == "sqlite":
+        for result in explain_hot_queries(engine):
+            if not result["uses_index"]:
+                logger.warning(f"[MIGRATIONS] Query '{result['query']}' is not index-backed: {result['plan']}")
@@ -1,3 +1,5 @@
-from .pr_review import PRReview, Suggestion, ReviewStatus, SuggestionSeverity, SuggestionCategory
+from .pr_review import PRReview, Suggestion, ReviewLog, ChatMessage, ReviewStatus, SuggestionSeverity, SuggestionCategory
 from .settings import AppSettings
-from .rule_set import ReviewRuleSet
\ No newline at end of file
+from .rule_set import ReviewRuleSet
+from .review_cache import ReviewCacheEntry
+from .review_batch import ReviewBatch
\ No newline at end of file
@@ -1,7 +1,9 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Enum, JSON, Boolean, Index
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session, relationship
 from ..database import Base
+from ..review_events import review_events
 import enum
 import json
 
@@ -11,6 +13,7 @@ class ReviewStatus(str, enum.Enum):
     REVIEWING = "reviewing"
     COMPLETED = "completed"
     FAILED = "failed"
+    CANCELLED = "cancelled"
 
 
 class SuggestionSeverity(str, enum.Enum):
@@ -34,6 +37,15 @@ class ProviderType(str, enum.Enum):
 
 class PRReview(Base):
     __tablename__ = "pr_reviews"
+    __table_args__ = (
+        # History list (optionally filtered by status), newest first
+        Index("ix_pr_reviews_status_created_at", "status", "created_at"),
+        Index("ix_pr_reviews_created_at", "created_at"),
+        # Lookups of earlier reviews of the same PR
+        Index("ix_pr_reviews_pr_url", "pr_url"),
+        # Progress of a batch
+        Index("ix_pr_reviews_batch_id", "batch_id"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     pr_url = Column(Text, nullable=False)  # Renamed from gitlab_url
@@ -46,7 +58,8 @@ class PRReview(Base):
     target_branch = Column(String(200))
     status = Column(String(50), default=ReviewStatus.PENDING.value)
     current_stage = Column(String(100), nullable=True)
-    processing_logs = Column(JSON, nullable=True)  # Array of log entries
+    # Log entries written before the review_logs table existed (read-only)
+    legacy_processing_logs = Column("processing_logs", JSON, nullable=True)
     error_message = Column(Text, nullable=True)
     
     # New fields for advanced review details
@@ -60,35 +73,111 @@ class PRReview(Base):
     rule_set_id = Column(Integer, ForeignKey("review_rule_sets.id"), nullable=True)
     rule_set = relationship("ReviewRuleSet")
     
+    # Job queue fields
+    priority = Column(Integer, default=0)  # Higher runs first
+    extended = Column(Boolean, default=False)  # Queued job is an extension run
+    queued_at = Column(DateTime, nullable=True)
+    force = Column(Boolean, default=False)  # Bypass the review result cache
+    incremental = Column(Boolean, default=False)  # Only review files changed since reviewed_head_sha
+    batch_id = Column(Integer, ForeignKey("review_batches.id"), nullable=True)  # Submitted with POST /batch
+    
+    # Head commit the current results were produced for
+    reviewed_head_sha = Column(String(64), nullable=True)
+    
+    # Model tokens: planned for the last run, used by all runs of the review
+    estimated_tokens = Column(Integer, nullable=True)
+    prompt_tokens = Column(Integer, nullable=True)
+    completion_tokens = Column(Integer, nullable=True)
+    token_usage = Column(JSON, nullable=True)  # Plan and per-tool usage of the last run
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     def add_log(self, message: str, level: str = "info", db=None):
-        """Add a log entry to processing_logs"""
-        if self.processing_logs is None:
-            self.processing_logs = []
-        
-        # Create a new list copy so SQLAlchemy detects the change to the JSON column
-        updated_logs = list(self.processing_logs)
-        log_entry = {
-            "timestamp": datetime.utcnow().isoformat(),
-            "level": level,
-            "message": message
-        }
-        updated_logs.append(log_entry)
-        self.processing_logs = updated_logs
+        """Append a log entry to the review_logs table"""
+        # The write-only collection never loads existing entries; the new row is
+        # inserted with the next flush, batched with any other pending entries.
+        log = ReviewLog(
+            timestamp=datetime.utcnow(),
+            level=level,
+            message=message
+        )
+        self.logs.add(log)
+        _queue_event(self, "log", log.to_dict(), log=log)
         
         # Note: db.commit() should be called by the caller after add_log
         # We don't commit here to allow multiple logs to be added before committing
 
+    # Position in the job queue, filled in by the router (not persisted)
+    queue_position = None
+    # Log entries for detail responses, filled in by the router (not persisted)
+    processing_logs = None
+
     suggestions = relationship("Suggestion", back_populates="review", cascade="all, delete-orphan")
+    logs = relationship("ReviewLog", lazy="write_only", cascade="all, delete-orphan", passive_deletes=True)
+    chat_messages = relationship("ChatMessage", lazy="write_only", cascade="all, delete-orphan", passive_deletes=True)
+
+
+# Progress events are published once the change is committed, so a client
+# never sees a log line or status the database does not have (yet). Events
+# are queued on the session, get their ids when flushed and are published
+# after the commit; a rollback drops them.
+_QUEUED_EVENTS = "review_events.queued"
+_FLUSHED_EVENTS = "review_events.flushed"
+
+
+def _queue_event(review: "PRReview", event_name: str, data: dict, log: "ReviewLog" = None):
+    session = object_session(review)
+    if session is None:
+        review_events.publish(review.id, event_name, data)
+        return
+    session.info.setdefault(_QUEUED_EVENTS, []).append((review, event_name, data, log))
+
+
+@event.listens_for(PRReview.status, "set")
+def _publish_status(target, value, oldvalue, initiator):
+    if value != oldvalue:
+        _queue_event(target, "status", {"status": value})
+
+
+@event.listens_for(PRReview.current_stage, "set")
+def _publish_stage(target, value, oldvalue, initiator):
+    if value != oldvalue:
+        _queue_event(target, "stage", {"current_stage": value})
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _resolve_event_ids(session, flush_context):
+    queued = session.info.pop(_QUEUED_EVENTS, None)
+    if not queued:
+        return
+    flushed = session.info.setdefault(_FLUSHED_EVENTS, [])
+    for review, event_name, data, log in queued:
+        if log is not None:
+            # The log row id is the SSE event id, the same cursor as /logs?after=
+            data = {**data, "id": log.id}
+        flushed.append((review.id, event_name, data))
+
+
+@event.listens_for(Session, "after_commit")
+def _publish_committed_events(session):
+    # Events queued after the last flush belong to changes that were never written
+    session.info.pop(_QUEUED_EVENTS, None)
+    for review_id, event_name, data in session.info.pop(_FLUSHED_EVENTS, ()):
+        review_events.publish(review_id, event_name, data)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_rolled_back_events(session):
+    session.info.pop(_QUEUED_EVENTS, None)
+    session.info.pop(_FLUSHED_EVENTS, None)
 
 
 class Suggestion(Base):
     __tablename__ = "suggestions"
 
     id = Column(Integer, primary_key=True, index=True)
-    review_id = Column(Integer, ForeignKey("pr_reviews.id", ondelete="CASCADE"), nullable=False)
+    review_id = Column(Integer, ForeignKey("pr_reviews.id", ondelete="CASCADE"), nullable=False, index=True)
     file_path = Column(Text, nullable=False)
     line_start = Column(Integer, nullable=True)
     line_end = Column(Integer, nullable=True)
@@ -103,3 +192,33 @@ class Suggestion(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
     review = relationship("PRReview", back_populates="suggestions")
+
+
+class ReviewLog(Base):
+    """Append-only processing log entry of a review"""
+    __tablename__ = "review_logs"
+
+    id = Column(Integer, primary_key=True)
+    review_id = Column(Integer, ForeignKey("pr_reviews.id", ondelete="CASCADE"), nullable=False, index=True)
+    timestamp = Column(DateTime, default=datetime.utcnow)
+    level = Column(String(20), default="info")
+    message = Column(Text, nullable=False)
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "timestamp": self.timestamp.isoformat() if self.timestamp else None,
+            "level": self.level,
+            "message": self.message
+        }
+
+
+class ChatMessage(Base):
+    """One turn of the /ask conversation about a review's PR"""
+    __tablename__ = "chat_messages"
+
+    id = Column(Integer, primary_key=True)
+    review_id = Column(Integer, ForeignKey("pr_reviews.id", ondelete="CASCADE"), nullable=False, index=True)
+    role = Column(String(20), nullable=False)  # "user" or "assistant"
+    content = Column(Text, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
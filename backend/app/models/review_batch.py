@@ -0,0 +1,14 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from ..database import Base
+
+
+class ReviewBatch(Base):
+    """A group of reviews submitted together (a list of PRs or a repository's open PRs)"""
+    __tablename__ = "review_batches"
+
+    id = Column(Integer, primary_key=True, index=True)
+    repository = Column(String(500), nullable=True)  # Set when the open PRs of a repository were enumerated
+    rule_set_id = Column(Integer, ForeignKey("review_rule_sets.id"), nullable=True)
+    total = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
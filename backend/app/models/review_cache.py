@@ -0,0 +1,27 @@
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Boolean, JSON
+from ..database import Base
+
+
+class ReviewCacheEntry(Base):
+    """Stored pr-agent result of a PR at a given head commit, model and rule set"""
+    __tablename__ = "review_cache"
+
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)  # sha256 of the key fields
+
+    # Key fields, kept for inspection
+    provider = Column(String(50), nullable=False)
+    repository = Column(String(500), nullable=False)  # host/owner/repo or host/group/project
+    pr_number = Column(Integer, nullable=False)
+    head_sha = Column(String(64), nullable=False)
+    model = Column(String(300), nullable=False)
+    instructions_hash = Column(String(64), nullable=True)
+    extended = Column(Boolean, default=False)
+
+    # score, effort, security_concerns, can_be_split, description, suggestions
+    result = Column(JSON, nullable=False)
+
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow, index=True)
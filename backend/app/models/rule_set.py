@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, JSON
 from ..database import Base
 
 
@@ -11,6 +11,9 @@ class ReviewRuleSet(Base):
     name = Column(String(200), nullable=False, unique=True)  # e.g., "frontend-digiclass"
     description = Column(Text, nullable=True)  # Optional description
     instructions = Column(Text, nullable=False)  # The actual rules/instructions for pr-agent
+    ignore_patterns = Column(JSON, nullable=True)  # Globs of files left out of the review ("!glob" keeps)
+    skip_generated = Column(Boolean, default=True)  # Skip lockfiles, bundles and generated code
+    tool_models = Column(JSON, nullable=True)  # Model chains per tool replacing the settings' ones
     is_active = Column(Boolean, default=True)  # Soft delete support
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from sqlalchemy import Column, Integer, String, Text, DateTime, JSON
 from ..database import Base
 
 
@@ -20,5 +20,9 @@ class AppSettings(Base):
     ai_api_key = Column(Text, default="")
     ai_base_url = Column(String(500), default="http://localhost:11434")
     max_tokens = Column(Integer, default=128000)
+    # Inference servers balanced over instead of ai_base_url: [{"url", "weight", "enabled"}]
+    ai_endpoints = Column(JSON, nullable=True)
+    # Model chains per pr-agent tool: {"review"|"improve"|"describe": [model, fallback, ...]}
+    tool_models = Column(JSON, nullable=True)
 
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
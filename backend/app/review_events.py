@@ -0,0 +1,62 @@
+"""
+In-process pub/sub of review progress events for the SSE stream.
+
+PRReview publishes log lines and status/stage transitions here once they are
+committed. Log events carry the id of their review_logs row, so a client that
+connects late or reconnects (Last-Event-ID) catches up by reading the log
+entries after that id from the database, like GET /logs?after= does.
+"""
+import asyncio
+import threading
+from typing import Dict, Optional, Set
+
+TERMINAL_STATUSES = ("completed", "failed", "cancelled")
+
+
+class ReviewEventBroker:
+    """Fans out review events to subscribed asyncio queues"""
+
+    def __init__(self):
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._lock = threading.Lock()
+
+    def publish(self, review_id: int, event: str, data: dict) -> None:
+        """Deliver an event to the subscribers of a review (safe to call from any thread)"""
+        if review_id is None:
+            return
+        loop = self._loop
+        if loop is not None and not loop.is_closed():
+            try:
+                running = asyncio.get_running_loop()
+            except RuntimeError:
+                running = None
+            if running is not loop:
+                loop.call_soon_threadsafe(self._publish, review_id, event, data)
+                return
+        self._publish(review_id, event, data)
+
+    def subscribe(self, review_id: int) -> asyncio.Queue:
+        """Register a subscriber; returns the queue receiving the review's events"""
+        self._loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        with self._lock:
+            self._subscribers.setdefault(review_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, review_id: int, queue: asyncio.Queue) -> None:
+        with self._lock:
+            subscribers = self._subscribers.get(review_id)
+            if subscribers:
+                subscribers.discard(queue)
+                if not subscribers:
+                    del self._subscribers[review_id]
+
+    def _publish(self, review_id: int, event: str, data: dict) -> None:
+        with self._lock:
+            subscribers = list(self._subscribers.get(review_id, ()))
+        for queue in subscribers:
+            queue.put_nowait({"event": event, "data": data})
+
+
+review_events = ReviewEventBroker()
@@ -1,39 +1,104 @@
 import asyncio
+import base64
+import json
 import logging
-from typing import Optional, List
-from fastapi import APIRouter, Depends, HTTPException, BackgroundTasks, Request
-from sqlalchemy.orm import Session
+import time
+from contextlib import nullcontext
+from datetime import datetime
+from typing import Optional, List, Dict, Tuple
+from fastapi import APIRouter, Depends, HTTPException, Request, Header
+from fastapi.responses import StreamingResponse
+from sqlalchemy import or_, and_, select, func, delete
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only, selectinload
 
 logger = logging.getLogger(__name__)
 
-from ..database import get_db
-from ..models import PRReview, Suggestion, ReviewStatus, ReviewRuleSet
+from ..database import get_async_db, AsyncSessionLocal
+from ..models import PRReview, Suggestion, ReviewLog, ChatMessage, ReviewStatus, ReviewRuleSet, ReviewBatch
 from ..schemas import (
     PRReviewCreate, 
     PRReviewResponse, 
     PRReviewDetailResponse,
     PRReviewListResponse,
+    ReviewLogListResponse,
     ChatRequest,
-    ChatResponse
+    ChatResponse,
+    ChatHistoryResponse,
+    ReviewBatchCreate,
+    ReviewBatchResponse
 )
-from ..services import get_provider_service, detect_provider, ProviderType
+from ..services import ComparisonUnavailable, get_provider_service, detect_provider, ProviderType
 from ..services.pr_agent_service import PRAgentService
+from ..services.review_queue import review_queue
+from ..services.diff_filter import DiffFilter
+from ..services.review_cache import ReviewCacheKey, get_cached_review, store_review
+from ..services.incremental import ChangeSet
+from ..services.inflight import inflight_reviews
+from ..services.rate_limits import RateLimitExceeded, rate_limit_hits, rate_limits, watch_rate_limits
+from ..services.cancellation import cancellations, chat_key, review_key
+from ..services.pr_chat import MAX_HISTORY_MESSAGES, chat_contexts
+from ..review_events import review_events, TERMINAL_STATUSES
 
 router = APIRouter(prefix="/api/reviews", tags=["reviews"])
 
+# Minimum seconds between commits of pr-agent progress log lines
+LOG_FLUSH_INTERVAL = 1.0
 
-async def process_review(review_id: int, pr_url: str, db: Session, extended: bool = False, extra_instructions: str = None):
+# Seconds between SSE keep-alive comments
+EVENTS_KEEPALIVE_INTERVAL = 15.0
+
+# Upper bound of PRs queued by one POST /batch
+MAX_BATCH_SIZE = 200
+
+# Columns loaded for the history list (see PRReviewSummary)
+LIST_COLUMNS = (
+    PRReview.id, PRReview.pr_url, PRReview.provider, PRReview.project_name,
+    PRReview.pr_number, PRReview.pr_title, PRReview.pr_author,
+    PRReview.source_branch, PRReview.target_branch, PRReview.status,
+    PRReview.current_stage, PRReview.score, PRReview.effort, PRReview.priority,
+    PRReview.created_at, PRReview.updated_at,
+)
+
+# Suggestion columns copied when an incremental review starts from an earlier one
+SUGGESTION_COPY_FIELDS = (
+    "severity", "category", "original_code", "improved_code",
+    "suggestion", "explanation", "score", "score_why",
+)
+
+# Seconds a list total is reused before counting again
+TOTAL_CACHE_TTL = 10.0
+_total_cache: Dict[Optional[str], Tuple[int, float]] = {}
+
+
+async def load_review_logs(db: AsyncSession, review: PRReview, after: int = 0, limit: Optional[int] = None) -> List[dict]:
+    """Return log entries of a review with id > after, oldest first"""
+    entries = []
+    # Entries stored in the old JSON column have no id and come before everything else
+    if not after and review.legacy_processing_logs:
+        entries.extend(review.legacy_processing_logs)
+    
+    query = (
+        select(ReviewLog)
+        .where(ReviewLog.review_id == review.id, ReviewLog.id > after)
+        .order_by(ReviewLog.id)
+    )
+    if limit:
+        query = query.limit(limit)
+    entries.extend(log.to_dict() for log in await db.scalars(query))
+    return entries
+
+
+async def process_review(review_id: int, pr_url: str, db: AsyncSession, extended: bool = False, extra_instructions: str = None, diff_filter: Optional[DiffFilter] = None, model_overrides: Optional[dict] = None):
     """Background task to process PR review"""
     # Re-fetch the review from DB (needed for background task)
-    review = db.query(PRReview).filter(PRReview.id == review_id).first()
+    review = await db.get(PRReview, review_id)
     if not review:
         logger.warning(f"Review {review_id} not found in database")
         return
     
     try:
-        # Initialize processing logs if not extended
         if not extended:
-            review.processing_logs = []
             review.add_log(f"Starting review processing for PR: {pr_url}", "info", db)
         else:
             review.add_log(f"Starting extended review processing for PR: {pr_url}", "info", db)
@@ -42,74 +107,168 @@ async def process_review(review_id: int, pr_url: str, db: Session, extended: boo
         review.status = ReviewStatus.REVIEWING.value
         review.current_stage = None
         review.add_log("Status changed to: reviewing", "info", db)
-        await asyncio.to_thread(db.commit)
         
         # Detect provider
         provider = detect_provider(pr_url)
         review.provider = provider
         review.add_log(f"Provider detected: {provider}", "info", db)
-        await asyncio.to_thread(db.commit)
+        await db.commit()
         
-        # Fetch PR info for metadata (pr-agent will handle the actual review)
-        if not extended:
-            review.current_stage = "fetching_pr_info"
-            review.add_log("Stage: Fetching PR information for metadata...", "info", db)
-            await asyncio.to_thread(db.commit)
-            
-            try:
-                provider_service = await asyncio.to_thread(get_provider_service, pr_url)
-                pr_info = await asyncio.to_thread(provider_service.get_pr_info, pr_url)
+        # Use pr-agent service for review (it handles diff fetching and processing internally)
+        pr_agent_service = PRAgentService()
+        routing = pr_agent_service.model_routing(model_overrides)
+        
+        # Only the PR header is fetched here (the head commit is enough for a
+        # cache hit); commits and diffs are fetched once pr-agent runs
+        review.current_stage = "fetching_pr_info"
+        review.add_log("Stage: Fetching PR information for metadata...", "info", db)
+        await db.commit()
+        
+        pr_info = None
+        try:
+            provider_service = await asyncio.to_thread(get_provider_service, pr_url)
+            pr_info = await asyncio.to_thread(provider_service.get_pr_info, pr_url)
+            if not extended:
                 review.project_name = pr_info.project_name
                 review.pr_number = pr_info.pr_number
                 review.pr_title = pr_info.title
                 review.pr_author = pr_info.author
                 review.source_branch = pr_info.source_branch
                 review.target_branch = pr_info.target_branch
-                review.add_log(f"PR metadata retrieved: {pr_info.project_name} #{pr_info.pr_number}", "info", db)
-                await asyncio.to_thread(db.commit)
-            except Exception as e:
-                # If fetching PR info fails, continue anyway - pr-agent will handle it
-                review.add_log(f"Warning: Could not fetch PR metadata: {e}", "warning", db)
-                await asyncio.to_thread(db.commit)
+            review.add_log(f"PR metadata retrieved: {pr_info.project_name} #{pr_info.pr_number}", "info", db)
+            await db.commit()
+        except RateLimitExceeded:
+            raise
+        except Exception as e:
+            # If fetching PR info fails, continue anyway - pr-agent will handle it
+            review.add_log(f"Warning: Could not fetch PR metadata: {e}", "warning", db)
+            await db.commit()
         
-        # Update stage: running pr-agent review
-        review.current_stage = "getting_llm_review"
-        review.add_log("Stage: Running pr-agent review...", "info", db)
-        await asyncio.to_thread(db.commit)
+        # Only the files changed since the last reviewed commit are sent to pr-agent
+        only_files = None
+        if review.incremental:
+            if pr_info and pr_info.head_sha:
+                only_files = await _prepare_incremental(db, review, pr_url, pr_info)
+            else:
+                review.add_log("Incremental mode: head commit unknown - reviewing the whole PR", "warning", db)
+            await db.commit()
         
-        # Use pr-agent service for review (it handles diff fetching and processing internally)
-        pr_agent_service = PRAgentService()
-        review.add_log(f"PR-Agent service initialized", "info", db)
-        await asyncio.to_thread(db.commit)
+        # Reuse the stored result of an identical review unless forced to rerun
+        cache_key = None
+        review_result = None
+        token_usage = None
+        if only_files == []:
+            review.add_log("No files changed since the last reviewed commit - nothing to review", "info", db)
+            review_result = {"suggestions": []}
+        else:
+            cache_key = _review_cache_key(
+                provider, pr_url, pr_info, pr_agent_service.routed_model_id(routing), extra_instructions,
+                extended, only_files, diff_filter
+            )
+        if cache_key and not review.force:
+            review_result = await get_cached_review(db, cache_key)
+            if review_result:
+                review.add_log(
+                    f"Cache hit: reusing the review of commit {cache_key.head_sha[:8]} "
+                    f"from {review_result['cached_at']:%Y-%m-%d %H:%M} UTC", "info", db
+                )
+                await db.commit()
         
-        async def log_callback(msg, level="info"):
-            review.add_log(msg, level, db)
-            await asyncio.to_thread(db.commit)
+        if review_result is None:
+            # Update stage: running pr-agent review
+            review.current_stage = "getting_llm_review"
+            review.add_log("Stage: Running pr-agent review...", "info", db)
+            review.add_log(f"PR-Agent service initialized", "info", db)
+            await db.commit()
+            
+            # Progress lines are committed in batches rather than one commit per line
+            last_log_flush = time.monotonic()
+            
+            async def log_callback(msg, level="info"):
+                nonlocal last_log_flush
+                review.add_log(msg, level, db)
+                if level != "info" or time.monotonic() - last_log_flush >= LOG_FLUSH_INTERVAL:
+                    last_log_flush = time.monotonic()
+                    await db.commit()
 
-        review_result = await pr_agent_service.review_pr(pr_url, log_callback=log_callback, extended=extended, extra_instructions=extra_instructions)
+            async def run_pr_agent() -> dict:
+                nonlocal token_usage
+                # Fetch the PR once for all pr-agent tools
+                snapshot = None
+                try:
+                    snapshot = await pr_agent_service.fetch_snapshot(pr_url)
+                except RateLimitExceeded:
+                    raise
+                except Exception as e:
+                    # pr-agent's tools then fetch the PR themselves
+                    await log_callback(f"Warning: Could not fetch the PR for pr-agent: {e}", "warning")
+                result = await pr_agent_service.review_pr(
+                    pr_url, log_callback=log_callback, extended=extended,
+                    extra_instructions=extra_instructions, only_files=only_files,
+                    snapshot=snapshot, diff_filter=diff_filter, routing=routing
+                )
+                # pr-agent tools log and skip failed provider calls; a result
+                # missing parts because of the rate limit must not be stored
+                hits = rate_limit_hits()
+                if hits:
+                    raise hits[0]
+                # Tokens are spent by the review that ran pr-agent, not by cache hits or joiners
+                token_usage = result.pop("token_usage", None)
+                if cache_key:
+                    await store_review(db, cache_key, result)
+                return result
+            
+            async def on_join(running_review_id: int):
+                review.add_log(
+                    f"An identical review (#{running_review_id}) is already running - waiting for its result",
+                    "info", db
+                )
+                await db.commit()
+            
+            # Identical reviews submitted together share one pr-agent run
+            if cache_key:
+                review_result = await inflight_reviews.run_once(cache_key.digest, review.id, run_pr_agent, on_join)
+            else:
+                review_result = await run_pr_agent()
         suggestions = review_result.get("suggestions", [])
         
-        # Save advanced review metadata
-        if not extended or review_result.get("score"):
+        # Save advanced review metadata (partial runs only add to what is there)
+        keep_existing = extended or only_files is not None
+        if not keep_existing or review_result.get("score"):
             review.score = review_result.get("score")
-        if not extended or review_result.get("effort"):
+        if not keep_existing or review_result.get("effort"):
             review.effort = review_result.get("effort")
-        if not extended or review_result.get("security_concerns"):
+        if not keep_existing or review_result.get("security_concerns"):
             review.security_concerns = review_result.get("security_concerns")
-        if not extended or review_result.get("can_be_split"):
+        if not keep_existing or review_result.get("can_be_split"):
             review.can_be_split = review_result.get("can_be_split")
-        if not extended or review_result.get("description"):
+        if not keep_existing or review_result.get("description"):
             review.pr_description = review_result.get("description")
         
+        if token_usage:
+            _record_token_usage(review, token_usage, keep_existing)
+            review.add_log(
+                f"Tokens used: {token_usage['prompt_tokens']} prompt + {token_usage['completion_tokens']} completion"
+                + (f" (estimated {review.estimated_tokens})" if token_usage.get("plan") else ""),
+                "info", db
+            )
+            if token_usage.get("tools"):
+                review.add_log("Per tool: " + "; ".join(
+                    f"{tool} {usage['duration_ms'] / 1000:.1f}s, {usage['calls']} calls on "
+                    f"{', '.join(usage['models']) or 'no model'}"
+                    + (f", {usage['failures']} failed" if usage['failures'] else "")
+                    for tool, usage in token_usage["tools"].items()
+                ), "info", db)
+        
         review.add_log(f"PR-Agent review completed: {len(suggestions)} suggestions found", "info", db)
         
         # Update stage: saving suggestions
         review.current_stage = "saving_suggestions"
         review.add_log(f"Stage: Saving {len(suggestions)} suggestions to database...", "info", db)
-        await asyncio.to_thread(db.commit)
+        await db.commit()
         
         # Get existing suggestions to avoid duplicates
-        existing_suggestions = db.query(Suggestion).filter(Suggestion.review_id == review.id).all()
+        existing_suggestions = (await db.scalars(select(Suggestion).where(Suggestion.review_id == review.id))).all()
         existing_keys = set()
         for s in existing_suggestions:
             # Create a unique key for each suggestion to avoid duplicates
@@ -145,29 +304,227 @@ async def process_review(review_id: int, pr_url: str, db: Session, extended: boo
         # Update status to completed and clear stage
         review.status = ReviewStatus.COMPLETED.value
         review.current_stage = None
+        review.force = False
+        if pr_info and pr_info.head_sha:
+            review.reviewed_head_sha = pr_info.head_sha
         review.add_log("Review processing completed successfully", "info", db)
-        await asyncio.to_thread(db.commit)
+        await db.commit()
         
     except Exception as e:
         error_msg = str(e)
-        logger.error(f"Error processing review {review_id}: {error_msg}", exc_info=True)
+        # A failed flush leaves the session unusable until rolled back, and the
+        # rollback expires the review, so load it again before recording the error
+        await db.rollback()
+        review = await db.get(PRReview, review_id)
+        if not review:
+            return
+        reset_at = _rate_limit_reset(review, e)
+        if reset_at is not None:
+            # The queue holds the provider's reviews until the limit resets
+            review.status = ReviewStatus.PENDING.value
+            review.current_stage = None
+            review.add_log(
+                f"Provider API rate limit reached - review requeued, it resumes after the reset "
+                f"(~{max(0, int(reset_at - time.time()))}s)", "warning", db
+            )
+            await db.commit()
+            logger.warning(f"Review {review_id} requeued: {error_msg}")
+            return
+        logger.error(f"Error processing review {review_id}: {error_msg}", exc_info=e)
         review.status = ReviewStatus.FAILED.value
         review.current_stage = None
         review.error_message = error_msg
         review.add_log(f"ERROR: {error_msg}", "error", db)
-        db.commit()
+        await db.commit()
+
+
+def _review_cache_key(provider: str, pr_url: str, pr_info, model_id: str, extra_instructions: Optional[str],
+                      extended: bool, only_files: Optional[List[str]],
+                      diff_filter: Optional[DiffFilter]) -> Optional[ReviewCacheKey]:
+    """
+    Key of the cached result of a review, None when it is not cached: incremental
+    results depend on the previous commit and extensions are asked for to get
+    new suggestions.
+    """
+    if not pr_info or only_files is not None or extended:
+        return None
+    return ReviewCacheKey.for_review(
+        provider, pr_url, pr_info, model_id, extra_instructions, extended,
+        diff_filter.fingerprint if diff_filter else None
+    )
+
+
+def _rate_limit_reset(review: PRReview, error: Exception) -> Optional[float]:
+    """
+    When the review was stopped by its provider's rate limit and the queue holds
+    that provider, the time the limit resets; None otherwise (the review fails).
+    """
+    hits = rate_limit_hits()
+    if isinstance(error, RateLimitExceeded):
+        hits.append(error)
+    if not hits or review.provider not in rate_limits.blocked_providers():
+        return None
+    return max(hit.reset_at for hit in hits)
+
+
+def _record_token_usage(review: PRReview, token_usage: dict, add: bool):
+    """Store the token plan and usage of a pr-agent run; partial runs add to the totals"""
+    plan = token_usage.get("plan")
+    if plan:
+        review.estimated_tokens = plan["prompt_tokens"] + plan["completion_tokens"]
+    if add:
+        review.prompt_tokens = (review.prompt_tokens or 0) + token_usage["prompt_tokens"]
+        review.completion_tokens = (review.completion_tokens or 0) + token_usage["completion_tokens"]
+    else:
+        review.prompt_tokens = token_usage["prompt_tokens"]
+        review.completion_tokens = token_usage["completion_tokens"]
+    review.token_usage = token_usage
+
+
+async def _prepare_incremental(db: AsyncSession, review: PRReview, pr_url: str, pr_info) -> Optional[List[str]]:
+    """
+    Carry the results of the last reviewed commit over to the new head.
+    
+    Earlier suggestions are moved to their new line numbers, or dropped when the
+    lines they point at changed. Returns the paths changed since that commit, or
+    None when there is nothing to compare against and the whole PR is reviewed.
+    """
+    baseline = review if review.reviewed_head_sha else None
+    if baseline is None and not review.extended:
+        # A new review of a PR that was reviewed before
+        baseline = await db.scalar(
+            select(PRReview)
+            .where(
+                PRReview.pr_url == review.pr_url,
+                PRReview.id != review.id,
+                PRReview.status == ReviewStatus.COMPLETED.value,
+                PRReview.reviewed_head_sha.isnot(None)
+            )
+            .order_by(PRReview.created_at.desc(), PRReview.id.desc())
+            .limit(1)
+        )
+    if baseline is None:
+        review.add_log("Incremental mode: no earlier reviewed commit - reviewing the whole PR", "info", db)
+        return None
+    
+    base_sha = baseline.reviewed_head_sha
+    if base_sha == pr_info.head_sha:
+        changes = ChangeSet.from_diffs([])
+    else:
+        try:
+            provider_service = await asyncio.to_thread(get_provider_service, pr_url)
+            diffs = await asyncio.to_thread(provider_service.get_changed_files, pr_url, base_sha, pr_info.head_sha)
+        except ComparisonUnavailable as e:
+            review.add_log(f"Incremental mode: {e} - reviewing the whole PR", "info", db)
+            return None
+        except Exception as e:
+            review.add_log(f"Warning: Could not compare {base_sha[:8]}..{pr_info.head_sha[:8]} ({e}) - reviewing the whole PR", "warning", db)
+            return None
+        changes = ChangeSet.from_diffs(diffs)
+    
+    previous = (await db.scalars(select(Suggestion).where(Suggestion.review_id == baseline.id))).all()
+    kept = dropped = 0
+    for sugg in previous:
+        location = changes.remap(sugg.file_path, sugg.line_start, sugg.line_end)
+        if location is None:
+            dropped += 1
+            if baseline is review:
+                await db.delete(sugg)
+            continue
+        kept += 1
+        if baseline is review:
+            sugg.file_path, sugg.line_start, sugg.line_end = location
+        else:
+            db.add(Suggestion(
+                review_id=review.id,
+                file_path=location[0],
+                line_start=location[1],
+                line_end=location[2],
+                **{field: getattr(sugg, field) for field in SUGGESTION_COPY_FIELDS}
+            ))
+    
+    if baseline is not review:
+        review.score = baseline.score
+        review.effort = baseline.effort
+        review.security_concerns = baseline.security_concerns
+        review.can_be_split = baseline.can_be_split
+        review.pr_description = baseline.pr_description
+    
+    review.add_log(
+        f"Incremental mode: {len(changes.paths)} files changed since {base_sha[:8]}, "
+        f"kept {kept} earlier suggestions, dropped {dropped} on changed lines", "info", db
+    )
+    return changes.paths
+
+
+async def run_review_job(review_id: int):
+    """Queue worker entry point: run a pending review or extension with its own session"""
+    logger.info(f"[REVIEW JOB] Starting review processing for review_id={review_id}")
+    async with AsyncSessionLocal() as db:
+        try:
+            review = await db.get(PRReview, review_id)
+            if not review:
+                logger.error(f"[REVIEW JOB] Review {review_id} not found in database!")
+                return
+            
+            extended = bool(review.extended)
+            review.add_log("Extension task started" if extended else "Background task started - processing beginning", "info", None)
+            await db.commit()
+            
+            # Fetch rule set instructions if rule_set_id is present; its pre-filter
+            # and models also apply to extension runs
+            extra_instructions = None
+            rule_set = None
+            if review.rule_set_id:
+                rule_set = await db.scalar(
+                    select(ReviewRuleSet).where(
+                        ReviewRuleSet.id == review.rule_set_id,
+                        ReviewRuleSet.is_active == True
+                    )
+                )
+                if rule_set and not extended:
+                    extra_instructions = rule_set.instructions
+                    review.add_log(f"Using rule set: {rule_set.name}", "info", None)
+                    await db.commit()
+                    logger.info(f"[REVIEW JOB] Applied rule set '{rule_set.name}' for review_id={review_id}")
+            diff_filter = DiffFilter.for_rule_set(rule_set)
+            model_overrides = rule_set.tool_models if rule_set else None
+            
+            with watch_rate_limits():
+                await process_review(review_id, review.pr_url, db, extended=extended, extra_instructions=extra_instructions, diff_filter=diff_filter, model_overrides=model_overrides)
+            logger.info(f"[REVIEW JOB] Completed review processing for review_id={review_id}")
+        except Exception as e:
+            logger.error(f"[REVIEW JOB] Error processing review {review_id}: {e}", exc_info=True)
+            # Log error and update review status
+            async with AsyncSessionLocal() as error_db:
+                error_review = await error_db.get(PRReview, review_id)
+                if error_review:
+                    error_review.status = ReviewStatus.FAILED.value
+                    error_review.current_stage = None
+                    error_review.error_message = str(e)
+                    error_review.add_log(f"FATAL ERROR in background task: {str(e)}", "error", None)
+                    await error_db.commit()
+    logger.info(f"[REVIEW JOB] Closed database session for review_id={review_id}")
+
+
+async def _attach_queue_positions(db: AsyncSession, reviews: List[PRReview]):
+    """Fill in the transient queue_position of pending reviews"""
+    if not any(r.status == ReviewStatus.PENDING.value for r in reviews):
+        return
+    positions = await review_queue.queue_positions(db)
+    for review in reviews:
+        review.queue_position = positions.get(review.id)
 
 
 @router.post("", response_model=PRReviewResponse)
-def create_review(
+async def create_review(
     review_data: PRReviewCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Submit a PR for review.
     
-    Creates a new review entry and starts background processing.
+    Creates a new review entry and adds it to the review queue.
     """
     # Detect provider from URL
     provider = detect_provider(review_data.pr_url)
@@ -177,221 +534,494 @@ def create_review(
         pr_url=review_data.pr_url,
         provider=provider,
         status=ReviewStatus.PENDING.value,
-        processing_logs=[],
-        rule_set_id=review_data.rule_set_id
+        rule_set_id=review_data.rule_set_id,
+        priority=review_data.priority,
+        extended=False,
+        force=review_data.force,
+        incremental=review_data.incremental,
+        queued_at=datetime.utcnow()
     )
     review.add_log(f"Review created for PR: {review_data.pr_url}", "info", None)
     review.add_log(f"Provider: {provider}", "info", None)
-    review.add_log("Status: pending - waiting for background task to start", "info", None)
+    review.add_log("Status: pending - waiting in review queue", "info", None)
     db.add(review)
-    db.commit()
-    db.refresh(review)
+    await db.commit()
     
-    # Start background processing
-    # Note: We need to create a new session for background task
-    from ..database import SessionLocal
+    logger.info(f"[CREATE REVIEW] Queued review_id={review.id}, pr_url={review_data.pr_url}")
+    _invalidate_totals()
+    review_queue.notify()
+    await _attach_queue_positions(db, [review])
     
-    async def run_review_task():
-        """Background task to process review - FastAPI BackgroundTasks supports async"""
-        logger.info(f"[BACKGROUND TASK] Starting review processing for review_id={review.id}")
-        new_db = SessionLocal()
+    return review
+
+
+async def _batch_response(db: AsyncSession, batch: ReviewBatch) -> ReviewBatchResponse:
+    rows = (await db.execute(
+        select(PRReview.id, PRReview.status).where(PRReview.batch_id == batch.id).order_by(PRReview.id)
+    )).all()
+    counts: Dict[str, int] = {}
+    for row in rows:
+        counts[row.status] = counts.get(row.status, 0) + 1
+    finished = sum(counts.get(status, 0) for status in TERMINAL_STATUSES)
+    return ReviewBatchResponse(
+        id=batch.id,
+        repository=batch.repository,
+        total=len(rows),
+        counts=counts,
+        finished=finished,
+        progress=round(finished / len(rows), 3) if rows else 1.0,
+        review_ids=[row.id for row in rows],
+        created_at=batch.created_at
+    )
+
+
+@router.post("/batch", response_model=ReviewBatchResponse)
+async def create_review_batch(
+    batch_data: ReviewBatchCreate,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Submit many PRs for review at once.
+    
+    Takes a list of PR URLs and/or a repository URL whose open PRs are listed
+    (optionally filtered by target branch and author). All reviews are queued
+    in one transaction, by default below single submissions in priority; the
+    queue's worker limits bound how many run at the same time.
+    """
+    pr_urls = [url.strip() for url in batch_data.pr_urls if url.strip()]
+    
+    if batch_data.repository:
         try:
-            # Add initial log entry
-            review_db = await asyncio.to_thread(lambda: new_db.query(PRReview).filter(PRReview.id == review.id).first())
-            if review_db:
-                review_db.add_log("Background task started - processing beginning", "info", None)
-                await asyncio.to_thread(new_db.commit)
-                logger.info(f"[BACKGROUND TASK] Logged start for review_id={review.id}")
-            else:
-                logger.error(f"[BACKGROUND TASK] Review {review.id} not found in database!")
-                return
-            
-            # Fetch rule set instructions if rule_set_id is present
-            extra_instructions = None
-            if review_data.rule_set_id:
-                rule_set = await asyncio.to_thread(
-                    lambda: new_db.query(ReviewRuleSet).filter(
-                        ReviewRuleSet.id == review_data.rule_set_id,
-                        ReviewRuleSet.is_active == True
-                    ).first()
-                )
-                if rule_set:
-                    extra_instructions = rule_set.instructions
-                    review_db.add_log(f"Using rule set: {rule_set.name}", "info", None)
-                    await asyncio.to_thread(new_db.commit)
-                    logger.info(f"[BACKGROUND TASK] Applied rule set '{rule_set.name}' for review_id={review.id}")
-            
-            await process_review(review.id, review_data.pr_url, new_db, extra_instructions=extra_instructions)
-            logger.info(f"[BACKGROUND TASK] Completed review processing for review_id={review.id}")
+            service = await asyncio.to_thread(get_provider_service, batch_data.repository)
+            pr_urls += await asyncio.to_thread(
+                service.list_open_prs, batch_data.repository,
+                target_branch=batch_data.target_branch, author=batch_data.author, limit=batch_data.limit
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
         except Exception as e:
-            logger.error(f"[BACKGROUND TASK] Error processing review {review.id}: {e}", exc_info=True)
-            # Log error and update review status
-            error_db = SessionLocal()
-            try:
-                error_review = await asyncio.to_thread(lambda: error_db.query(PRReview).filter(PRReview.id == review.id).first())
-                if error_review:
-                    error_review.status = ReviewStatus.FAILED.value
-                    error_review.current_stage = None
-                    error_review.error_message = str(e)
-                    error_review.add_log(f"FATAL ERROR in background task: {str(e)}", "error", None)
-                    await asyncio.to_thread(error_db.commit)
-            finally:
-                try:
-                    await asyncio.to_thread(error_db.close)
-                except Exception:
-                    pass
-        finally:
-            try:
-                await asyncio.to_thread(new_db.close)
-            except Exception:
-                pass
-            logger.info(f"[BACKGROUND TASK] Closed database session for review_id={review.id}")
-    
-    # FastAPI BackgroundTasks supports async functions directly
-    # It will properly await them after the response is sent
-    logger.info(f"[CREATE REVIEW] Adding background task for review_id={review.id}, pr_url={review_data.pr_url}")
-    background_tasks.add_task(run_review_task)
-    logger.info(f"[CREATE REVIEW] Background task added successfully for review_id={review.id}")
+            logger.error(f"[BATCH] Could not list open PRs of {batch_data.repository}: {e}", exc_info=True)
+            raise HTTPException(status_code=502, detail=f"Could not list open PRs: {e}")
     
-    return review
+    # Same PR listed twice (or both listed and enumerated) is reviewed once
+    pr_urls = list(dict.fromkeys(url.rstrip("/") for url in pr_urls))
+    if not pr_urls:
+        raise HTTPException(status_code=400, detail="No PRs to review")
+    if len(pr_urls) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"A batch holds at most {MAX_BATCH_SIZE} PRs")
+    
+    batch = ReviewBatch(repository=batch_data.repository, rule_set_id=batch_data.rule_set_id, total=len(pr_urls))
+    db.add(batch)
+    await db.flush()
+    
+    queued_at = datetime.utcnow()
+    for pr_url in pr_urls:
+        provider = detect_provider(pr_url)
+        review = PRReview(
+            pr_url=pr_url,
+            provider=provider,
+            status=ReviewStatus.PENDING.value,
+            rule_set_id=batch_data.rule_set_id,
+            priority=batch_data.priority,
+            extended=False,
+            force=batch_data.force,
+            incremental=batch_data.incremental,
+            batch_id=batch.id,
+            queued_at=queued_at
+        )
+        review.add_log(f"Review created for PR: {pr_url} (batch #{batch.id})", "info", None)
+        review.add_log(f"Provider: {provider}", "info", None)
+        review.add_log("Status: pending - waiting in review queue", "info", None)
+        db.add(review)
+    await db.commit()
+    
+    logger.info(f"[BATCH] Queued batch_id={batch.id} with {len(pr_urls)} reviews")
+    _invalidate_totals()
+    review_queue.notify()
+    
+    return await _batch_response(db, batch)
+
+
+@router.get("/batch/{batch_id}", response_model=ReviewBatchResponse)
+async def get_review_batch(batch_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Aggregate progress of a batch: reviews per status and the finished share.
+    """
+    batch = await db.get(ReviewBatch, batch_id)
+    
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    return await _batch_response(db, batch)
 
 
 @router.post("/{review_id}/extend", response_model=PRReviewResponse)
-def extend_review(
+async def extend_review(
     review_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    incremental: bool = False,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    Generate more suggestions for an existing review.
+    Generate more suggestions for an existing review (always a fresh pr-agent run).
+    
+    Pass incremental=true to only review files changed since the last reviewed commit.
     """
-    review = db.query(PRReview).filter(PRReview.id == review_id).first()
+    review = await db.get(PRReview, review_id)
     
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
         
-    if review.status == ReviewStatus.REVIEWING.value:
+    if review.status in (ReviewStatus.REVIEWING.value, ReviewStatus.PENDING.value):
         raise HTTPException(status_code=400, detail="Review is already in progress")
     
     # Update status to pending for extension
     review.status = ReviewStatus.PENDING.value
-    review.add_log("Extension requested - waiting for background task to start", "info", db)
-    db.commit()
-    db.refresh(review)
+    review.extended = True
+    review.incremental = incremental
+    review.queued_at = datetime.utcnow()
+    review.add_log("Extension requested - waiting in review queue", "info", db)
+    await db.commit()
     
-    # Start background processing for extension
-    from ..database import SessionLocal
+    review_queue.notify()
+    await _attach_queue_positions(db, [review])
     
-    async def run_extension_task():
-        logger.info(f"[EXTENSION TASK] Starting extended review for review_id={review.id}")
-        new_db = SessionLocal()
-        try:
-            review_db = await asyncio.to_thread(lambda: new_db.query(PRReview).filter(PRReview.id == review.id).first())
-            if review_db:
-                review_db.add_log("Extension task started", "info", None)
-                await asyncio.to_thread(new_db.commit)
-            
-            await process_review(review.id, review.pr_url, new_db, extended=True)
-            logger.info(f"[EXTENSION TASK] Completed extended review for review_id={review.id}")
-        except Exception as e:
-            logger.error(f"[EXTENSION TASK] Error extending review {review.id}: {e}", exc_info=True)
-            error_db = SessionLocal()
-            try:
-                error_review = await asyncio.to_thread(lambda: error_db.query(PRReview).filter(PRReview.id == review.id).first())
-                if error_review:
-                    error_review.status = ReviewStatus.FAILED.value
-                    error_review.add_log(f"FATAL ERROR in extension task: {str(e)}", "error", None)
-                    await asyncio.to_thread(error_db.commit)
-            finally:
-                await asyncio.to_thread(error_db.close)
-        finally:
-            await asyncio.to_thread(new_db.close)
-            
-    background_tasks.add_task(run_extension_task)
+    return review
+
+
+@router.post("/{review_id}/cancel", response_model=PRReviewResponse)
+async def cancel_review(review_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Cancel a queued or running review (or extension).
+    
+    A running review stops its pending LLM calls right away; suggestions saved
+    by earlier runs are kept.
+    """
+    review = await db.get(PRReview, review_id)
+    
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    
+    if review.status not in (ReviewStatus.REVIEWING.value, ReviewStatus.PENDING.value):
+        raise HTTPException(status_code=400, detail="Review is not in progress")
+    
+    was_running = await cancellations.cancel(review_key(review_id))
+    # The cancelled job may have committed progress meanwhile
+    await db.refresh(review)
+    review.status = ReviewStatus.CANCELLED.value
+    review.current_stage = None
+    review.add_log("Review cancelled" + (" - running analysis stopped" if was_running else ""), "warning", db)
+    await db.commit()
+    # The dispatcher may have started it between the check and the commit
+    await cancellations.cancel(review_key(review_id))
+    _invalidate_totals()
+    review_queue.notify()
     
     return review
 
 
+def _encode_cursor(review: PRReview) -> str:
+    raw = f"{review.created_at.isoformat()}|{review.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, review_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), int(review_id)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def _cached_total(db: AsyncSession, query, status: Optional[str]) -> int:
+    """COUNT(*) of the list query, cached for a few seconds per status filter"""
+    cached = _total_cache.get(status)
+    now = time.monotonic()
+    if cached and cached[1] > now:
+        return cached[0]
+    total = await db.scalar(select(func.count()).select_from(query.subquery()))
+    _total_cache[status] = (total, now + TOTAL_CACHE_TTL)
+    return total
+
+
+def _invalidate_totals():
+    _total_cache.clear()
+
+
 @router.get("", response_model=PRReviewListResponse)
-def list_reviews(
+async def list_reviews(
     page: int = 1,
     per_page: int = 20,
     status: Optional[str] = None,
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
-    List all PR reviews with pagination.
+    List PR reviews, newest first.
+    
+    Uses keyset pagination: pass the returned next_cursor as `cursor` to get the
+    following page. `page` is still accepted when no cursor is given.
     """
-    query = db.query(PRReview)
+    per_page = min(max(1, per_page), 100)
+    query = select(PRReview)
     
     if status:
-        query = query.filter(PRReview.status == status)
+        query = query.where(PRReview.status == status)
     
-    total = query.count()
+    total = await _cached_total(db, query.with_only_columns(PRReview.id), status)
     
-    reviews = (
-        query
-        .order_by(PRReview.created_at.desc())
-        .offset((page - 1) * per_page)
-        .limit(per_page)
-        .all()
-    )
+    # Only load the columns the summary needs
+    query = query.options(load_only(*LIST_COLUMNS)).order_by(PRReview.created_at.desc(), PRReview.id.desc())
+    if cursor:
+        cursor_created_at, cursor_id = _decode_cursor(cursor)
+        query = query.where(or_(
+            PRReview.created_at < cursor_created_at,
+            and_(PRReview.created_at == cursor_created_at, PRReview.id < cursor_id)
+        ))
+    elif page > 1:
+        query = query.offset((page - 1) * per_page)
+    
+    # Fetch one extra row to know whether there is a next page
+    reviews = (await db.scalars(query.limit(per_page + 1))).all()
+    has_more = len(reviews) > per_page
+    reviews = reviews[:per_page]
+    
+    await _attach_queue_positions(db, reviews)
     
     return PRReviewListResponse(
         items=reviews,
         total=total,
         page=page,
-        per_page=per_page
+        per_page=per_page,
+        next_cursor=_encode_cursor(reviews[-1]) if has_more else None
     )
 
 
 @router.get("/{review_id}", response_model=PRReviewDetailResponse)
-def get_review(review_id: int, db: Session = Depends(get_db)):
+async def get_review(review_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Get a specific review with all suggestions.
     """
-    review = db.query(PRReview).filter(PRReview.id == review_id).first()
+    review = await db.get(PRReview, review_id, options=[selectinload(PRReview.suggestions)])
     
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
+    await _attach_queue_positions(db, [review])
+    review.processing_logs = await load_review_logs(db, review)
+    
     return review
 
 
+@router.get("/{review_id}/logs", response_model=ReviewLogListResponse)
+async def get_review_logs(
+    review_id: int,
+    after: int = 0,
+    limit: int = 500,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Get processing log entries of a review incrementally.
+    
+    Pass the returned next_cursor as `after` to fetch only entries added since.
+    """
+    review = await db.get(PRReview, review_id)
+    
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    
+    items = await load_review_logs(db, review, after=after, limit=min(max(1, limit), 1000))
+    ids = [item["id"] for item in items if item.get("id")]
+    
+    return ReviewLogListResponse(items=items, next_cursor=ids[-1] if ids else after)
+
+
+def _format_event(event: str, data: dict, event_id: Optional[int] = None) -> str:
+    """One Server-Sent Events message"""
+    id_line = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{id_line}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/{review_id}/events")
+async def stream_review_events(
+    review_id: int,
+    after: int = 0,
+    last_event_id: Optional[int] = Header(None)
+):
+    """
+    Server-sent events stream of review progress.
+    
+    Sends a `snapshot` event with the current status, then `log`, `stage` and
+    `status` events as they are committed. Log events use the log entry id as
+    event id: log entries after `after` (or Last-Event-ID on reconnect) are
+    replayed first, the same entries GET /logs?after= returns. The stream ends
+    once the review is completed or failed.
+    """
+    # Use short-lived sessions: the stream may stay open for minutes and must
+    # not hold a connection (and read transaction) for that long
+    async with AsyncSessionLocal() as db:
+        if await db.get(PRReview, review_id) is None:
+            raise HTTPException(status_code=404, detail="Review not found")
+    cursor = last_event_id or after
+    
+    async def event_stream():
+        # Subscribe before reading the current state, so nothing committed in
+        # between is missed (entries seen in both are skipped by id)
+        queue = review_events.subscribe(review_id)
+        try:
+            async with AsyncSessionLocal() as db:
+                review = await db.get(PRReview, review_id)
+                if review is None:
+                    return
+                await _attach_queue_positions(db, [review])
+                snapshot = {
+                    "status": review.status,
+                    "current_stage": review.current_stage,
+                    "queue_position": review.queue_position,
+                    "error_message": review.error_message
+                }
+                missed = await load_review_logs(db, review, after=cursor)
+            
+            yield _format_event("snapshot", snapshot)
+            last_log_id = cursor
+            for entry in missed:
+                yield _format_event("log", entry, entry.get("id"))
+                last_log_id = max(last_log_id, entry.get("id") or 0)
+            
+            # Once finished, only what is already queued (committed together
+            # with the terminal status) is still sent
+            finished = snapshot["status"] in TERMINAL_STATUSES
+            while not finished or not queue.empty():
+                if finished:
+                    item = queue.get_nowait()
+                else:
+                    try:
+                        item = await asyncio.wait_for(queue.get(), timeout=EVENTS_KEEPALIVE_INTERVAL)
+                    except asyncio.TimeoutError:
+                        yield ": keep-alive\n\n"
+                        continue
+                if item["event"] == "log":
+                    log_id = item["data"].get("id")
+                    if log_id is not None:
+                        if log_id <= last_log_id:
+                            continue
+                        last_log_id = log_id
+                    yield _format_event("log", item["data"], log_id)
+                    continue
+                yield _format_event(item["event"], item["data"])
+                if item["event"] == "status":
+                    finished = finished or item["data"]["status"] in TERMINAL_STATUSES
+        finally:
+            review_events.unsubscribe(review_id, queue)
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
 @router.delete("/{review_id}")
-def delete_review(review_id: int, db: Session = Depends(get_db)):
+async def delete_review(review_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Delete a review and all its suggestions.
     """
-    review = db.query(PRReview).filter(PRReview.id == review_id).first()
+    review = await db.get(PRReview, review_id, options=[selectinload(PRReview.suggestions)])
     
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
     
-    db.delete(review)
-    db.commit()
+    # Stop a running review instead of letting it use the LLM for a deleted row
+    await cancellations.cancel(review_key(review_id))
+    await db.execute(delete(ReviewLog).where(ReviewLog.review_id == review_id))
+    await db.execute(delete(ChatMessage).where(ChatMessage.review_id == review_id))
+    await db.delete(review)
+    await db.commit()
+    _invalidate_totals()
+    chat_contexts.discard_review(review_id)
     
     return {"message": "Review deleted successfully"}
 
 
+async def _chat_history(db: AsyncSession, review_id: int) -> List[ChatMessage]:
+    """Latest turns of the review's conversation, oldest first"""
+    messages = (await db.scalars(
+        select(ChatMessage)
+        .where(ChatMessage.review_id == review_id)
+        .order_by(ChatMessage.id.desc())
+        .limit(MAX_HISTORY_MESSAGES)
+    )).all()
+    return list(reversed(messages))
+
+
+def _chat_context_key(review: PRReview) -> tuple:
+    # A re-review of new commits starts from a freshly fetched diff
+    return (review.id, review.reviewed_head_sha)
+
+
+async def _save_chat_turn(db: AsyncSession, review_id: int, question: str, answer: str):
+    db.add_all([
+        ChatMessage(review_id=review_id, role="user", content=question),
+        ChatMessage(review_id=review_id, role="assistant", content=answer),
+    ])
+    await db.commit()
+
+
+@router.get("/{review_id}/chat", response_model=ChatHistoryResponse)
+async def get_chat_history(review_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    The conversation about a review's PR, oldest message first.
+    """
+    if not await db.get(PRReview, review_id):
+        raise HTTPException(status_code=404, detail="Review not found")
+    
+    messages = (await db.scalars(
+        select(ChatMessage).where(ChatMessage.review_id == review_id).order_by(ChatMessage.id)
+    )).all()
+    return ChatHistoryResponse(items=messages)
+
+
+@router.delete("/{review_id}/chat")
+async def clear_chat_history(review_id: int, db: AsyncSession = Depends(get_async_db)):
+    """
+    Start a new conversation: forget earlier questions and the cached PR context.
+    """
+    if not await db.get(PRReview, review_id):
+        raise HTTPException(status_code=404, detail="Review not found")
+    
+    await db.execute(delete(ChatMessage).where(ChatMessage.review_id == review_id))
+    await db.commit()
+    chat_contexts.discard_review(review_id)
+    
+    return {"message": "Conversation cleared"}
+
+
 @router.post("/ask", response_model=ChatResponse)
 async def chat_with_pr(
     chat_data: ChatRequest,
     request: Request,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """
     Ask a question about a specific PR.
+    
+    Earlier questions and answers about the review are sent along, so
+    follow-up questions can refer to them.
     """
-    review = db.query(PRReview).filter(PRReview.id == chat_data.review_id).first()
+    review = await db.get(PRReview, chat_data.review_id)
     
     if not review:
         raise HTTPException(status_code=404, detail="Review not found")
+    history = await _chat_history(db, review.id)
     
     pr_agent_service = PRAgentService()
     try:
-        # Run chat with cancellation support
-        answer = await pr_agent_service.chat_with_pr(review.pr_url, chat_data.question, request)
+        # Run chat with cancellation support (client disconnect or POST /ask/{chat_id}/cancel)
+        with cancellations.track(chat_key(chat_data.chat_id)) if chat_data.chat_id else nullcontext():
+            answer = await pr_agent_service.chat_with_pr(
+                review.pr_url, chat_data.question, request,
+                history=history, context_key=_chat_context_key(review)
+            )
+        await _save_chat_turn(db, review.id, chat_data.question, answer)
         return ChatResponse(answer=answer)
     except asyncio.CancelledError:
         logger.info(f"Chat request cancelled for review {chat_data.review_id}")
@@ -405,3 +1035,60 @@ async def chat_with_pr(
             raise HTTPException(status_code=499, detail="Request cancelled")
         logger.error(f"Error in chat_with_pr: {e}", exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/ask/stream")
+async def stream_chat_with_pr(
+    chat_data: ChatRequest,
+    request: Request,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """
+    Ask a question about a specific PR, streaming the answer as Server-Sent Events.
+    
+    Events: `token` ({"text"}) for each piece of the answer, `restart` when a
+    fallback model starts over, `done` ({"answer"}) with the full answer, or
+    `error` ({"detail"}).
+    """
+    review = await db.get(PRReview, chat_data.review_id)
+    
+    if not review:
+        raise HTTPException(status_code=404, detail="Review not found")
+    pr_url = review.pr_url
+    history = await _chat_history(db, review.id)
+    context_key = _chat_context_key(review)
+    
+    pr_agent_service = PRAgentService()
+    
+    async def event_stream():
+        try:
+            with cancellations.track(chat_key(chat_data.chat_id)) if chat_data.chat_id else nullcontext():
+                async for item in pr_agent_service.stream_chat_with_pr(
+                    pr_url, chat_data.question, request, history=history, context_key=context_key
+                ):
+                    if item["event"] == "done":
+                        # The request's session is closed once streaming starts
+                        async with AsyncSessionLocal() as stream_db:
+                            await _save_chat_turn(stream_db, chat_data.review_id, chat_data.question, item["data"]["answer"])
+                    yield _format_event(item["event"], item["data"])
+        except asyncio.CancelledError:
+            logger.info(f"Streamed chat cancelled for review {chat_data.review_id}")
+            raise
+        except Exception as e:
+            logger.error(f"Error in stream_chat_with_pr: {e}", exc_info=True)
+            yield _format_event("error", {"detail": str(e)})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.post("/ask/{chat_id}/cancel")
+async def cancel_chat(chat_id: str):
+    """
+    Cancel a running /ask or /ask/stream request started with this chat_id.
+    """
+    cancelled = await cancellations.cancel(chat_key(chat_id))
+    return {"cancelled": cancelled}
@@ -6,12 +6,17 @@ from sqlalchemy.orm import Session
 from ..database import get_db
 from ..models import ReviewRuleSet
 from ..schemas import RuleSetCreate, RuleSetUpdate, RuleSetResponse
+from ..services.model_routing import clean_tool_models
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/rule-sets", tags=["rule-sets"])
 
 
+def _clean_patterns(patterns: List[str]) -> List[str]:
+    return [p.strip() for p in patterns if p.strip()]
+
+
 @router.get("", response_model=List[RuleSetResponse])
 def list_rule_sets(db: Session = Depends(get_db)):
     """
@@ -37,7 +42,10 @@ def create_rule_set(
     rule_set = ReviewRuleSet(
         name=rule_set_data.name,
         description=rule_set_data.description,
-        instructions=rule_set_data.instructions
+        instructions=rule_set_data.instructions,
+        ignore_patterns=_clean_patterns(rule_set_data.ignore_patterns),
+        skip_generated=rule_set_data.skip_generated,
+        tool_models=clean_tool_models(rule_set_data.tool_models.model_dump())
     )
     db.add(rule_set)
     db.commit()
@@ -96,6 +104,12 @@ def update_rule_set(
         rule_set.description = rule_set_data.description
     if rule_set_data.instructions is not None:
         rule_set.instructions = rule_set_data.instructions
+    if rule_set_data.ignore_patterns is not None:
+        rule_set.ignore_patterns = _clean_patterns(rule_set_data.ignore_patterns)
+    if rule_set_data.skip_generated is not None:
+        rule_set.skip_generated = rule_set_data.skip_generated
+    if rule_set_data.tool_models is not None:
+        rule_set.tool_models = clean_tool_models(rule_set_data.tool_models.model_dump())
     
     db.commit()
     db.refresh(rule_set)
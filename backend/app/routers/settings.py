@@ -4,6 +4,7 @@ from ..database import get_db
 from ..models import AppSettings
 from ..schemas.settings import SettingsResponse, SettingsUpdate
 from ..config import clear_settings_cache
+from ..services.model_routing import clean_tool_models
 
 router = APIRouter(prefix="/api/settings", tags=["settings"])
 
@@ -70,6 +71,11 @@ def update_settings(
     settings.ai_api_key = settings_data.ai_api_key
     settings.ai_base_url = settings_data.ai_base_url
     settings.max_tokens = settings_data.max_tokens
+    settings.ai_endpoints = [
+        {**endpoint.model_dump(), "url": endpoint.url.strip().rstrip("/")}
+        for endpoint in settings_data.ai_endpoints if endpoint.url.strip()
+    ]
+    settings.tool_models = clean_tool_models(settings_data.tool_models.model_dump())
 
     
     db.commit()
@@ -2,11 +2,18 @@ from .pr_review import (
     PRReviewCreate, 
     PRReviewResponse, 
     PRReviewDetailResponse,
+    PRReviewSummary,
     PRReviewListResponse,
+    ReviewLogResponse,
+    ReviewLogListResponse,
     SuggestionCreate,
     SuggestionResponse,
     ChatRequest,
-    ChatResponse
+    ChatResponse,
+    ChatMessageResponse,
+    ChatHistoryResponse,
+    ReviewBatchCreate,
+    ReviewBatchResponse
 )
 from .rule_set import (
     RuleSetCreate,
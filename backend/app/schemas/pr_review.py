@@ -1,6 +1,6 @@
 from datetime import datetime
 from typing import List, Optional, Dict, Any
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 
 
 class SuggestionBase(BaseModel):
@@ -36,6 +36,9 @@ class PRReviewBase(BaseModel):
 
 class PRReviewCreate(PRReviewBase):
     rule_set_id: Optional[int] = None
+    priority: int = 0
+    force: bool = False  # Run pr-agent even if a cached result exists
+    incremental: bool = False  # Only review files changed since the last review of this PR
 
 
 class PRReviewResponse(PRReviewBase):
@@ -59,6 +62,19 @@ class PRReviewResponse(PRReviewBase):
     can_be_split: Optional[List[Dict[str, Any]]] = None
     pr_description: Optional[str] = None
     
+    # Job queue
+    priority: Optional[int] = 0
+    queue_position: Optional[int] = None
+    batch_id: Optional[int] = None
+    
+    reviewed_head_sha: Optional[str] = None
+    
+    # Token accounting
+    estimated_tokens: Optional[int] = None
+    prompt_tokens: Optional[int] = None
+    completion_tokens: Optional[int] = None
+    token_usage: Optional[Dict[str, Any]] = None
+    
     created_at: datetime
     updated_at: datetime
 
@@ -73,17 +89,92 @@ class PRReviewDetailResponse(PRReviewResponse):
         from_attributes = True
 
 
+class PRReviewSummary(PRReviewBase):
+    """Lightweight review row for the history list (no logs, description or suggestions)"""
+    id: int
+    provider: str
+    project_name: Optional[str] = None
+    pr_number: Optional[int] = None
+    pr_title: Optional[str] = None
+    pr_author: Optional[str] = None
+    source_branch: Optional[str] = None
+    target_branch: Optional[str] = None
+    status: str
+    current_stage: Optional[str] = None
+    score: Optional[int] = None
+    effort: Optional[int] = None
+    priority: Optional[int] = 0
+    queue_position: Optional[int] = None
+    created_at: datetime
+    updated_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
 class PRReviewListResponse(BaseModel):
-    items: List[PRReviewResponse]
-    total: int
+    items: List[PRReviewSummary]
+    total: int  # Cached for a few seconds, may lag behind slightly
     page: int
     per_page: int
+    next_cursor: Optional[str] = None  # Pass as ?cursor= to fetch the next page
+
+
+class ReviewLogResponse(BaseModel):
+    id: Optional[int] = None  # None for entries stored before the review_logs table
+    timestamp: Optional[str] = None
+    level: str = "info"
+    message: str
+
+
+class ReviewLogListResponse(BaseModel):
+    items: List[ReviewLogResponse]
+    next_cursor: int  # Pass as ?after= to fetch only newer entries
 
 
 class ChatRequest(BaseModel):
     question: str
     review_id: int
+    chat_id: Optional[str] = None  # Client-chosen id, allows POST /ask/{chat_id}/cancel
 
 
 class ChatResponse(BaseModel):
     answer: str
+
+
+class ChatMessageResponse(BaseModel):
+    id: int
+    role: str
+    content: str
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
+
+
+class ChatHistoryResponse(BaseModel):
+    items: List[ChatMessageResponse]
+
+
+class ReviewBatchCreate(BaseModel):
+    """PR URLs to review, or a repository whose open PRs are enumerated"""
+    pr_urls: List[str] = []
+    repository: Optional[str] = None  # e.g. https://github.com/owner/repo or https://gitlab.com/group/project
+    target_branch: Optional[str] = None  # Repository filter: only PRs into this branch
+    author: Optional[str] = None  # Repository filter: only PRs opened by this user
+    limit: int = Field(50, ge=1, le=200)  # Max PRs taken from the repository
+    rule_set_id: Optional[int] = None
+    priority: int = -1  # Below single submissions by default
+    force: bool = False
+    incremental: bool = False
+
+
+class ReviewBatchResponse(BaseModel):
+    id: int
+    repository: Optional[str] = None
+    total: int
+    counts: Dict[str, int]  # Reviews per status
+    finished: int  # Completed, failed or cancelled
+    progress: float  # finished / total
+    review_ids: List[int]
+    created_at: datetime
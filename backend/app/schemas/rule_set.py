@@ -1,12 +1,17 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from pydantic import BaseModel
 
+from .settings import ToolModels
+
 
 class RuleSetBase(BaseModel):
     name: str
     description: Optional[str] = None
     instructions: str
+    ignore_patterns: List[str] = []
+    skip_generated: bool = True
+    tool_models: ToolModels = ToolModels()  # Per tool, replaces the settings' chain when not empty
 
 
 class RuleSetCreate(RuleSetBase):
@@ -17,11 +22,18 @@ class RuleSetUpdate(BaseModel):
     name: Optional[str] = None
     description: Optional[str] = None
     instructions: Optional[str] = None
+    ignore_patterns: Optional[List[str]] = None
+    skip_generated: Optional[bool] = None
+    tool_models: Optional[ToolModels] = None
 
 
 class RuleSetResponse(RuleSetBase):
     id: int
     is_active: bool
+    # Unset on rule sets created before pre-filtering existed
+    ignore_patterns: Optional[List[str]] = None
+    skip_generated: Optional[bool] = None
+    tool_models: Optional[ToolModels] = None
     created_at: datetime
     updated_at: datetime
 
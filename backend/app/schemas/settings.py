@@ -1,8 +1,21 @@
-from pydantic import BaseModel
-from typing import Optional
+from pydantic import BaseModel, Field
+from typing import List, Optional
 from datetime import datetime
 
 
+class AIEndpoint(BaseModel):
+    url: str
+    weight: int = Field(1, ge=1)
+    enabled: bool = True
+
+
+class ToolModels(BaseModel):
+    """Model chain per pr-agent tool: first model, then fallbacks (empty: ai_model)"""
+    review: List[str] = []
+    improve: List[str] = []
+    describe: List[str] = []
+
+
 class SettingsBase(BaseModel):
     gitlab_url: str = "https://gitlab.com"
     gitlab_token: str = ""
@@ -16,10 +29,14 @@ class SettingsBase(BaseModel):
     ai_api_key: str = ""
     ai_base_url: str = "http://localhost:11434"
     max_tokens: int = 128000
+    ai_endpoints: List[AIEndpoint] = []
+    tool_models: ToolModels = ToolModels()
 
 
 
 class SettingsResponse(SettingsBase):
+    ai_endpoints: Optional[List[AIEndpoint]] = None
+    tool_models: Optional[ToolModels] = None
     id: int
     updated_at: Optional[datetime] = None
 
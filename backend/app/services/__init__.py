@@ -1,5 +1,5 @@
 from .gitlab_service import GitLabService
 from .github_service import GitHubService
-from .base_service import BasePRService, PRInfo, PRDiff
+from .base_service import BasePRService, ComparisonUnavailable, PRInfo, PRDiff, LazyDiffs
 from .provider_factory import get_provider_service, detect_provider, ProviderType
 from .llm_service import CodeSuggestion
@@ -1,6 +1,7 @@
+import threading
 from abc import ABC, abstractmethod
 from dataclasses import dataclass
-from typing import List, Tuple
+from typing import Callable, Iterable, Iterator, List, Optional, Tuple
 
 
 @dataclass
@@ -15,6 +16,57 @@ class PRDiff:
     renamed_file: bool
 
 
+class ComparisonUnavailable(Exception):
+    """The changes between two commits cannot be told reliably (review the whole PR instead)"""
+
+
+class LazyDiffs:
+    """
+    File diffs of a PR, fetched page by page as they are iterated.
+    
+    Diffs already fetched are kept, so iterating again only requests the pages
+    not consumed yet. Creating a LazyDiffs makes no API call.
+    """
+
+    def __init__(self, fetch: Callable[[], Iterable[PRDiff]]):
+        self._fetch = fetch
+        self._source: Optional[Iterator[PRDiff]] = None
+        self._items: List[PRDiff] = []
+        self._exhausted = False
+        self._lock = threading.Lock()
+
+    def __iter__(self) -> Iterator[PRDiff]:
+        index = 0
+        while True:
+            with self._lock:
+                if index < len(self._items):
+                    item = self._items[index]
+                elif self._exhausted:
+                    return
+                else:
+                    if self._source is None:
+                        self._source = iter(self._fetch())
+                    try:
+                        item = next(self._source)
+                    except StopIteration:
+                        self._exhausted = True
+                        return
+                    self._items.append(item)
+            yield item
+            index += 1
+
+    def __len__(self) -> int:
+        # Fetches every page
+        return sum(1 for _ in self)
+
+    def __bool__(self) -> bool:
+        return next(iter(self), None) is not None
+
+    def __repr__(self) -> str:
+        state = "all" if self._exhausted else "partially"
+        return f"LazyDiffs({len(self._items)} fetched, {state} loaded)"
+
+
 @dataclass
 class PRInfo:
     """Pull/Merge request information"""
@@ -26,7 +78,8 @@ class PRInfo:
     target_branch: str
     description: str
     web_url: str
-    diffs: List[PRDiff]
+    diffs: Iterable[PRDiff]  # Usually LazyDiffs: only fetched when iterated
+    head_sha: Optional[str] = None  # Latest commit of the source branch
 
 
 class BasePRService(ABC):
@@ -45,13 +98,51 @@ class BasePRService(ABC):
     @abstractmethod
     def get_pr_info(self, pr_url: str) -> PRInfo:
         """
-        Fetch pull/merge request information and diffs.
+        Fetch pull/merge request information.
+        
+        Only the PR header is requested here; PRInfo.diffs fetches the file
+        diffs page by page when iterated, so metadata lookups stay cheap.
         
         Args:
             pr_url: Full PR/MR URL
             
         Returns:
-            PRInfo object containing PR details and file diffs
+            PRInfo object containing PR details and (lazy) file diffs
         """
         pass
 
+    @abstractmethod
+    def get_changed_files(self, pr_url: str, base_sha: str, head_sha: str) -> List[PRDiff]:
+        """
+        Fetch the file diffs between two commits of a pull/merge request.
+        
+        Args:
+            pr_url: Full PR/MR URL
+            base_sha: Previously reviewed head commit
+            head_sha: Current head commit
+            
+        Returns:
+            List of PRDiff objects for the files changed between the commits
+            
+        Raises:
+            ComparisonUnavailable: base_sha is not an ancestor of head_sha (force-push,
+                rebase) or the provider truncated the file list
+        """
+        pass
+
+    @abstractmethod
+    def list_open_prs(self, repository_url: str, target_branch: Optional[str] = None,
+                      author: Optional[str] = None, limit: int = 50) -> List[str]:
+        """
+        List the URLs of a repository's open pull/merge requests, newest first.
+        
+        Args:
+            repository_url: Web URL of the repository/project
+            target_branch: Only PRs into this branch
+            author: Only PRs opened by this user
+            limit: Maximum number of URLs
+            
+        Returns:
+            List of PR/MR web URLs
+        """
+        pass
@@ -0,0 +1,91 @@
+"""
+Cancellation of running reviews and chats.
+
+Running work registers its asyncio task under a key (review:<id>, chat:<id>) so
+an API call can cancel it; cancelling the task cancels the pending LLM calls
+and frees the worker slot right away. Client disconnects are detected from the
+ASGI receive channel (an http.disconnect message) instead of polling.
+"""
+import asyncio
+import logging
+from contextlib import contextmanager
+from typing import Awaitable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def review_key(review_id: int) -> str:
+    return f"review:{review_id}"
+
+
+def chat_key(chat_id: str) -> str:
+    return f"chat:{chat_id}"
+
+
+class CancellationRegistry:
+    """Running asyncio tasks by key"""
+
+    def __init__(self):
+        self._tasks: Dict[str, asyncio.Task] = {}
+
+    @contextmanager
+    def track(self, key: str):
+        """Register the current task under `key` for the duration of the block"""
+        task = asyncio.current_task()
+        self._tasks[key] = task
+        try:
+            yield task
+        finally:
+            if self._tasks.get(key) is task:
+                del self._tasks[key]
+
+    def is_running(self, key: str) -> bool:
+        return key in self._tasks
+
+    async def cancel(self, key: str, timeout: float = 5.0) -> bool:
+        """Cancel the task registered under `key` and wait for it to unwind; False if none runs"""
+        task = self._tasks.get(key)
+        if task is None or task.done():
+            return False
+        logger.info(f"[CANCEL] Cancelling {key}")
+        task.cancel()
+        if task is not asyncio.current_task():
+            await asyncio.wait({task}, timeout=timeout)
+        return True
+
+
+cancellations = CancellationRegistry()
+
+
+async def wait_for_disconnect(request) -> None:
+    """Return when the ASGI server reports that the client went away"""
+    while True:
+        message = await request.receive()
+        if message["type"] == "http.disconnect":
+            return
+
+
+async def run_until_disconnected(request, awaitable: Awaitable[T]) -> T:
+    """
+    Await `awaitable`, cancelling it as soon as the client disconnects.
+
+    Raises asyncio.CancelledError if the client disconnected first.
+    """
+    work = asyncio.ensure_future(awaitable)
+    if request is None:
+        return await work
+    watcher = asyncio.create_task(wait_for_disconnect(request))
+    try:
+        await asyncio.wait({work, watcher}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        # Also reached when this coroutine itself is cancelled
+        watcher.cancel()
+        if not work.done():
+            work.cancel()
+            await asyncio.wait({work}, timeout=0.5)
+    if work.cancelled():
+        logger.info("Client disconnected, cancelled the running work")
+        raise asyncio.CancelledError("Client disconnected")
+    return work.result()
@@ -0,0 +1,97 @@
+"""
+Process-wide registry of GitHub/GitLab API clients.
+
+Clients are keyed by API host and token and live for the lifetime of the
+process, so their HTTP connection pools (keep-alive connections, TLS sessions)
+are reused by every review instead of being rebuilt per request. pr-agent's
+GitHub and GitLab providers are replaced by subclasses taking their client from
+the registry as well. Saving the settings clears the registry (see
+config.clear_settings_cache).
+"""
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Tuple
+
+import gitlab
+import requests
+from github import Github
+from pr_agent.config_loader import get_settings
+from pr_agent.git_providers import _GIT_PROVIDERS, GithubProvider, GitLabProvider
+
+from ..config import get_env_settings
+from .http_cache import mount_http_cache
+
+GITHUB_API_URL = "https://api.github.com"
+
+
+class ClientRegistry:
+    """Thread-safe cache of API clients keyed by (provider, host, token)"""
+
+    def __init__(self):
+        self._clients: Dict[Tuple[str, str, str], Any] = {}
+        self._lock = threading.Lock()
+
+    def get(self, provider: str, host: str, token: str, factory: Callable[[], Any]) -> Any:
+        # Tokens are only kept inside the clients themselves
+        key = (provider, host, hashlib.sha256((token or "").encode()).hexdigest())
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = self._clients[key] = factory()
+            return client
+
+    def clear(self):
+        """Forget all clients; reviews still running keep the client they hold"""
+        with self._lock:
+            self._clients.clear()
+
+
+client_registry = ClientRegistry()
+
+
+def _pooled_session() -> requests.Session:
+    pool_size = get_env_settings().provider_pool_size
+    session = requests.Session()
+    mount_http_cache(session, pool_size)
+    return session
+
+
+def get_github_client(token: str, base_url: str = GITHUB_API_URL) -> Github:
+    """Shared PyGithub client for the token"""
+    return client_registry.get(
+        "github", base_url, token,
+        lambda: Github(token, base_url=base_url, pool_size=get_env_settings().provider_pool_size)
+    )
+
+
+def get_gitlab_client(url: str, token: str) -> gitlab.Gitlab:
+    """Shared python-gitlab client for the instance URL and token"""
+    return client_registry.get(
+        "gitlab", url, token,
+        lambda: gitlab.Gitlab(url, private_token=token, session=_pooled_session())
+    )
+
+
+class SharedGithubProvider(GithubProvider):
+    """pr-agent GitHub provider using the shared client of its token"""
+
+    def _get_github_client(self):
+        if get_settings().get("GITHUB.DEPLOYMENT_TYPE", "user") != "user":
+            return super()._get_github_client()
+        token = get_settings().get("GITHUB.USER_TOKEN", None)
+        if not token:
+            return super()._get_github_client()  # Raises pr-agent's error
+        return get_github_client(token, self.base_url)
+
+
+class SharedGitLabProvider(GitLabProvider):
+    """pr-agent GitLab provider using the shared client of its instance and token"""
+
+    def _set_merge_request(self, merge_request_url: str):
+        # Called from __init__ right after it built its own client, before any request
+        self.gl = get_gitlab_client(self.gitlab_url, get_settings().get("GITLAB.PERSONAL_ACCESS_TOKEN"))
+        super()._set_merge_request(merge_request_url)
+
+
+_GIT_PROVIDERS["github"] = SharedGithubProvider
+_GIT_PROVIDERS["gitlab"] = SharedGitLabProvider
@@ -0,0 +1,191 @@
+"""
+Pre-filtering of the diff before it reaches the model.
+
+Lockfiles, minified bundles, snapshots, vendored code and generated sources
+take most of the tokens of many PRs while nobody wants them reviewed. Before
+the prompts are built, every diff file is checked against glob patterns (the
+defaults below plus the rule set's own) and, unless the rule set turns it off,
+content heuristics over the added lines:
+
+- a generation header: the first lines of the file are a comment such as
+  "@generated" or "Code generated ... DO NOT EDIT"
+- minified code: very long lines
+- encoded data: high character entropy with almost no whitespace
+
+Matching files are left out of the review and listed in the review log.
+pr-agent has no per-file weight in its prompts, so a file is either reviewed
+or skipped; files are not down-weighted.
+"""
+import fnmatch
+import math
+import posixpath
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import List, Optional, Sequence, Tuple
+
+from pr_agent.algo.types import FilePatchInfo
+
+from .token_planner import LOCKFILE_NAMES
+
+DEFAULT_IGNORE_PATTERNS = sorted(LOCKFILE_NAMES) + [
+    "*.min.js", "*.min.css", "*.map", "*.bundle.js",
+    "*.snap", "__snapshots__/*",
+    "*_pb2.py", "*_pb2_grpc.py", "*.pb.go", "*.pb.cc", "*.pb.h", "*.g.dart", "*.generated.*",
+    "vendor/*", "node_modules/*", "third_party/*", "dist/*",
+]
+
+# Header comments written by code generators; matched at the start of a line
+# after the comment leader (//, #, /*, *, <!--, --, ;)
+GENERATED_HEADERS = re.compile(
+    r"^\W*("
+    r"code generated .* do not edit"
+    r"|@generated\b"
+    r"|<auto-generated\b"
+    r"|(this (file|code) (is|was|has been) )?(auto-?generated|automatically generated)\b.*\bdo not (edit|modify)"
+    r"|do not (edit|modify)\b.*\b(auto-?generated|automatically generated|generated by)\b"
+    r")",
+    re.IGNORECASE,
+)
+HEADER_SCAN_LINES = 5
+
+_HUNK_HEADER = re.compile(r"^@@ -\d+(?:,\d+)? \+(\d+)(?:,\d+)? @@")
+
+# Minified: some added line longer than this and long lines on average
+MINIFIED_MAX_LINE = 1000
+MINIFIED_MEAN_LINE = 200
+
+# Encoded data (base64, embedded binaries): bits per character, checked on
+# files with enough added text and nearly no whitespace
+ENTROPY_MIN_CHARS = 2000
+ENTROPY_THRESHOLD = 5.2
+ENTROPY_MAX_WHITESPACE = 0.05
+
+
+@dataclass
+class DiffFilter:
+    """
+    Args:
+        patterns: Extra glob patterns; "!pattern" keeps files a default pattern would skip
+        skip_generated: Apply the default patterns and the content heuristics
+    """
+    patterns: List[str] = field(default_factory=list)
+    skip_generated: bool = True
+
+    @classmethod
+    def for_rule_set(cls, rule_set) -> "DiffFilter":
+        if rule_set is None:
+            return cls()
+        skip_generated = rule_set.skip_generated if rule_set.skip_generated is not None else True
+        return cls(patterns=list(rule_set.ignore_patterns or []), skip_generated=skip_generated)
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """Part of the review cache key; None for the default filter"""
+        if not self.patterns and self.skip_generated:
+            return None
+        return f"{int(self.skip_generated)}:{','.join(self.patterns)}"
+
+    def glob_patterns(self) -> Tuple[List[str], List[str]]:
+        """Ignore and keep ("!") patterns"""
+        ignore = list(DEFAULT_IGNORE_PATTERNS) if self.skip_generated else []
+        keep = []
+        for pattern in self.patterns:
+            pattern = pattern.strip()
+            if pattern.startswith("!"):
+                keep.append(pattern[1:])
+            elif pattern:
+                ignore.append(pattern)
+        return ignore, keep
+
+    def skip_reason(self, diff_file: FilePatchInfo) -> Optional[str]:
+        """Why the file is left out of the review, or None to review it"""
+        ignore, keep = self.glob_patterns()
+        if any(matches_glob(diff_file.filename, pattern) for pattern in keep):
+            return None
+        for pattern in ignore:
+            if matches_glob(diff_file.filename, pattern):
+                return f"matches {pattern}"
+        if self.skip_generated:
+            return content_skip_reason(diff_file.patch or "")
+        return None
+
+
+def matches_glob(path: str, pattern: str) -> bool:
+    """
+    gitignore-like matching: a pattern without "/" matches the file name, one
+    ending in "/*" matches that directory at any depth, others match the path.
+    """
+    pattern = pattern.lstrip("/")
+    if pattern.startswith("**/"):
+        pattern = pattern[3:]
+    if "/" not in pattern:
+        return fnmatch.fnmatch(posixpath.basename(path), pattern)
+    if pattern.endswith("/*") and "/" not in pattern[:-2]:
+        return f"/{pattern[:-2]}/" in f"/{path}"
+    return fnmatch.fnmatch(path, pattern)
+
+
+def _entropy(text: str) -> float:
+    counts = Counter(text)
+    total = len(text)
+    return -sum(n / total * math.log2(n / total) for n in counts.values())
+
+
+def file_header(patch: str) -> List[str]:
+    """
+    The first HEADER_SCAN_LINES lines of the new file, when the patch starts at
+    its first line (empty otherwise: the header is not part of the diff).
+    """
+    lines = patch.splitlines()
+    start = next((i for i, line in enumerate(lines) if line.startswith("@@")), None)
+    if start is None:
+        return []
+    match = _HUNK_HEADER.match(lines[start])
+    if not match or int(match.group(1)) > 1:
+        return []
+    header = []
+    for line in lines[start + 1:]:
+        if line.startswith("@@") or len(header) >= HEADER_SCAN_LINES:
+            break
+        if not line.startswith("-"):
+            header.append(line[1:])
+    return header
+
+
+def content_skip_reason(patch: str) -> Optional[str]:
+    """Heuristics over the header and the added lines of a patch"""
+    added = [line[1:] for line in patch.splitlines() if line.startswith("+") and not line.startswith("+++")]
+    if not added:
+        return None
+
+    for line in file_header(patch):
+        match = GENERATED_HEADERS.match(line.strip())
+        if match:
+            return f"generated ({match.group(1).strip()[:40]})"
+
+    lengths = [len(line) for line in added]
+    if max(lengths) > MINIFIED_MAX_LINE and sum(lengths) / len(lengths) > MINIFIED_MEAN_LINE:
+        return "minified"
+
+    text = "".join(added)
+    if len(text) >= ENTROPY_MIN_CHARS:
+        whitespace = sum(1 for c in text if c.isspace()) / len(text)
+        if whitespace < ENTROPY_MAX_WHITESPACE and _entropy(text) > ENTROPY_THRESHOLD:
+            return "encoded data"
+    return None
+
+
+def filter_diff(diff_files: Sequence[FilePatchInfo], diff_filter: DiffFilter) -> Tuple[List[FilePatchInfo], List[Tuple[str, str, int]]]:
+    """
+    Split the diff files into the ones to review and the skipped ones as
+    (path, reason, patch size in bytes).
+    """
+    kept, skipped = [], []
+    for diff_file in diff_files:
+        reason = diff_filter.skip_reason(diff_file)
+        if reason:
+            skipped.append((diff_file.filename, reason, len(diff_file.patch or "")))
+        else:
+            kept.append(diff_file)
+    return kept, skipped
@@ -0,0 +1,102 @@
+"""
+Review of PRs too large for one model call, chunk by chunk.
+
+When the diff does not fit config.max_model_tokens, pr-agent clips it: files
+are compressed or dropped, and PRCodeSuggestions stops after
+max_number_of_calls patches. Instead the diff files are packed, in path order
+so a directory stays together, into chunks that each fit the model's budget
+as planned by token_planner. Every chunk is reviewed on its own (concurrently,
+see PRAgentService) and the chunk results are merged into one review.
+"""
+import posixpath
+import re
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence
+
+from pr_agent.algo.types import FilePatchInfo
+
+from .llm_service import CodeSuggestion
+
+
+@dataclass
+class DiffShard:
+    """Paths of the diff files reviewed in one chunk and their patch tokens"""
+    files: List[str] = field(default_factory=list)
+    tokens: int = 0
+
+
+def plan_shards(diff_files: Sequence[FilePatchInfo], file_tokens: Dict[str, int], budget: int) -> List[DiffShard]:
+    """
+    Pack the diff files into chunks of at most `budget` patch tokens, using the
+    patch token counts of the token plan.
+
+    Files are taken in directory order so related files share a chunk; a file
+    larger than the budget gets a chunk of its own and is clipped by pr-agent.
+    A diff that fits the budget gives a single chunk.
+    """
+    ordered = sorted(diff_files, key=lambda f: (posixpath.dirname(f.filename), f.filename))
+    shards: List[DiffShard] = []
+    current = DiffShard()
+    for diff_file in ordered:
+        tokens = file_tokens.get(diff_file.filename, 0)
+        if current.files and current.tokens + tokens > budget:
+            shards.append(current)
+            current = DiffShard()
+        current.files.append(diff_file.filename)
+        current.tokens += tokens
+    if current.files:
+        shards.append(current)
+    return shards
+
+
+def _suggestion_key(suggestion: CodeSuggestion) -> tuple:
+    text = re.sub(r"\s+", " ", suggestion.suggestion or "").strip().lower()
+    return suggestion.file_path, suggestion.line_start, text
+
+
+def merge_shard_results(results: Sequence[dict], shards: Sequence[DiffShard], description: Optional[str] = None) -> dict:
+    """
+    Combine the review results of the chunks.
+
+    The score is the average of the chunk scores weighted by chunk size, the
+    effort the highest chunk effort; security concerns and split suggestions
+    are collected from all chunks and duplicate code suggestions dropped.
+    """
+    merged = {
+        "score": None,
+        "effort": None,
+        "security_concerns": None,
+        "can_be_split": None,
+        "suggestions": [],
+        "description": description
+    }
+
+    scored = [(r["score"], s.tokens or 1) for r, s in zip(results, shards) if r.get("score") is not None]
+    if scored:
+        merged["score"] = round(sum(score * weight for score, weight in scored) / sum(w for _, w in scored))
+
+    efforts = [r["effort"] for r in results if r.get("effort") is not None]
+    merged["effort"] = max(efforts) if efforts else None
+
+    concerns = []
+    for result in results:
+        concern = (result.get("security_concerns") or "").strip()
+        if concern and concern not in concerns:
+            concerns.append(concern)
+    merged["security_concerns"] = "\n\n".join(concerns) or None
+
+    splits = []
+    for result in results:
+        split = result.get("can_be_split")
+        if isinstance(split, list):
+            splits.extend(split)
+    merged["can_be_split"] = splits or None
+
+    seen = set()
+    for result in results:
+        for suggestion in result.get("suggestions", []):
+            key = _suggestion_key(suggestion)
+            if key not in seen:
+                seen.add(key)
+                merged["suggestions"].append(suggestion)
+    return merged
@@ -0,0 +1,272 @@
+"""
+Pool of LLM inference endpoints (Ollama or OpenAI-compatible servers).
+
+With several endpoints configured in the settings, every model call goes to
+the endpoint with the fewest outstanding requests relative to its weight, so
+reviews spread over all inference servers. An endpoint that fails (connection
+error, timeout, 5xx) is taken out of rotation with an exponential backoff and
+the call is retried on another one; a background health check puts endpoints
+back once they answer again.
+
+With no endpoints configured the pool is inactive and pr-agent uses the single
+ai_base_url as before.
+"""
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Iterable, List, Optional, Set, TypeVar
+
+import openai
+import requests
+from pr_agent.algo.ai_handlers.litellm_ai_handler import OPENAI_RETRIES, LiteLLMAIHandler
+
+from ..config import get_env_settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Providers whose base URL points at a server we run (the others are hosted APIs)
+POOLED_PROVIDERS = ("ollama", "openai")
+
+BACKOFF_BASE_SECONDS = 5
+BACKOFF_MAX_SECONDS = 300
+HEALTH_CHECK_TIMEOUT = 5
+
+
+class NoEndpointAvailable(Exception):
+    """The pool has no endpoint to send a model call to (not retried like an API error)"""
+
+
+@dataclass
+class Endpoint:
+    url: str
+    weight: int = 1
+    outstanding: int = 0
+    requests: int = 0
+    failures: int = 0  # Consecutive failures
+    down_until: float = 0.0
+    last_error: Optional[str] = None
+    latency_ms: Optional[float] = None  # Moving average of successful calls
+
+    @property
+    def available(self) -> bool:
+        return time.time() >= self.down_until
+
+    def load(self) -> float:
+        return (self.outstanding + 1) / max(1, self.weight)
+
+
+def is_endpoint_failure(error: BaseException) -> bool:
+    """Errors meaning the server is unreachable or broken, not that the request was bad"""
+    while error is not None:
+        if isinstance(error, (openai.APIConnectionError, openai.InternalServerError)):
+            return True
+        if isinstance(error, openai.APIStatusError) and error.status_code >= 500:
+            return True
+        if isinstance(error, (requests.ConnectionError, requests.Timeout, ConnectionError, TimeoutError)):
+            return True
+        error = error.__cause__
+    return False
+
+
+class EndpointPool:
+    """Weighted least-outstanding-requests balancing with passive and active health checks"""
+
+    def __init__(self, health_interval: int):
+        self.health_interval = health_interval
+        self._endpoints: List[Endpoint] = []
+        self._lock = threading.Lock()
+        self._health_task: Optional[asyncio.Task] = None
+
+    @property
+    def active(self) -> bool:
+        return bool(self._endpoints)
+
+    def configure(self, endpoints: Iterable[dict]):
+        """Set the endpoints (dicts with url, weight, enabled); counters of kept URLs survive"""
+        wanted = [
+            (e["url"].rstrip("/"), max(1, int(e.get("weight") or 1)))
+            for e in endpoints or [] if e.get("url") and e.get("enabled", True)
+        ]
+        with self._lock:
+            if [(e.url, e.weight) for e in self._endpoints] == wanted:
+                return
+            existing = {e.url: e for e in self._endpoints}
+            self._endpoints = []
+            for url, weight in wanted:
+                endpoint = existing.get(url) or Endpoint(url=url)
+                endpoint.weight = weight
+                self._endpoints.append(endpoint)
+        logger.info(f"[ENDPOINTS] Balancing model calls over {len(wanted)} endpoints")
+
+    def configure_from_settings(self, app_settings):
+        """Endpoints of the app settings; none unless the provider is a server we run"""
+        provider = app_settings.ai_provider or "ollama"
+        self.configure(app_settings.ai_endpoints if provider in POOLED_PROVIDERS else [])
+
+    def first_url(self) -> Optional[str]:
+        with self._lock:
+            return self._endpoints[0].url if self._endpoints else None
+
+    def acquire(self, exclude: Set[str] = frozenset()) -> Optional[Endpoint]:
+        """
+        Reserve the least loaded available endpoint. When all are down the one
+        coming back first is tried anyway; None when every endpoint is excluded.
+        """
+        with self._lock:
+            candidates = [e for e in self._endpoints if e.url not in exclude]
+            if not candidates:
+                return None
+            available = [e for e in candidates if e.available]
+            if available:
+                endpoint = min(available, key=lambda e: (e.load(), e.requests))
+            else:
+                endpoint = min(candidates, key=lambda e: e.down_until)
+            endpoint.outstanding += 1
+            endpoint.requests += 1
+            return endpoint
+
+    def release(self, endpoint: Endpoint, error: Optional[BaseException] = None, elapsed: Optional[float] = None):
+        with self._lock:
+            endpoint.outstanding = max(0, endpoint.outstanding - 1)
+            if error is None:
+                if elapsed is not None:
+                    ms = elapsed * 1000
+                    endpoint.latency_ms = ms if endpoint.latency_ms is None else 0.8 * endpoint.latency_ms + 0.2 * ms
+                self._mark_up(endpoint)
+            elif is_endpoint_failure(error):
+                self._mark_down(endpoint, str(error))
+
+    def _mark_up(self, endpoint: Endpoint):
+        if endpoint.failures:
+            logger.info(f"[ENDPOINTS] {endpoint.url} is back")
+        endpoint.failures = 0
+        endpoint.down_until = 0.0
+        endpoint.last_error = None
+
+    def _mark_down(self, endpoint: Endpoint, error: str):
+        endpoint.failures += 1
+        backoff = min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** (endpoint.failures - 1))
+        endpoint.down_until = time.time() + backoff
+        endpoint.last_error = error[:200]
+        logger.warning(f"[ENDPOINTS] {endpoint.url} failed ({endpoint.last_error}); out of rotation for {backoff}s")
+
+    async def call(self, attempt: Callable[[str], Awaitable[T]], attempts: int = OPENAI_RETRIES) -> T:
+        """
+        Run attempt(api_base) up to `attempts` times on the least loaded endpoint,
+        retrying the errors pr-agent retries; after an endpoint failure the next
+        try goes to another endpoint.
+        """
+        failed: Set[str] = set()
+        last_error: Optional[BaseException] = None
+        for _ in range(attempts):
+            endpoint = self.acquire(exclude=failed)
+            if endpoint is None:
+                break
+            started = time.monotonic()
+            try:
+                result = await attempt(endpoint.url)
+            except openai.RateLimitError as e:
+                self.release(endpoint, error=e)
+                raise
+            except (openai.APIError, openai.APITimeoutError) as e:
+                self.release(endpoint, error=e)
+                last_error = e
+                if is_endpoint_failure(e):
+                    failed.add(endpoint.url)
+                continue
+            except BaseException as e:
+                self.release(endpoint, error=e)
+                raise
+            self.release(endpoint, elapsed=time.monotonic() - started)
+            return result
+        if last_error is not None:
+            raise last_error
+        raise NoEndpointAvailable("No model endpoint is configured")
+
+    # Health checks
+
+    async def start(self):
+        if self._health_task is None and self.health_interval > 0:
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    async def stop(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            await asyncio.gather(self._health_task, return_exceptions=True)
+            self._health_task = None
+
+    async def _health_loop(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            try:
+                await self.check_health()
+            except Exception as e:
+                logger.warning(f"[ENDPOINTS] Health check failed: {e}")
+
+    async def check_health(self):
+        """Probe every endpoint; any HTTP answer below 500 counts as up"""
+        with self._lock:
+            endpoints = list(self._endpoints)
+        results = await asyncio.gather(*(asyncio.to_thread(_probe, e.url) for e in endpoints))
+        with self._lock:
+            for endpoint, error in zip(endpoints, results):
+                if error is None:
+                    if endpoint.failures:
+                        self._mark_up(endpoint)
+                elif endpoint.available:
+                    self._mark_down(endpoint, error)
+
+    def snapshot(self) -> List[dict]:
+        """State of every endpoint for diagnostics"""
+        with self._lock:
+            return [
+                {
+                    "url": e.url,
+                    "weight": e.weight,
+                    "outstanding": e.outstanding,
+                    "requests": e.requests,
+                    "healthy": e.available,
+                    "failures": e.failures,
+                    "last_error": e.last_error,
+                    "latency_ms": round(e.latency_ms) if e.latency_ms is not None else None,
+                }
+                for e in self._endpoints
+            ]
+
+
+def _probe(url: str) -> Optional[str]:
+    try:
+        response = requests.get(url, timeout=HEALTH_CHECK_TIMEOUT)
+    except requests.RequestException as e:
+        return str(e)
+    if response.status_code >= 500:
+        return f"HTTP {response.status_code}"
+    return None
+
+
+endpoint_pool = EndpointPool(health_interval=get_env_settings().ai_endpoint_health_interval_seconds)
+
+
+class BalancedLiteLLMAIHandler(LiteLLMAIHandler):
+    """
+    LiteLLM handler sending every call to an endpoint of the pool; behaves like
+    pr-agent's handler when the pool is inactive.
+    """
+
+    async def chat_completion(self, model: str, system: str, user: str, temperature: float = 0.2, img_path: str = None):
+        if not endpoint_pool.active:
+            return await super().chat_completion(model, system, user, temperature, img_path)
+        # The pool retries across endpoints, in place of pr-agent's retries on one server
+        complete = LiteLLMAIHandler.chat_completion.__wrapped__
+
+        async def attempt(api_base: str):
+            # Read into the request before the first await, so concurrent calls
+            # of one handler do not see each other's endpoint
+            self.api_base = api_base
+            return await complete(self, model, system, user, temperature, img_path)
+
+        return await endpoint_pool.call(attempt)
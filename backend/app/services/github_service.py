@@ -1,8 +1,11 @@
 import re
-from typing import Tuple
-from github import Github
+from typing import List, Optional, Tuple
 from ..config import get_settings
-from .base_service import BasePRService, PRInfo, PRDiff
+from .client_registry import get_github_client
+from .base_service import BasePRService, ComparisonUnavailable, LazyDiffs, PRInfo, PRDiff
+
+# GitHub's compare API lists at most this many files
+COMPARE_MAX_FILES = 300
 
 
 class GitHubService(BasePRService):
@@ -13,7 +16,7 @@ class GitHubService(BasePRService):
         self.token = token or settings.github_token
         if not self.token:
             raise ValueError("GitHub token is required. Please configure it in Settings.")
-        self.github = Github(self.token)
+        self.github = get_github_client(self.token)
 
     def parse_pr_url(self, url: str) -> Tuple[str, str, int]:
         """
@@ -42,49 +45,27 @@ class GitHubService(BasePRService):
 
     def get_pr_info(self, pr_url: str) -> PRInfo:
         """
-        Fetch pull request information and diffs from GitHub.
+        Fetch pull request information from GitHub.
+        
+        Costs a single API request; the changed files are listed page by page
+        only when PRInfo.diffs is iterated.
         
         Args:
             pr_url: Full GitHub pull request URL
             
         Returns:
-            PRInfo object containing PR details and file diffs
+            PRInfo object containing PR details and lazy file diffs
         """
         owner, repo_name, pr_number = self.parse_pr_url(pr_url)
         
-        # Get repository
-        repo = self.github.get_repo(f"{owner}/{repo_name}")
+        # Lazy repository: no request until one of its attributes is needed
+        repo = self.github.get_repo(f"{owner}/{repo_name}", lazy=True)
         
         # Get pull request
         pr = repo.get_pull(pr_number)
         
-        # Get files changed
-        files = pr.get_files()
-        diffs = []
-        
-        for file in files:
-            # Determine file status
-            status = file.status
-            new_file = status == "added"
-            deleted_file = status == "removed"
-            renamed_file = status == "renamed"
-            
-            # Get patch content (diff)
-            patch = file.patch or ""
-            
-            diff = PRDiff(
-                filename=file.filename,
-                old_path=file.previous_filename or file.filename,
-                new_path=file.filename,
-                diff=patch,
-                new_file=new_file,
-                deleted_file=deleted_file,
-                renamed_file=renamed_file
-            )
-            diffs.append(diff)
-        
         return PRInfo(
-            project_name=repo.name,
+            project_name=pr.base.repo.name,
             pr_number=pr_number,
             title=pr.title,
             author=pr.user.login if pr.user else 'unknown',
@@ -92,5 +73,78 @@ class GitHubService(BasePRService):
             target_branch=pr.base.ref,
             description=pr.body or '',
             web_url=pr.html_url,
-            diffs=diffs
+            # get_files() is a PaginatedList: pages are requested while iterating
+            diffs=LazyDiffs(lambda: (self._to_pr_diff(file) for file in pr.get_files())),
+            head_sha=pr.head.sha
         )
+
+    @staticmethod
+    def _to_pr_diff(file) -> PRDiff:
+        """Convert a PyGithub File (patch is empty for binary or very large files)"""
+        return PRDiff(
+            filename=file.filename,
+            old_path=file.previous_filename or file.filename,
+            new_path=file.filename,
+            diff=file.patch or "",
+            new_file=file.status == "added",
+            deleted_file=file.status == "removed",
+            renamed_file=file.status == "renamed"
+        )
+
+    def get_changed_files(self, pr_url: str, base_sha: str, head_sha: str) -> List[PRDiff]:
+        """
+        Fetch the files changed between two commits of a pull request.
+        
+        Args:
+            pr_url: Full GitHub pull request URL
+            base_sha: Previously reviewed head commit
+            head_sha: Current head commit
+            
+        Returns:
+            List of PRDiff objects (patch is empty for binary or very large files)
+            
+        Raises:
+            ComparisonUnavailable: The head was rebased or force-pushed, or the
+                comparison has too many files to be listed completely
+        """
+        owner, repo_name, _ = self.parse_pr_url(pr_url)
+        repo = self.github.get_repo(f"{owner}/{repo_name}", lazy=True)
+        comparison = repo.compare(base_sha, head_sha)
+        
+        # The comparison is against the merge base: unless the reviewed commit is
+        # an ancestor of the head, it includes changes that are not in the PR
+        if comparison.status not in ("ahead", "identical"):
+            raise ComparisonUnavailable(
+                f"{base_sha[:8]} is not an ancestor of {head_sha[:8]} ({comparison.status}, rebased or force-pushed?)"
+            )
+        files = comparison.files
+        if len(files) >= COMPARE_MAX_FILES:
+            raise ComparisonUnavailable(f"{len(files)} files changed, GitHub lists at most {COMPARE_MAX_FILES}")
+        
+        return [self._to_pr_diff(file) for file in files]
+
+    def parse_repository_url(self, url: str) -> Tuple[str, str]:
+        """
+        Parse a GitHub repository URL (https://github.com/owner/repo, optionally
+        ending in .git or /pulls) to extract owner and repo.
+        """
+        match = re.match(r'^https?://github\.com/([^/]+)/([^/]+?)(?:\.git)?(?:/pulls)?/?$', url)
+        if not match:
+            raise ValueError(f"Invalid GitHub repository URL format: {url}")
+        return match.group(1), match.group(2)
+
+    def list_open_prs(self, repository_url: str, target_branch: Optional[str] = None,
+                      author: Optional[str] = None, limit: int = 50) -> List[str]:
+        """List open pull requests of a repository, newest first"""
+        owner, repo_name = self.parse_repository_url(repository_url)
+        repo = self.github.get_repo(f"{owner}/{repo_name}", lazy=True)
+        
+        filters = {"base": target_branch} if target_branch else {}
+        urls = []
+        for pr in repo.get_pulls(state="open", sort="created", direction="desc", **filters):
+            if author and (not pr.user or pr.user.login != author):
+                continue
+            urls.append(pr.html_url)
+            if len(urls) >= limit:
+                break
+        return urls
@@ -1,8 +1,13 @@
 import re
-from typing import Tuple
+from typing import Iterator, List, Optional, Tuple
+from urllib.parse import quote
 import gitlab
 from ..config import get_settings
-from .base_service import BasePRService, PRInfo, PRDiff
+from .client_registry import get_gitlab_client
+from .base_service import BasePRService, ComparisonUnavailable, LazyDiffs, PRInfo, PRDiff
+
+# GitLab cuts comparisons off at this many files (default diff_max_files)
+COMPARE_MAX_FILES = 1000
 
 
 class GitLabService(BasePRService):
@@ -11,7 +16,7 @@ class GitLabService(BasePRService):
     def __init__(self):
         settings = get_settings()
         self.gitlab_url = settings.gitlab_url
-        self.gl = gitlab.Gitlab(settings.gitlab_url, private_token=settings.gitlab_token)
+        self.gl = get_gitlab_client(settings.gitlab_url, settings.gitlab_token)
 
     def parse_pr_url(self, url: str) -> Tuple[str, int]:
         """
@@ -38,40 +43,27 @@ class GitLabService(BasePRService):
 
     def get_pr_info(self, pr_url: str) -> PRInfo:
         """
-        Fetch merge request information and diffs from GitLab.
+        Fetch merge request information from GitLab.
+        
+        Costs a single API request; the changed files are listed page by page
+        only when PRInfo.diffs is iterated.
         
         Args:
             pr_url: Full GitLab merge request URL
             
         Returns:
-            PRInfo object containing MR details and file diffs
+            PRInfo object containing MR details and lazy file diffs
         """
         project_path, mr_number = self.parse_pr_url(pr_url)
         
-        # Get project
-        project = self.gl.projects.get(project_path)
+        # Lazy project: no request, only used to address the merge request
+        project = self.gl.projects.get(project_path, lazy=True)
         
         # Get merge request
         mr = project.mergerequests.get(mr_number)
         
-        # Get diffs
-        changes = mr.changes()
-        diffs = []
-        
-        for change in changes.get('changes', []):
-            diff = PRDiff(
-                filename=change.get('new_path', change.get('old_path', '')),
-                old_path=change.get('old_path', ''),
-                new_path=change.get('new_path', ''),
-                diff=change.get('diff', ''),
-                new_file=change.get('new_file', False),
-                deleted_file=change.get('deleted_file', False),
-                renamed_file=change.get('renamed_file', False)
-            )
-            diffs.append(diff)
-        
         return PRInfo(
-            project_name=project.name,
+            project_name=project_path.split('/')[-1],
             pr_number=mr_number,
             title=mr.title,
             author=mr.author.get('username', 'unknown') if mr.author else 'unknown',
@@ -79,5 +71,99 @@ class GitLabService(BasePRService):
             target_branch=mr.target_branch,
             description=mr.description or '',
             web_url=mr.web_url,
-            diffs=diffs
+            diffs=LazyDiffs(lambda: self._iter_mr_diffs(project_path, mr)),
+            head_sha=mr.sha
+        )
+
+    def _iter_mr_diffs(self, project_path: str, mr) -> Iterator[PRDiff]:
+        """Yield the diffs of a merge request, one API page at a time"""
+        try:
+            changes = self.gl.http_list(
+                f"/projects/{quote(project_path, safe='')}/merge_requests/{mr.iid}/diffs",
+                iterator=True,
+                per_page=100
+            )
+        except gitlab.exceptions.GitlabHttpError as e:
+            if e.response_code != 404:
+                raise
+            # The paginated diffs endpoint needs GitLab 15.7+
+            changes = mr.changes().get('changes', [])
+        
+        for change in changes:
+            yield self._to_pr_diff(change)
+
+    @staticmethod
+    def _to_pr_diff(change: dict) -> PRDiff:
+        return PRDiff(
+            filename=change.get('new_path', change.get('old_path', '')),
+            old_path=change.get('old_path', ''),
+            new_path=change.get('new_path', ''),
+            diff=change.get('diff', ''),
+            new_file=change.get('new_file', False),
+            deleted_file=change.get('deleted_file', False),
+            renamed_file=change.get('renamed_file', False)
         )
+
+    def get_changed_files(self, pr_url: str, base_sha: str, head_sha: str) -> List[PRDiff]:
+        """
+        Fetch the files changed between two commits of a merge request.
+        
+        Args:
+            pr_url: Full GitLab merge request URL
+            base_sha: Previously reviewed head commit
+            head_sha: Current head commit
+            
+        Returns:
+            List of PRDiff objects for the changed files
+            
+        Raises:
+            ComparisonUnavailable: The head was rebased or force-pushed, or the
+                comparison has too many files to be listed completely
+        """
+        project_path, _ = self.parse_pr_url(pr_url)
+        project = self.gl.projects.get(project_path, lazy=True)
+        
+        # The comparison is against the merge base: unless the reviewed commit is
+        # an ancestor of the head, it includes changes that are not in the MR
+        merge_base = project.repository_merge_base([base_sha, head_sha])
+        if merge_base.get('id') != base_sha:
+            raise ComparisonUnavailable(
+                f"{base_sha[:8]} is not an ancestor of {head_sha[:8]} (rebased or force-pushed?)"
+            )
+        comparison = project.repository_compare(base_sha, head_sha)
+        diffs = comparison.get('diffs', [])
+        if len(diffs) >= COMPARE_MAX_FILES:
+            raise ComparisonUnavailable(f"{len(diffs)} files changed, more than GitLab compares")
+        
+        return [self._to_pr_diff(change) for change in diffs]
+
+    def parse_repository_url(self, url: str) -> str:
+        """
+        Parse a GitLab project URL (https://gitlab.com/group/subgroup/project,
+        optionally ending in .git or /-/merge_requests) to extract the project path.
+        """
+        match = re.match(r'^https?://[^/]+/(.+?)(?:\.git)?(?:/-/merge_requests)?/?$', url)
+        if not match or "/-/" in match.group(1):
+            raise ValueError(f"Invalid GitLab project URL format: {url}")
+        return match.group(1)
+
+    def list_open_prs(self, repository_url: str, target_branch: Optional[str] = None,
+                      author: Optional[str] = None, limit: int = 50) -> List[str]:
+        """List open merge requests of a project, newest first"""
+        project_path = self.parse_repository_url(repository_url)
+        project = self.gl.projects.get(project_path, lazy=True)
+        
+        filters = {}
+        if target_branch:
+            filters["target_branch"] = target_branch
+        if author:
+            filters["author_username"] = author
+        urls = []
+        for mr in project.mergerequests.list(
+            state="opened", order_by="created_at", sort="desc",
+            iterator=True, per_page=min(limit, 100), **filters
+        ):
+            urls.append(mr.web_url)
+            if len(urls) >= limit:
+                break
+        return urls
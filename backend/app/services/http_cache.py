@@ -0,0 +1,290 @@
+"""
+On-disk cache of GitHub/GitLab API responses, revalidated with ETags.
+
+Successful GET responses carrying an ETag or Last-Modified header are stored
+under the app data directory. The next identical request is sent with
+If-None-Match / If-Modified-Since; on 304 Not Modified the stored body is
+returned, so big file lists and diffs are not transferred again and GitHub does
+not count the request against the primary rate limit.
+
+Used by the API clients of client_registry (which pr-agent's GitHub/GitLab
+providers share too) and, once install_http_cache() has run, by every PyGithub
+client. The adapter also feeds the rate-limit budgets (rate_limits) and refuses
+requests while a budget is exhausted, so it is installed even when the cache is
+disabled. It never waits for a reset itself: provider calls can run on the
+event loop.
+"""
+import hashlib
+import json
+import logging
+import os
+import tempfile
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import requests
+from github.Requester import HTTPRequestsConnectionClass, HTTPSRequestsConnectionClass, Requester
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from ..config import get_env_settings
+from .rate_limits import RateLimitExceeded, is_rate_limited, rate_limits, report_rate_limit
+
+logger = logging.getLogger(__name__)
+
+# Request headers that select a different response for the same URL
+VARY_HEADERS = ("Authorization", "PRIVATE-TOKEN", "JOB-TOKEN", "Accept")
+
+# Headers describing the transfer, not the (already decoded) stored body
+TRANSFER_HEADERS = ("Content-Length", "Content-Encoding", "Transfer-Encoding", "Connection")
+
+
+class ResponseCache:
+    """Files under `directory`: <key>.json (status, headers, validators) and <key>.body"""
+
+    def __init__(self, directory: str, max_bytes: int):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.stores = 0
+        self._size: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(request: requests.PreparedRequest) -> str:
+        parts = [request.method or "GET", request.url or ""]
+        parts += [f"{name}={request.headers.get(name, '')}" for name in VARY_HEADERS]
+        return hashlib.sha256("\n".join(parts).encode()).hexdigest()
+
+    def load(self, key: str) -> Optional[dict]:
+        try:
+            with open(self._path(key, "json"), encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def record_hit(self):
+        # Adapters of several threads serve hits at the same time
+        with self._lock:
+            self.hits += 1
+
+    def load_body(self, key: str) -> Optional[bytes]:
+        path = self._path(key, "body")
+        try:
+            with open(path, "rb") as f:
+                body = f.read()
+            os.utime(path)  # Recently used entries are evicted last
+            return body
+        except OSError:
+            return None
+
+    def store(self, key: str, response: requests.Response):
+        headers = {k: v for k, v in response.headers.items() if k not in TRANSFER_HEADERS}
+        meta = {
+            "url": response.url,
+            "status": response.status_code,
+            "reason": response.reason,
+            "headers": headers,
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified"),
+        }
+        body = response.content
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            self._write(self._path(key, "body"), body)
+            self._write(self._path(key, "json"), json.dumps(meta).encode())
+        except OSError as e:
+            logger.warning(f"[HTTP CACHE] Could not store {response.url}: {e}")
+            return
+
+        with self._lock:
+            self.stores += 1
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(body)
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.directory, f"{key}.{ext}")
+
+    def _write(self, path: str, data: bytes):
+        # Write then rename, so concurrent readers never see a partial file
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            try:
+                os.unlink(tmp_path)
+            except OSError:
+                pass
+            raise
+
+    def _bodies(self):
+        try:
+            with os.scandir(self.directory) as entries:
+                return [e for e in entries if e.name.endswith(".body")]
+        except OSError:
+            return []
+
+    def _scan_size(self) -> int:
+        return sum(e.stat().st_size for e in self._bodies())
+
+    def _evict(self):
+        """Delete least recently used entries until the cache is at 80% of its limit"""
+        bodies = sorted(self._bodies(), key=lambda e: e.stat().st_mtime)
+        target = self.max_bytes * 0.8
+        removed = 0
+        for entry in bodies:
+            if self._size <= target:
+                break
+            size = entry.stat().st_size
+            key = entry.name[:-len(".body")]
+            for ext in ("json", "body"):
+                try:
+                    os.unlink(self._path(key, ext))
+                except OSError:
+                    pass
+            self._size -= size
+            removed += 1
+        logger.info(f"[HTTP CACHE] Evicted {removed} entries")
+
+
+def _create_response_cache() -> Optional[ResponseCache]:
+    env_settings = get_env_settings()
+    if not env_settings.http_cache_enabled:
+        return None
+    base_dir = env_settings.pr_review_app_data_dir or "."
+    return ResponseCache(
+        directory=os.path.join(base_dir, "http_cache"),
+        max_bytes=env_settings.http_cache_max_mb * 1024 * 1024,
+    )
+
+
+response_cache = _create_response_cache()
+
+
+class ConditionalCacheAdapter(requests.adapters.HTTPAdapter):
+    """
+    HTTPAdapter that revalidates cached GET responses instead of downloading
+    them again, and keeps requests within the token's rate limit.
+    """
+
+    def send(self, request, stream=False, **kwargs):
+        cache = response_cache
+        if cache is None or request.method != "GET" or stream:
+            return self._send_within_budget(request, stream=stream, **kwargs)
+
+        key = cache.key(request)
+        meta = cache.load(key)
+        if meta and "If-None-Match" not in request.headers and "If-Modified-Since" not in request.headers:
+            if meta.get("etag"):
+                request.headers["If-None-Match"] = meta["etag"]
+            if meta.get("last_modified"):
+                request.headers["If-Modified-Since"] = meta["last_modified"]
+
+        response = self._send_within_budget(request, stream=stream, **kwargs)
+
+        if response.status_code == 304 and meta:
+            body = cache.load_body(key)
+            if body is not None:
+                cache.record_hit()
+                return self._cached_response(request, meta, body, response)
+            # Body vanished (evicted): fetch it again without validators
+            request.headers.pop("If-None-Match", None)
+            request.headers.pop("If-Modified-Since", None)
+            return self._send_within_budget(request, stream=stream, **kwargs)
+
+        if response.status_code == 200 and (response.headers.get("ETag") or response.headers.get("Last-Modified")):
+            if "no-store" not in response.headers.get("Cache-Control", ""):
+                cache.store(key, response)
+        return response
+
+    def _send_within_budget(self, request, **kwargs):
+        """
+        Send unless the budget is exhausted (RateLimitExceeded). A response
+        rejected for the rate limit is returned as is, for the client to raise
+        its own error, and reported to the active watch_rate_limits() block.
+        """
+        wait = rate_limits.wait_time(request.url, request.headers)
+        if wait > 0:
+            raise report_rate_limit(RateLimitExceeded(request.url, time.time() + wait))
+        response = super().send(request, **kwargs)
+        rate_limits.record(request.url, request.headers, response.status_code, response.headers)
+        if is_rate_limited(response.status_code, response.headers):
+            wait = rate_limits.wait_time(request.url, request.headers)
+            report_rate_limit(RateLimitExceeded(request.url, time.time() + wait))
+        return response
+
+    def _cached_response(self, request, meta: dict, body: bytes, not_modified: requests.Response) -> requests.Response:
+        response = requests.Response()
+        response.status_code = meta["status"]
+        response.reason = meta.get("reason") or "OK"
+        headers = CaseInsensitiveDict(meta["headers"])
+        # The 304 carries the current rate limit, date and validators
+        headers.update({k: v for k, v in not_modified.headers.items() if k not in TRANSFER_HEADERS})
+        response.headers = headers
+        response.encoding = get_encoding_from_headers(headers)
+        response._content = body
+        response._content_consumed = True
+        response.url = request.url
+        response.request = request
+        response.connection = self
+        response.elapsed = not_modified.elapsed
+        not_modified.close()
+        return response
+
+
+_pygithub_adapters: Dict[Tuple[str, int], ConditionalCacheAdapter] = {}
+_pygithub_adapters_lock = threading.Lock()
+
+
+def _pygithub_adapter(retry, pool_size: int) -> ConditionalCacheAdapter:
+    """
+    Adapter shared by PyGithub connections with the same settings. With
+    injected connection classes PyGithub builds a connection per request; the
+    shared adapter keeps its connection pool (keep-alive) across them.
+    """
+    key = (repr(retry), pool_size)
+    with _pygithub_adapters_lock:
+        adapter = _pygithub_adapters.get(key)
+        if adapter is None:
+            adapter = ConditionalCacheAdapter(max_retries=retry, pool_connections=pool_size, pool_maxsize=pool_size)
+            _pygithub_adapters[key] = adapter
+        return adapter
+
+
+class _CachedHTTPSConnection(HTTPSRequestsConnectionClass):
+    """PyGithub connection using the conditional cache adapter"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.adapter = _pygithub_adapter(self.retry, self.pool_size)
+        self.session.mount("https://", self.adapter)
+
+
+class _CachedHTTPConnection(HTTPRequestsConnectionClass):
+    """PyGithub connection (plain HTTP, e.g. GitHub Enterprise) using the conditional cache adapter"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.adapter = _pygithub_adapter(self.retry, self.pool_size)
+        self.session.mount("http://", self.adapter)
+
+
+def mount_http_cache(session: requests.Session, pool_size: int = requests.adapters.DEFAULT_POOLSIZE):
+    """Route a requests session through the cache"""
+    adapter = ConditionalCacheAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+
+
+def install_http_cache():
+    """Use the cache adapter for every PyGithub client"""
+    Requester.injectConnectionClasses(_CachedHTTPConnection, _CachedHTTPSConnection)
+    if response_cache is not None:
+        logger.info(f"[HTTP CACHE] Caching provider API responses in {response_cache.directory}")
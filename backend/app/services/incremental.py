@@ -0,0 +1,131 @@
+"""
+Helpers for incremental re-reviews.
+
+A re-review after a new push only sends the files changed since the last
+reviewed commit to pr-agent. Suggestions of the previous run are kept: moved to
+their new line numbers when the change happened elsewhere in the file, dropped
+when the lines they point at were modified.
+"""
+import re
+from bisect import bisect_right
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional, Set, Tuple
+
+from .base_service import PRDiff
+
+_HUNK_HEADER = re.compile(r"^@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+@dataclass
+class FileDelta:
+    """Line changes of one file between the reviewed commit and the new head"""
+    removed: Set[int] = field(default_factory=set)  # Old line numbers removed or modified
+    inserted_after: Set[int] = field(default_factory=set)  # Old line numbers followed by new lines
+    # (old line, new - old) from that line on, in increasing old line order
+    offsets: List[Tuple[int, int]] = field(default_factory=list)
+    unknown: bool = False  # No patch available (binary or too large): treat every line as changed
+
+    def remap(self, line_start: Optional[int], line_end: Optional[int]) -> Optional[Tuple[int, int]]:
+        """
+        New line range of an old range, or None if any of its lines changed.
+
+        Ranges without line numbers cannot be checked and are reported as changed.
+        """
+        if self.unknown or line_start is None:
+            return None
+        line_end = line_end if line_end is not None else line_start
+        if any(line_start <= line <= line_end for line in self.removed):
+            return None
+        if any(line_start <= line < line_end for line in self.inserted_after):
+            return None
+        return line_start + self._offset(line_start), line_end + self._offset(line_end)
+
+    def _offset(self, line: int) -> int:
+        index = bisect_right([old for old, _ in self.offsets], line) - 1
+        return self.offsets[index][1] if index >= 0 else 0
+
+
+def parse_patch(patch: str) -> FileDelta:
+    """Parse a unified diff of one file into removed lines, insertions and line offsets"""
+    delta = FileDelta()
+    if not patch:
+        delta.unknown = True
+        return delta
+
+    old = new = 0
+    in_hunk = False
+    for line in patch.splitlines():
+        header = _HUNK_HEADER.match(line)
+        if header:
+            if in_hunk:
+                delta.offsets.append((old, new - old))
+            old, new = int(header.group(1)), int(header.group(3))
+            # An empty side starts at the line before the hunk
+            if header.group(2) == "0":
+                old += 1
+            if header.group(4) == "0":
+                new += 1
+            in_hunk = True
+            continue
+        if not in_hunk or line.startswith("\\"):
+            continue
+        if line.startswith("-"):
+            delta.removed.add(old)
+            old += 1
+        elif line.startswith("+"):
+            delta.inserted_after.add(old - 1)
+            new += 1
+        else:
+            delta.offsets.append((old, new - old))
+            old += 1
+            new += 1
+    if in_hunk:
+        delta.offsets.append((old, new - old))
+    return delta
+
+
+@dataclass
+class ChangeSet:
+    """Files changed since the reviewed commit"""
+    deltas: dict  # path at the reviewed commit -> FileDelta
+    moved: dict  # path at the reviewed commit -> new path (renames)
+    gone: Set[str]  # paths deleted since the reviewed commit
+    paths: List[str]  # paths to send to pr-agent
+
+    @classmethod
+    def from_diffs(cls, diffs: Iterable[PRDiff]) -> "ChangeSet":
+        deltas, moved, gone, paths = {}, {}, set(), []
+        for diff in diffs:
+            old_path = diff.old_path or diff.filename
+            if diff.deleted_file:
+                gone.add(old_path)
+                continue
+            paths.append(diff.new_path or diff.filename)
+            if diff.new_file:
+                continue
+            if diff.renamed_file and diff.old_path != diff.new_path:
+                moved[old_path] = diff.new_path
+            if diff.renamed_file and not diff.diff:
+                # Pure rename: same content at a new path
+                deltas[old_path] = FileDelta()
+            else:
+                deltas[old_path] = parse_patch(diff.diff)
+        return cls(deltas=deltas, moved=moved, gone=gone, paths=paths)
+
+    def remap(self, file_path: str, line_start: Optional[int], line_end: Optional[int]) -> Optional[Tuple[str, Optional[int], Optional[int]]]:
+        """New location of a suggestion, or None if the code it points at changed"""
+        if file_path in self.gone:
+            return None
+        delta = self.deltas.get(file_path)
+        if delta is None:
+            return file_path, line_start, line_end
+        new_range = delta.remap(line_start, line_end)
+        if new_range is None:
+            return None
+        return (self.moved.get(file_path, file_path), *new_range)
+
+
+def only_files_regex(paths: Iterable[str]) -> str:
+    """pr-agent ignore.regex matching every file except the given paths"""
+    alternatives = "|".join(re.escape(path) for path in sorted(set(paths)))
+    return f"^(?!(?:{alternatives})$)"
@@ -0,0 +1,68 @@
+"""
+Coalescing of identical reviews running at the same time.
+
+Two submissions of the same PR commit with the same model, rules and mode
+(the review cache key) would run pr-agent twice. The first one runs; the
+others wait for its result and save it into their own review. If the first
+run fails or is cancelled, a waiting review runs pr-agent itself.
+"""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class InflightReview:
+    review_id: int
+    future: asyncio.Future
+
+
+class InflightReviews:
+    """Running pr-agent reviews by cache key digest"""
+
+    def __init__(self):
+        self._running: Dict[str, InflightReview] = {}
+
+    def running(self, key: str) -> Optional[InflightReview]:
+        return self._running.get(key)
+
+    async def run_once(
+        self,
+        key: str,
+        review_id: int,
+        run: Callable[[], Awaitable[dict]],
+        on_join: Optional[Callable[[int], Awaitable[None]]] = None,
+    ) -> dict:
+        """
+        Run `run()` unless a review with the same key is in flight, in which
+        case wait for and return (a copy of) its result.
+
+        on_join is awaited with the id of the running review before waiting.
+        """
+        while key in self._running:
+            leader = self._running[key]
+            if on_join:
+                await on_join(leader.review_id)
+            await asyncio.wait({leader.future})
+            if not leader.future.cancelled():
+                result = leader.future.result()
+                return {**result, "suggestions": list(result.get("suggestions", []))}
+            logger.info(f"[INFLIGHT] Review {leader.review_id} did not finish; review {review_id} runs itself")
+
+        inflight = self._running[key] = InflightReview(review_id, asyncio.get_running_loop().create_future())
+        try:
+            result = await run()
+            inflight.future.set_result(result)
+            return result
+        finally:
+            # Failed or cancelled: waiting reviews run on their own
+            if not inflight.future.done():
+                inflight.future.cancel()
+            if self._running.get(key) is inflight:
+                del self._running[key]
+
+
+inflight_reviews = InflightReviews()
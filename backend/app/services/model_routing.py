@@ -0,0 +1,71 @@
+"""
+Model selection per pr-agent tool.
+
+A review runs PRReviewer ("review"), PRCodeSuggestions ("improve") and
+PRDescription ("describe") side by side, and they do not need the same model:
+a description is fine with a small fast model while code suggestions gain
+from the strongest one. The settings (and a rule set, per tool) can give each
+tool a chain of models: the first one is used, pr-agent falls back to the next
+ones when a call fails. Tools without a chain use ai_model.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Set
+
+TOOLS = ("review", "improve", "describe")
+
+
+def clean_chain(models: Optional[Iterable[str]]) -> List[str]:
+    """Model names without blanks and duplicates, in order"""
+    chain = []
+    for model in models or []:
+        model = (model or "").strip()
+        if model and model not in chain:
+            chain.append(model)
+    return chain
+
+
+def clean_tool_models(tool_models: Optional[dict]) -> Dict[str, List[str]]:
+    """Chains of the known tools, empty ones dropped (the stored form)"""
+    chains = {}
+    for tool in TOOLS:
+        chain = clean_chain((tool_models or {}).get(tool))
+        if chain:
+            chains[tool] = chain
+    return chains
+
+
+@dataclass
+class ModelRouting:
+    """Model chain per tool (tools missing here use the default model)"""
+    chains: Dict[str, List[str]] = field(default_factory=dict)
+
+    @classmethod
+    def resolve(cls, tool_models: Optional[dict], overrides: Optional[dict] = None) -> "ModelRouting":
+        """Chains of the settings, replaced per tool by the rule set's overrides"""
+        chains = clean_tool_models(tool_models)
+        chains.update(clean_tool_models(overrides))
+        return cls(chains=chains)
+
+    def chain(self, tool: str) -> List[str]:
+        return self.chains.get(tool, [])
+
+    @property
+    def models(self) -> Set[str]:
+        return {model for chain in self.chains.values() for model in chain}
+
+    @property
+    def fingerprint(self) -> Optional[str]:
+        """Part of the review cache key; None when every tool uses the default model"""
+        if not self.chains:
+            return None
+        return ";".join(f"{tool}={','.join(self.chains[tool])}" for tool in TOOLS if tool in self.chains)
+
+    def describe(self) -> str:
+        """One line for the review log"""
+        parts = []
+        for tool in TOOLS:
+            chain = self.chain(tool)
+            if chain:
+                fallback = f" (then {', '.join(chain[1:])})" if len(chain) > 1 else ""
+                parts.append(f"{tool}: {chain[0]}{fallback}")
+        return "; ".join(parts)
@@ -1,23 +1,36 @@
 import yaml
 import re
+import copy
 import asyncio
 import logging
-from typing import List, Optional
+from contextlib import contextmanager
+from typing import AsyncIterator, Callable, Hashable, List, Optional, Sequence
 from functools import partial
 
 logger = logging.getLogger(__name__)
 
+from starlette_context import request_cycle_context
 from pr_agent.tools.pr_reviewer import PRReviewer
 from pr_agent.tools.pr_code_suggestions import PRCodeSuggestions
 from pr_agent.tools.pr_description import PRDescription
 from pr_agent.tools.pr_questions import PRQuestions
 from pr_agent.algo.ai_handlers.litellm_ai_handler import LiteLLMAIHandler
-from pr_agent.config_loader import get_settings
-from pr_agent.git_providers import get_git_provider_with_context
-from pr_agent.algo.utils import load_yaml
+from pr_agent.config_loader import global_settings, get_settings
+from pr_agent.algo.pr_processing import retry_with_fallback_models
+from pr_agent.algo.utils import load_yaml, ModelType
 
-from ..config import get_settings as get_app_settings
+from ..config import get_settings as get_app_settings, get_env_settings
 from .llm_service import CodeSuggestion
+from .incremental import only_files_regex
+from .pr_snapshot import PRSnapshot
+from .endpoint_pool import endpoint_pool
+from .diff_filter import DiffFilter, filter_diff
+from .diff_sharding import DiffShard, merge_shard_results, plan_shards
+from .model_routing import ModelRouting
+from .token_planner import MeteredLiteLLMAIHandler, TokenMeter, metered_run, metering, model_context_tokens, plan_review
+from .streaming_ai_handler import StreamingLiteLLMAIHandler
+from .cancellation import run_until_disconnected, wait_for_disconnect
+from .pr_chat import PRChatContext, build_chat_context, build_messages, chat_contexts
 
 
 class PRAgentService:
@@ -26,68 +39,124 @@ class PRAgentService:
     def __init__(self):
         """Initialize pr-agent service with configuration from app settings"""
         self.app_settings = get_app_settings()
-        self._configure_pr_agent()
     
-    def _configure_pr_agent(self):
+    @property
+    def model_id(self) -> str:
+        """Provider and model the reviews run with (part of the review cache key)"""
+        return f"{self.app_settings.ai_provider or 'ollama'}:{self.app_settings.ai_model}"
+    
+    def model_routing(self, overrides: Optional[dict] = None) -> ModelRouting:
+        """Model chains per tool from the settings, with a rule set's overrides"""
+        return ModelRouting.resolve(self.app_settings.tool_models, overrides)
+    
+    def routed_model_id(self, routing: ModelRouting) -> str:
+        """model_id including the per-tool models (part of the review cache key)"""
+        if routing.fingerprint:
+            return f"{self.model_id}[{routing.fingerprint}]"
+        return self.model_id
+    
+    def _provider_model(self, model: str) -> str:
+        """Model name as litellm expects it for the configured provider"""
+        if (self.app_settings.ai_provider or "ollama") == "ollama" and not model.startswith("ollama/"):
+            return f"ollama/{model}"
+        return model
+    
+    @contextmanager
+    def _settings_scope(self, pr_url: str):
+        """
+        Run pr-agent with a private copy of its settings.
+        
+        pr-agent's get_settings() returns context["settings"] when a starlette-context
+        is active, so every review/chat gets its own deep copy of the global settings
+        (the same pattern pr-agent's own servers use). Concurrent reviews with different
+        rule sets or modes no longer overwrite each other's configuration. Tasks created
+        inside the scope inherit it through the context variable.
+        """
+        settings = copy.deepcopy(global_settings)
+        self._configure_pr_agent(settings)
+        self._configure_git_provider(settings, pr_url)
+        with _use_settings(settings):
+            yield settings
+    
+    @contextmanager
+    def _tool_scope(self, tool: str, routing: ModelRouting):
+        """
+        Settings of one tool: inside a review's scope, a copy of its settings
+        with the tool's model chain (the review's own settings when the tool has
+        none). pr-agent tools created in the block and tasks started in it keep
+        these settings, so tools running side by side can use different models.
+        """
+        chain = [self._provider_model(model) for model in routing.chain(tool)]
+        settings = get_settings()
+        if chain:
+            settings = copy.deepcopy(settings)
+            settings.set("config.model", chain[0])
+            # PRDescription and the self-reflection of suggestions use model_turbo
+            settings.set("config.model_turbo", chain[0])
+            settings.set("config.fallback_models", chain[1:])
+        with _use_settings(settings):
+            yield settings
+    
+    def _configure_pr_agent(self, settings):
         """Configure pr-agent settings based on app settings"""
         # Configure AI provider and model
         provider = self.app_settings.ai_provider or "ollama"
         model = self.app_settings.ai_model
         
+        # With several inference servers configured every call picks one of
+        # them (BalancedLiteLLMAIHandler); the first is the handlers' default.
+        # The pool is configured at startup and when the settings are saved.
+        base_url = endpoint_pool.first_url() or self.app_settings.ai_base_url
+        
         # Handle different providers
         if provider == "ollama":
-            if self.app_settings.ai_base_url:
-                get_settings().set("OLLAMA.API_BASE", self.app_settings.ai_base_url)
+            if base_url:
+                settings.set("OLLAMA.API_BASE", base_url)
             
             # Set model (Ollama format: ollama/model_name)
-            if not model.startswith("ollama/"):
-                model = f"ollama/{model}"
-            get_settings().set("config.model", model)
-            get_settings().set("config.fallback_models", [model])
+            model = self._provider_model(model)
+            settings.set("config.model", model)
+            settings.set("config.fallback_models", [model])
             
         elif provider == "openai":
             if self.app_settings.ai_api_key:
-                get_settings().set("OPENAI.KEY", self.app_settings.ai_api_key)
-            if self.app_settings.ai_base_url:
-                get_settings().set("OPENAI.BASE_URL", self.app_settings.ai_base_url)
-            get_settings().set("config.model", model)
+                settings.set("OPENAI.KEY", self.app_settings.ai_api_key)
+            if base_url:
+                settings.set("OPENAI.BASE_URL", base_url)
+            settings.set("config.model", model)
             
         elif provider == "anthropic":
             if self.app_settings.ai_api_key:
-                get_settings().set("ANTHROPIC.KEY", self.app_settings.ai_api_key)
-            get_settings().set("config.model", model)
+                settings.set("ANTHROPIC.KEY", self.app_settings.ai_api_key)
+            settings.set("config.model", model)
             
         elif provider == "gemini":
             if self.app_settings.ai_api_key:
-                get_settings().set("GEMINI.KEY", self.app_settings.ai_api_key)
-            get_settings().set("config.model", model)
+                settings.set("GEMINI.KEY", self.app_settings.ai_api_key)
+            settings.set("config.model", model)
+        
+        # pr-agent's default turbo model (describe, chat) belongs to another provider
+        settings.set("config.model_turbo", model)
         
-        # Set common config
+        # Set common config; never plan for more context than the model has
         max_tokens = self.app_settings.max_tokens or 128000
-        get_settings().set("config.max_model_tokens", max_tokens)
-        get_settings().set("config.custom_model_max_tokens", max_tokens)
+        context_tokens = model_context_tokens(model)
+        if context_tokens:
+            max_tokens = min(max_tokens, context_tokens)
+        settings.set("config.max_model_tokens", max_tokens)
+        settings.set("config.custom_model_max_tokens", max_tokens)
         
         # Increase timeout for AI (default is 120s)
-        get_settings().set("config.ai_timeout", 300)
+        settings.set("config.ai_timeout", 300)
         
         # Disable publishing output (we'll handle it ourselves)
-        get_settings().set("config.publish_output", False)
+        settings.set("config.publish_output", False)
         
         # Enable score and other advanced metrics
-        get_settings().set("pr_reviewer.require_score_review", True)
-        get_settings().set("pr_reviewer.require_estimate_effort_to_review", True)
-        get_settings().set("pr_reviewer.require_security_review", True)
-        get_settings().set("pr_code_suggestions.suggestions_score_threshold", 0)
-        
-        # Set git provider tokens (will be set per request based on PR URL)
-        if self.app_settings.github_token:
-            get_settings().set("GITHUB.USER_TOKEN", self.app_settings.github_token)
-            get_settings().set("GITHUB.DEPLOYMENT_TYPE", "user")
-        
-        if self.app_settings.gitlab_token:
-            get_settings().set("GITLAB.PERSONAL_ACCESS_TOKEN", self.app_settings.gitlab_token)
-            if self.app_settings.gitlab_url and self.app_settings.gitlab_url != "https://gitlab.com":
-                get_settings().set("GITLAB.URL", self.app_settings.gitlab_url)
+        settings.set("pr_reviewer.require_score_review", True)
+        settings.set("pr_reviewer.require_estimate_effort_to_review", True)
+        settings.set("pr_reviewer.require_security_review", True)
+        settings.set("pr_code_suggestions.suggestions_score_threshold", 0)
     
     def _detect_git_provider(self, pr_url: str) -> str:
         """Detect git provider from PR URL"""
@@ -100,24 +169,34 @@ class PRAgentService:
             # Default to gitlab for custom instances
             return "gitlab"
     
-    def _configure_git_provider(self, pr_url: str):
+    def _configure_git_provider(self, settings, pr_url: str):
         """Configure git provider settings for the specific PR"""
         provider = self._detect_git_provider(pr_url)
         
         # Set git provider in pr-agent config
-        get_settings().set("config.git_provider", provider)
+        settings.set("config.git_provider", provider)
         
-        # Ensure tokens are set
+        # Set tokens for the detected provider
         if provider == "github" and self.app_settings.github_token:
-            get_settings().set("GITHUB.USER_TOKEN", self.app_settings.github_token)
-            get_settings().set("GITHUB.DEPLOYMENT_TYPE", "user")
+            settings.set("GITHUB.USER_TOKEN", self.app_settings.github_token)
+            settings.set("GITHUB.DEPLOYMENT_TYPE", "user")
         elif provider == "gitlab":
             if self.app_settings.gitlab_token:
-                get_settings().set("GITLAB.PERSONAL_ACCESS_TOKEN", self.app_settings.gitlab_token)
+                settings.set("GITLAB.PERSONAL_ACCESS_TOKEN", self.app_settings.gitlab_token)
             if self.app_settings.gitlab_url and self.app_settings.gitlab_url != "https://gitlab.com":
-                get_settings().set("GITLAB.URL", self.app_settings.gitlab_url)
+                settings.set("GITLAB.URL", self.app_settings.gitlab_url)
     
-    async def review_pr(self, pr_url: str, log_callback: Optional[callable] = None, extended: bool = False, extra_instructions: str = None) -> dict:
+    async def fetch_snapshot(self, pr_url: str) -> PRSnapshot:
+        """
+        Fetch the PR once through pr-agent's git provider.
+        
+        The snapshot is passed to review_pr() so the pr-agent tools do not each
+        fetch the PR again.
+        """
+        with self._settings_scope(pr_url) as settings:
+            return await asyncio.to_thread(PRSnapshot.fetch, pr_url, settings.config.git_provider)
+    
+    async def review_pr(self, pr_url: str, log_callback: Optional[callable] = None, extended: bool = False, extra_instructions: str = None, only_files: Optional[List[str]] = None, snapshot: Optional[PRSnapshot] = None, diff_filter: Optional[DiffFilter] = None, routing: Optional[ModelRouting] = None) -> dict:
         """
         Review a PR using pr-agent's PRReviewer and PRCodeSuggestions.
         
@@ -126,57 +205,208 @@ class PRAgentService:
             log_callback: Optional async function to call for logging progress
             extended: Whether to run in extended mode for more suggestions
             extra_instructions: Optional custom instructions to inject into pr-agent prompts
+            only_files: Restrict the review to these paths (incremental re-review); the
+                description is not regenerated from a partial diff
+            snapshot: PR already fetched with fetch_snapshot(), shared by all tools
+            diff_filter: Files left out before the prompts are built (default patterns
+                and heuristics if not given)
+            routing: Models per tool (model_routing() of the settings if not given)
             
         Returns:
             Dictionary with review metadata, code suggestions, and PR description
         """
+        with self._settings_scope(pr_url) as settings, metering(TokenMeter()) as meter:
+            routing = routing or self.model_routing()
+            result = await self._review_pr(settings, pr_url, log_callback, extended, extra_instructions, only_files, snapshot, diff_filter or DiffFilter(), routing)
+            result["token_usage"] = {
+                "plan": result.pop("token_plan", None),
+                "routing": routing.chains,
+                "tools": meter.tools,
+                "prompt_tokens": meter.prompt_tokens,
+                "completion_tokens": meter.completion_tokens,
+            }
+            return result
+
+    async def _review_pr(self, settings, pr_url: str, log_callback: Optional[callable], extended: bool, extra_instructions: Optional[str], only_files: Optional[List[str]], snapshot: Optional[PRSnapshot], diff_filter: DiffFilter, routing: ModelRouting) -> dict:
+        """Run the review tools inside an isolated pr-agent settings scope"""
         async def log(msg, level="info"):
             if log_callback:
                 await log_callback(msg, level)
-
-        # Configure git provider for this PR
-        self._configure_git_provider(pr_url)
         
+        if routing.chains:
+            await log(f"Model routing - {routing.describe()}")
+            # Plan chunks every routed model can take
+            max_tokens = settings.config.max_model_tokens
+            for model in routing.models:
+                context_tokens = model_context_tokens(self._provider_model(model))
+                if context_tokens:
+                    max_tokens = min(max_tokens, context_tokens)
+            settings.set("config.max_model_tokens", max_tokens)
+            settings.set("config.custom_model_max_tokens", max_tokens)
+
         # Inject custom instructions if provided
         if extra_instructions:
             await log(f"Applying custom review rules...")
-            get_settings().set("pr_code_suggestions.extra_instructions", extra_instructions)
-            get_settings().set("pr_reviewer.extra_instructions", extra_instructions)
+            settings.set("pr_code_suggestions.extra_instructions", extra_instructions)
+            settings.set("pr_reviewer.extra_instructions", extra_instructions)
         else:
-            # Clear any previous extra_instructions
-            get_settings().set("pr_code_suggestions.extra_instructions", "")
-            get_settings().set("pr_reviewer.extra_instructions", "")
+            settings.set("pr_code_suggestions.extra_instructions", "")
+            settings.set("pr_reviewer.extra_instructions", "")
         
         # Set extended mode if requested
         if extended:
             await log("Extended mode enabled - requesting more suggestions...")
-            get_settings().set("pr_code_suggestions.max_number_of_calls", 6)
+            settings.set("pr_code_suggestions.max_number_of_calls", 6)
         else:
-            get_settings().set("pr_code_suggestions.max_number_of_calls", 3)
+            settings.set("pr_code_suggestions.max_number_of_calls", 3)
+        
+        # pr-agent drops files matching ignore.regex when it fetches the diff
+        if only_files is not None:
+            await log(f"Incremental mode - reviewing {len(only_files)} changed files only")
+            ignore_regex = list(settings.get("ignore.regex", None) or [])
+            ignore_regex.append(only_files_regex(only_files))
+            settings.set("ignore.regex", ignore_regex)
+        
+        if snapshot is None:
+            # pr-agent fetches the diff itself; only the glob patterns can be applied
+            ignore_patterns, _ = diff_filter.glob_patterns()
+            settings.set("ignore.glob", list(settings.get("ignore.glob", None) or []) + ignore_patterns)
+            return await self._run_review_tools(pr_url, log, describe=only_files is None, routing=routing)
+        
+        # Load the diff once (filtered by the ignore settings above) and hand it to every tool
+        await log("Fetching PR diff...")
+        diff_files = await asyncio.to_thread(snapshot.load_diff_files)
+        await log(f"PR diff loaded: {len(diff_files)} files")
+        
+        diff_files, skipped = await asyncio.to_thread(filter_diff, diff_files, diff_filter)
+        if skipped:
+            listed = ", ".join(f"{path} ({reason})" for path, reason, _ in skipped[:10])
+            more = f" and {len(skipped) - 10} more" if len(skipped) > 10 else ""
+            size_kb = sum(size for _, _, size in skipped) / 1024
+            await log(f"Pre-filter skipped {len(skipped)} file(s), {size_kb:.1f} KB of diff: {listed}{more}")
+        if not diff_files:
+            await log("All changed files were skipped by the pre-filter - nothing to review")
+            return {"score": None, "effort": None, "security_concerns": None, "can_be_split": None,
+                    "suggestions": [], "description": None}
+        describe = only_files is None
+        with snapshot.use(settings):
+            pr_info = snapshot.pr_info
+            plan, diff_files = await asyncio.to_thread(
+                plan_review, diff_files, settings.config.model, describe,
+                f"{pr_info.title}\n{pr_info.description}", get_env_settings().review_shard_tokens
+            )
+            snapshot.diff_files = diff_files
+            await log(
+                f"Token plan: ~{plan.diff_tokens} diff tokens, {plan.max_tokens} per call; estimated "
+                f"{plan.prompt_tokens} prompt + {plan.completion_tokens} completion tokens in "
+                f"{sum(c['calls'] for c in plan.calls.values())} calls"
+            )
+            if plan.strategies:
+                await log(f"Diff compressed to fit the model: {', '.join(plan.strategies)}")
+
+            shards = plan_shards(diff_files, plan.file_tokens, plan.chunk_tokens)
+            if len(shards) > 1:
+                result = await self._run_sharded_review(pr_url, log, describe=describe, snapshot=snapshot, shards=shards, routing=routing)
+            else:
+                result = await self._run_review_tools(pr_url, log, describe=describe, routing=routing)
+            result["token_plan"] = plan.as_dict()
+            return result
+
+    async def _run_sharded_review(self, pr_url: str, log: Callable, describe: bool, snapshot: PRSnapshot, shards: List[DiffShard], routing: ModelRouting) -> dict:
+        """
+        Review a diff too large for one model call chunk by chunk, a few chunks at
+        a time, and merge the results. The description is generated once from the
+        whole PR (pr-agent's describe tool handles large diffs itself).
+        """
+        parallelism = max(1, get_env_settings().review_shard_parallelism)
+        semaphore = asyncio.Semaphore(parallelism)
+        await log(f"Large PR - reviewing the diff in {len(shards)} chunks, {parallelism} at a time...")
+
+        async def review_shard(index: int, shard: DiffShard) -> dict:
+            async def shard_log(msg, level="info"):
+                # Progress lines of every chunk would drown the log; keep problems only
+                if level != "info":
+                    await log(f"Chunk {index}/{len(shards)}: {msg}", level)
+
+            async with semaphore:
+                await log(f"Reviewing chunk {index}/{len(shards)}: {len(shard.files)} files (~{shard.tokens} tokens)")
+                with snapshot.only(shard.files):
+                    return await self._run_review_tools(pr_url, shard_log, describe=False, routing=routing)
+
+        tasks = [review_shard(index, shard) for index, shard in enumerate(shards, start=1)]
+        if describe:
+            tasks.append(self._describe_pr(pr_url, routing))
+        # Cancelling the review cancels gather, which cancels every chunk
+        outcomes = await asyncio.gather(*tasks, return_exceptions=True)
+
+        description = None
+        if describe:
+            description = outcomes.pop()
+            if isinstance(description, BaseException):
+                await log(f"Warning: PR description failed: {description}", "warning")
+                description = None
+
+        results, reviewed = [], []
+        for index, (shard, outcome) in enumerate(zip(shards, outcomes), start=1):
+            if isinstance(outcome, BaseException):
+                await log(f"Warning: Chunk {index}/{len(shards)} failed: {outcome}", "warning")
+                continue
+            results.append(outcome)
+            reviewed.append(shard)
+        if not results:
+            raise outcomes[0]
+
+        await log(f"Merging results of {len(results)} chunks...")
+        return merge_shard_results(results, reviewed, description)
+
+    async def _describe_pr(self, pr_url: str, routing: ModelRouting) -> Optional[str]:
+        with self._tool_scope("describe", routing):
+            describer = await asyncio.to_thread(
+                PRDescription, pr_url=pr_url, args=None, ai_handler=partial(MeteredLiteLLMAIHandler, tool="describe")
+            )
+            await metered_run("describe", describer.run())
+        return getattr(describer, 'prediction', None)
+
+    async def _run_review_tools(self, pr_url: str, log: Callable, describe: bool, routing: ModelRouting) -> dict:
+        """Run PRReviewer, PRCodeSuggestions and optionally PRDescription and collect their results"""
+        tasks = []
+        
+        async def start(tool: str, create: Callable):
+            # Created and started in the tool's settings scope, which the task keeps.
+            # The constructors call the git provider (languages, commits) synchronously,
+            # so they run in a thread to keep the event loop free
+            with self._tool_scope(tool, routing):
+                instance = await asyncio.to_thread(create)
+                tasks.append(asyncio.create_task(metered_run(tool, instance.run())))
+            return instance
         
         # Initialize tools
         await log("Initializing PR-Agent tools...")
         try:
-            reviewer = PRReviewer(
+            reviewer = await start("review", lambda: PRReviewer(
                 pr_url=pr_url,
                 is_answer=False,
                 is_auto=False,
                 args=None,
-                ai_handler=partial(LiteLLMAIHandler)
-            )
+                ai_handler=partial(MeteredLiteLLMAIHandler, tool="review")
+            ))
             
-            improver = PRCodeSuggestions(
+            improver = await start("improve", lambda: PRCodeSuggestions(
                 pr_url=pr_url,
                 args=None,
-                ai_handler=partial(LiteLLMAIHandler)
-            )
+                ai_handler=partial(MeteredLiteLLMAIHandler, tool="improve")
+            ))
 
-            describer = PRDescription(
-                pr_url=pr_url,
-                args=None,
-                ai_handler=partial(LiteLLMAIHandler)
-            )
+            describer = None
+            if describe:
+                describer = await start("describe", lambda: PRDescription(
+                    pr_url=pr_url,
+                    args=None,
+                    ai_handler=partial(MeteredLiteLLMAIHandler, tool="describe")
+                ))
         except Exception as e:
+            for task in tasks:
+                task.cancel()
             # Catch initialization errors (often token/permission related)
             error_str = str(e)
             if "Failed to get git provider" in error_str or "404" in error_str:
@@ -191,17 +421,19 @@ class PRAgentService:
                 raise ValueError(friendly_msg) from e
             raise e
         
-        # Run the review, improvement and description tools in parallel
-        await log("Running AI analysis (review, suggestions, and description) in parallel...")
-        review_task = asyncio.create_task(reviewer.run())
-        improve_task = asyncio.create_task(improver.run())
-        describe_task = asyncio.create_task(describer.run())
+        # The review, improvement and description tools run in parallel
+        if describer:
+            await log("Running AI analysis (review, suggestions, and description) in parallel...")
+        else:
+            await log("Running AI analysis (review and suggestions) in parallel...")
         
-        # Wait for tasks with timeout
-        done, pending = await asyncio.wait(
-            [review_task, improve_task, describe_task], 
-            timeout=600
-        )
+        # Wait for tasks with timeout; a cancelled review cancels the running LLM calls
+        try:
+            done, pending = await asyncio.wait(tasks, timeout=600)
+        except asyncio.CancelledError:
+            for task in tasks:
+                task.cancel()
+            raise
         
         if pending:
             await log("Warning: Some AI tasks timed out", "warning")
@@ -244,32 +476,115 @@ class PRAgentService:
             result["suggestions"] = self._parse_review_output(reviewer.prediction, reviewer.git_provider)
 
         # Extract PR description from describer
-        if hasattr(describer, 'prediction') and describer.prediction:
+        if describer and getattr(describer, 'prediction', None):
             result["description"] = describer.prediction
         
         return result
 
-    async def chat_with_pr(self, pr_url: str, question: str, request: Optional[object] = None) -> str:
+    async def chat_with_pr(self, pr_url: str, question: str, request: Optional[object] = None,
+                           history: Sequence = (), context_key: Optional[Hashable] = None) -> str:
         """
-        Chat with a PR using pr-agent's PRQuestions tool.
+        Answer a question about a PR, as a turn of a conversation.
         
         Args:
             pr_url: Full PR/MR URL
             question: The user's question about the PR
-            request: Optional FastAPI Request object to check for client disconnection
+            request: Optional FastAPI Request; the answer is cancelled when the client disconnects
+            history: Earlier turns (objects with role and content), oldest first
+            context_key: Key under which the rendered PR context is cached for
+                follow-up questions (None: always fetch the PR)
             
         Returns:
             AI-generated answer
         """
-        # Configure git provider for this PR
-        self._configure_git_provider(pr_url)
+        with self._settings_scope(pr_url):
+            try:
+                return await run_until_disconnected(request, self._answer(pr_url, question, history, context_key))
+            except asyncio.CancelledError:
+                logger.info("Chat execution cancelled")
+                raise
+
+    async def stream_chat_with_pr(self, pr_url: str, question: str, request: Optional[object] = None,
+                                  history: Sequence = (), context_key: Optional[Hashable] = None) -> AsyncIterator[dict]:
+        """
+        Like chat_with_pr, yielding the answer as it is generated.
+        
+        Yields events: {"event": "token", "data": {"text": ...}} for each piece of
+        the answer, "restart" when a fallback model starts over (discard the
+        partial answer), then "done" with the full answer. Stops early when the
+        client disconnects.
+        """
+        events: asyncio.Queue = asyncio.Queue()
+        ai_handler = StreamingLiteLLMAIHandler(
+            on_token=lambda text: events.put_nowait({"event": "token", "data": {"text": text}}),
+            on_restart=lambda: events.put_nowait({"event": "restart", "data": {}})
+        )
+        # The task keeps its copy of the settings context after the scope exits,
+        # so nothing is yielded while the scope is active
+        with self._settings_scope(pr_url):
+            run_task = asyncio.create_task(self._answer(pr_url, question, history, context_key, ai_handler))
         
-        # Initialize PRQuestions tool
+        # Writes only fail once a token is sent, so watch the receive channel too
+        disconnected = asyncio.create_task(wait_for_disconnect(request)) if request else None
         try:
-            chat_tool = PRQuestions(
+            while not (run_task.done() and events.empty()):
+                if not events.empty():
+                    yield events.get_nowait()
+                    continue
+                next_event = asyncio.create_task(events.get())
+                waiting = {next_event, run_task} | ({disconnected} if disconnected else set())
+                await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if next_event.done():
+                    yield next_event.result()
+                    continue
+                next_event.cancel()
+                if disconnected and disconnected.done():
+                    logger.info("Client disconnected, cancelling streamed chat")
+                    raise asyncio.CancelledError("Client disconnected")
+            
+            answer = await run_task
+        finally:
+            if disconnected:
+                disconnected.cancel()
+            if not run_task.done():
+                run_task.cancel()
+                await asyncio.wait({run_task}, timeout=0.5)
+        
+        yield {"event": "done", "data": {"answer": answer}}
+
+    async def _answer(self, pr_url: str, question: str, history: Sequence, context_key: Optional[Hashable],
+                      ai_handler: Optional[StreamingLiteLLMAIHandler] = None) -> str:
+        """Answer with the (cached) PR context, trying pr-agent's fallback models in turn"""
+        context = await self._chat_context(pr_url, context_key)
+        ai_handler = ai_handler or StreamingLiteLLMAIHandler()
+        
+        async def predict(model: str) -> str:
+            messages = build_messages(context, history, question, model)
+            answer, _ = await ai_handler.complete_messages(
+                model, messages, temperature=get_settings().config.temperature
+            )
+            return answer
+        
+        answer = await retry_with_fallback_models(predict, model_type=ModelType.TURBO)
+        return answer or "I'm sorry, I couldn't generate an answer for that question."
+
+    async def _chat_context(self, pr_url: str, context_key: Optional[Hashable]) -> PRChatContext:
+        """PR info and diff rendered for chat; fetched on the first question of a conversation"""
+        context = chat_contexts.get(context_key) if context_key is not None else None
+        if context is None:
+            chat_tool = await asyncio.to_thread(self._create_chat_tool, pr_url, "")
+            context = await asyncio.to_thread(build_chat_context, chat_tool)
+            if context_key is not None:
+                chat_contexts.put(context_key, context)
+        return context
+
+    def _create_chat_tool(self, pr_url: str, question: str, ai_handler=partial(LiteLLMAIHandler)) -> PRQuestions:
+        """Create the PRQuestions tool (fetches the PR), with a readable error for access problems"""
+        try:
+            return PRQuestions(
                 pr_url=pr_url,
                 args=[question],
-                ai_handler=partial(LiteLLMAIHandler)
+                ai_handler=ai_handler
             )
         except Exception as e:
             error_str = str(e)
@@ -279,46 +594,6 @@ class PRAgentService:
                     "Please check your GitHub Token permissions (ensure 'Contents' and 'Pull Requests' access)."
                 ) from e
             raise e
-        
-        # Run the chat tool with periodic cancellation check
-        try:
-            # Wrap the run in a task so we can check for cancellation
-            run_task = asyncio.create_task(chat_tool.run())
-            
-            # Check periodically if client disconnected
-            if request:
-                check_interval = 0.3  # Check every 300ms
-                while not run_task.done():
-                    try:
-                        # Check if client disconnected
-                        if await request.is_disconnected():
-                            logger.info("Client disconnected, cancelling chat tool")
-                            run_task.cancel()
-                            # Wait a bit for cancellation to propagate
-                            try:
-                                await asyncio.wait_for(run_task, timeout=0.5)
-                            except (asyncio.CancelledError, asyncio.TimeoutError):
-                                pass
-                            raise asyncio.CancelledError("Client disconnected")
-                        
-                        # Wait with timeout to allow periodic checks
-                        await asyncio.sleep(check_interval)
-                    except asyncio.CancelledError:
-                        # Re-raise cancellation
-                        run_task.cancel()
-                        raise
-            
-            # Wait for task completion
-            await run_task
-        except asyncio.CancelledError:
-            logger.info("Chat tool execution cancelled")
-            raise
-        
-        # Extract the answer from the tool's prediction
-        if hasattr(chat_tool, 'prediction') and chat_tool.prediction:
-            return chat_tool.prediction
-        
-        return "I'm sorry, I couldn't generate an answer for that question."
 
     def _parse_int(self, value):
         if value is None: return None
@@ -599,3 +874,18 @@ class PRAgentService:
             ))
         
         return suggestions
+
+
+@contextmanager
+def _use_settings(settings):
+    """Make pr-agent's get_settings() return `settings` in this block (and tasks started in it)"""
+    # request_cycle_context does not reset the context on exceptions,
+    # so exit it first and re-raise afterwards
+    error = None
+    with request_cycle_context({"settings": settings}):
+        try:
+            yield settings
+        except BaseException as e:
+            error = e
+    if error is not None:
+        raise error
@@ -0,0 +1,140 @@
+"""
+Conversation memory for /ask.
+
+The first question about a review fetches the PR once and renders its info and
+diff (clipped to the model's token budget by pr-agent) into a system prompt,
+kept in memory per review. Follow-up questions reuse it and send the earlier
+turns as chat history, so the PR is not fetched and tokenized again. The system
+prompt is the same byte-for-byte across turns, which is what provider prompt
+caching needs: Claude models get an explicit cache_control breakpoint,
+OpenAI/DeepSeek/Gemini cache a repeated prefix automatically.
+"""
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Hashable, Iterable, List, Optional
+
+from jinja2 import Environment, StrictUndefined
+from pr_agent.algo.pr_processing import get_pr_diff
+from pr_agent.config_loader import get_settings
+
+# Earlier turns sent with a question (user + assistant messages)
+MAX_HISTORY_MESSAGES = 20
+CONTEXT_CACHE_SIZE = 32
+CONTEXT_TTL_SECONDS = 30 * 60
+
+CHAT_INSTRUCTIONS = """
+The PR is described below. The user asks questions about it in a conversation;
+earlier questions and your answers are part of the conversation.
+"""
+
+CONTEXT_TEMPLATE = """PR Info:
+
+Title: '{{title}}'
+
+Branch: '{{branch}}'
+
+{%- if description %}
+
+Description:
+======
+{{ description|trim }}
+======
+{%- endif %}
+
+{%- if language %}
+
+Main PR language: '{{ language }}'
+{%- endif %}
+
+
+The PR Git Diff:
+======
+{{ diff|trim }}
+======
+Note that lines in the diff body are prefixed with a symbol that represents the type of change: '-' for deletions, '+' for additions, and ' ' (a space) for unchanged lines
+"""
+
+
+@dataclass
+class PRChatContext:
+    """System prompt with the PR info and diff, built once per review"""
+    system_prompt: str
+    created_at: float
+
+
+class PRChatContextCache:
+    """Small LRU of chat contexts with a TTL (the PR may get new commits)"""
+
+    def __init__(self, max_entries: int = CONTEXT_CACHE_SIZE, ttl_seconds: int = CONTEXT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[Hashable, PRChatContext]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[PRChatContext]:
+        with self._lock:
+            context = self._entries.get(key)
+            if context is None:
+                return None
+            if time.time() - context.created_at > self.ttl_seconds:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return context
+
+    def put(self, key: Hashable, context: PRChatContext):
+        with self._lock:
+            self._entries[key] = context
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard_review(self, review_id: int):
+        """Drop the contexts of a review (keys are (review_id, ...) tuples)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == review_id]:
+                del self._entries[key]
+
+
+chat_contexts = PRChatContextCache()
+
+
+def build_chat_context(chat_tool) -> PRChatContext:
+    """
+    Render the PR context from a PRQuestions tool (blocking: fetches the diff).
+
+    Call inside a pr-agent settings scope.
+    """
+    model = get_settings().config.model
+    variables = dict(chat_tool.vars)
+    variables["diff"] = get_pr_diff(chat_tool.git_provider, chat_tool.token_handler, model) or ""
+    environment = Environment(undefined=StrictUndefined)
+    system_prompt = "\n".join([
+        get_settings().pr_questions_prompt.system.strip(),
+        CHAT_INSTRUCTIONS.strip(),
+        "",
+        environment.from_string(CONTEXT_TEMPLATE).render(variables).strip(),
+    ])
+    return PRChatContext(system_prompt=system_prompt, created_at=time.time())
+
+
+def supports_cache_control(model: str) -> bool:
+    """Models that need an explicit cache_control breakpoint for prompt caching"""
+    return "claude" in model.lower()
+
+
+def build_messages(context: PRChatContext, history: Iterable, question: str, model: str) -> List[dict]:
+    """System prompt (cacheable prefix), the latest earlier turns, then the question"""
+    if supports_cache_control(model):
+        system = {"role": "system", "content": [
+            {"type": "text", "text": context.system_prompt, "cache_control": {"type": "ephemeral"}}
+        ]}
+    else:
+        system = {"role": "system", "content": context.system_prompt}
+    turns = [{"role": m.role, "content": m.content} for m in history][-MAX_HISTORY_MESSAGES:]
+    # Keep the history starting with a question, as providers expect alternating turns
+    while turns and turns[0]["role"] != "user":
+        turns.pop(0)
+    return [system, *turns, {"role": "user", "content": question}]
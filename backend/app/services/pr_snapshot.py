@@ -0,0 +1,178 @@
+"""
+One fetch of a PR shared by every pr-agent tool of a review.
+
+pr-agent's PRReviewer, PRCodeSuggestions and PRDescription each build their own
+git provider, fetching the PR, its commits and every diff file again. A
+PRSnapshot builds the provider once; while it is active, pr-agent's provider
+lookup (config.git_provider) resolves to a registered factory that hands each
+tool a shallow copy of it with the diff files already loaded. The repository
+languages and the commit messages every tool asks for are fetched once too. Inside
+PRSnapshot.only() the tools see only some of the diff files (one chunk of a
+large PR).
+"""
+import copy
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+from pr_agent.git_providers import _GIT_PROVIDERS, GithubProvider, GitLabProvider
+from pr_agent.git_providers.git_provider import GitProvider
+
+from .base_service import PRDiff, PRInfo
+
+SNAPSHOT_PROVIDER_ID = "pr_review_app_snapshot"
+
+_active_snapshot: ContextVar[Optional["PRSnapshot"]] = ContextVar("pr_review_app_snapshot", default=None)
+_active_files: ContextVar[Optional[List[str]]] = ContextVar("pr_review_app_snapshot_files", default=None)
+
+
+class PRSnapshot:
+    """A PR fetched through pr-agent's own git provider"""
+
+    def __init__(self, pr_url: str, git_provider: GitProvider):
+        self.pr_url = pr_url
+        self.git_provider = git_provider
+        self.diff_files: Optional[List[FilePatchInfo]] = None
+        self._fetched: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def fetch(cls, pr_url: str, provider_id: str) -> "PRSnapshot":
+        """
+        Fetch the PR header and commits (blocking; call inside a pr-agent settings scope).
+        """
+        if provider_id not in _GIT_PROVIDERS:
+            raise ValueError(f"Unknown git provider: {provider_id}")
+        return cls(pr_url, _GIT_PROVIDERS[provider_id](pr_url))
+
+    def load_diff_files(self) -> List[FilePatchInfo]:
+        """
+        Fetch the diff files once (blocking).
+
+        pr-agent filters them with the ignore settings active at this point.
+        """
+        with self._lock:
+            if self.diff_files is None:
+                self.diff_files = self.git_provider.get_diff_files()
+            return self.diff_files
+
+    def get_languages(self) -> dict:
+        """Languages of the repository, fetched once (blocking)"""
+        return self._fetch_once("languages", self.git_provider.get_languages)
+
+    def get_commit_messages(self) -> str:
+        """Commit messages of the PR as pr-agent formats them, fetched once (blocking)"""
+        return self._fetch_once("commit_messages", self.git_provider.get_commit_messages)
+
+    def _fetch_once(self, name: str, fetch: Callable[[], Any]) -> Any:
+        with self._lock:
+            if name not in self._fetched:
+                self._fetched[name] = fetch()
+            return self._fetched[name]
+
+    @property
+    def pr_info(self) -> PRInfo:
+        """Header fields of the PR; diffs are included once loaded"""
+        provider = self.git_provider
+        if isinstance(provider, GithubProvider):
+            pr = provider.pr
+            info = PRInfo(
+                project_name=provider.repo.split("/")[-1],
+                pr_number=pr.number,
+                title=pr.title,
+                author=pr.user.login if pr.user else 'unknown',
+                source_branch=pr.head.ref,
+                target_branch=pr.base.ref,
+                description=pr.body or '',
+                web_url=pr.html_url,
+                diffs=[],
+                head_sha=pr.head.sha
+            )
+        elif isinstance(provider, GitLabProvider):
+            mr = provider.mr
+            info = PRInfo(
+                project_name=str(provider.id_project).split("/")[-1],
+                pr_number=mr.iid,
+                title=mr.title,
+                author=mr.author.get('username', 'unknown') if mr.author else 'unknown',
+                source_branch=mr.source_branch,
+                target_branch=mr.target_branch,
+                description=mr.description or '',
+                web_url=mr.web_url,
+                diffs=[],
+                head_sha=mr.sha
+            )
+        else:
+            raise ValueError(f"Unsupported git provider: {type(provider).__name__}")
+
+        if self.diff_files is not None:
+            info.diffs = [_to_pr_diff(f) for f in self.diff_files]
+        return info
+
+    def view(self, files: Optional[Iterable[str]] = None) -> GitProvider:
+        """
+        A provider for one pr-agent tool: a shallow copy sharing the fetched PR,
+        with its own copies of the diff files (optionally only the given paths).
+        """
+        view = copy.copy(self.git_provider)
+        view.get_languages = self.get_languages
+        view.get_commit_messages = self.get_commit_messages
+        if self.diff_files is not None:
+            wanted = set(files) if files is not None else None
+            view.diff_files = [
+                copy.copy(f) for f in self.diff_files
+                if wanted is None or f.filename in wanted
+            ]
+        return view
+
+    @contextmanager
+    def use(self, settings):
+        """Make pr-agent tools created in this block use the snapshot"""
+        token = _active_snapshot.set(self)
+        previous_provider = settings.config.git_provider
+        settings.set("config.git_provider", SNAPSHOT_PROVIDER_ID)
+        try:
+            yield self
+        finally:
+            settings.set("config.git_provider", previous_provider)
+            _active_snapshot.reset(token)
+
+    @contextmanager
+    def only(self, files: Iterable[str]):
+        """
+        Make pr-agent tools created in this block (inside use()) see only the given
+        diff files. Scoped to the current task, so concurrent tasks can each
+        review a different part of the PR.
+        """
+        token = _active_files.set(list(files))
+        try:
+            yield self
+        finally:
+            _active_files.reset(token)
+
+
+def _to_pr_diff(file: FilePatchInfo) -> PRDiff:
+    return PRDiff(
+        filename=file.filename,
+        old_path=file.old_filename or file.filename,
+        new_path=file.filename,
+        diff=file.patch or "",
+        new_file=file.edit_type == EDIT_TYPE.ADDED,
+        deleted_file=file.edit_type == EDIT_TYPE.DELETED,
+        renamed_file=file.edit_type == EDIT_TYPE.RENAMED
+    )
+
+
+def _snapshot_provider(pr_url: Optional[str] = None, *args, **kwargs) -> GitProvider:
+    """Provider factory registered with pr-agent under SNAPSHOT_PROVIDER_ID"""
+    snapshot = _active_snapshot.get()
+    if snapshot is None:
+        raise ValueError("No PR snapshot is active")
+    if pr_url and pr_url.rstrip("/") != snapshot.pr_url.rstrip("/"):
+        raise ValueError(f"PR snapshot is for {snapshot.pr_url}, not {pr_url}")
+    return snapshot.view(_active_files.get())
+
+
+_GIT_PROVIDERS[SNAPSHOT_PROVIDER_ID] = _snapshot_provider
@@ -0,0 +1,218 @@
+"""
+GitHub/GitLab API rate-limit budgets, tracked from response headers.
+
+Every provider API response (ours and pr-agent's, see http_cache) updates the
+budget of its (host, token, resource). Requests made while the budget they count
+against (GitHub: core, search or graphql) is exhausted are refused at once with RateLimitExceeded instead of being sent (and failing with
+403/429) or waiting for the reset on the calling thread. The review that hit
+the limit is put back in the queue, and the queue holds back reviews of a
+provider whose budget is nearly used up until it resets, so a large batch
+pauses and resumes instead of failing halfway.
+"""
+import hashlib
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+from urllib.parse import urlparse
+
+from ..config import get_env_settings
+
+logger = logging.getLogger(__name__)
+
+# Request headers carrying the API token
+TOKEN_HEADERS = ("Authorization", "PRIVATE-TOKEN", "JOB-TOKEN")
+
+
+class RateLimitExceeded(Exception):
+    """A provider API request was refused because its rate limit is used up"""
+
+    def __init__(self, url: str, reset_at: float):
+        self.url = url
+        self.reset_at = reset_at
+        wait = max(0, int(reset_at - time.time()))
+        super().__init__(f"API rate limit of {urlparse(url).netloc} exhausted, resets in {wait}s")
+
+
+_active_hits: ContextVar[Optional[List[RateLimitExceeded]]] = ContextVar("pr_review_app_rate_limit_hits", default=None)
+
+
+@contextmanager
+def watch_rate_limits() -> Iterator[List[RateLimitExceeded]]:
+    """
+    Collect the rate limits hit by provider requests made in this block (and
+    its tasks and threads), including the ones a caller caught and ignored.
+    """
+    hits: List[RateLimitExceeded] = []
+    token = _active_hits.set(hits)
+    try:
+        yield hits
+    finally:
+        _active_hits.reset(token)
+
+
+def rate_limit_hits() -> List[RateLimitExceeded]:
+    """Hits collected so far by the active watch_rate_limits() block"""
+    return list(_active_hits.get() or [])
+
+
+def report_rate_limit(error: RateLimitExceeded) -> RateLimitExceeded:
+    """Add a hit to the active watch_rate_limits() block"""
+    hits = _active_hits.get()
+    if hits is not None:
+        hits.append(error)
+    return error
+
+
+@dataclass
+class RateBudget:
+    """Remaining requests of one (host, token, resource) until reset_at (epoch seconds)"""
+    provider: str
+    host: str
+    resource: str
+    limit: Optional[int]
+    remaining: int
+    reset_at: float
+    updated_at: float
+
+    def exhausted(self, reserve: int = 0, now: Optional[float] = None) -> bool:
+        now = time.time() if now is None else now
+        return self.remaining <= reserve and self.reset_at > now
+
+
+class RateLimitTracker:
+    """Thread-safe budgets keyed by (host, token hash, resource)"""
+
+    def __init__(self, reserve: int):
+        self.reserve = reserve
+        self._budgets: Dict[Tuple[str, str, str], RateBudget] = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def token_id(headers: Mapping[str, str]) -> str:
+        token = next((headers[name] for name in TOKEN_HEADERS if headers.get(name)), "")
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def record(self, url: str, request_headers: Mapping[str, str], status_code: int, headers: Mapping[str, str]):
+        """Update the budget of the request's host and token from a response"""
+        parsed = _parse_headers(status_code, headers)
+        if parsed is None:
+            return
+        provider, resource, limit, remaining, reset_at = parsed
+        host = urlparse(url).netloc
+        key = (host, self.token_id(request_headers), resource)
+        budget = RateBudget(
+            provider=provider, host=host, resource=resource, limit=limit,
+            remaining=remaining, reset_at=reset_at, updated_at=time.time()
+        )
+        with self._lock:
+            previous = self._budgets.get(key)
+            self._budgets[key] = budget
+        if budget.exhausted(self.reserve) and (previous is None or not previous.exhausted(self.reserve)):
+            logger.warning(
+                f"[RATE LIMIT] {host} ({resource}) has {remaining} requests left, "
+                f"resets in {int(reset_at - time.time())}s"
+            )
+
+    def wait_time(self, url: str, request_headers: Mapping[str, str]) -> float:
+        """Seconds until the exhausted budget of a request resets (0 if it can go)"""
+        host = urlparse(url).netloc
+        token_id = self.token_id(request_headers)
+        resource = request_resource(url)
+        now = time.time()
+        with self._lock:
+            # GitHub budgets are per resource; GitLab has one budget for every request
+            resets = [
+                budget.reset_at - now for (h, t, r), budget in self._budgets.items()
+                if h == host and t == token_id and (r == resource or budget.provider == "gitlab")
+                and budget.exhausted(now=now)
+            ]
+        return max(resets, default=0.0)
+
+    def blocked_providers(self, resource: str = "core") -> Dict[str, float]:
+        """
+        Providers with a budget of the resource below the reserve, mapped to the
+        latest reset time (reviews only use the REST API, i.e. "core")
+        """
+        now = time.time()
+        blocked: Dict[str, float] = {}
+        with self._lock:
+            for budget in self._budgets.values():
+                if budget.resource == resource and budget.exhausted(self.reserve, now):
+                    blocked[budget.provider] = max(blocked.get(budget.provider, 0.0), budget.reset_at)
+        return blocked
+
+    def snapshot(self) -> List[dict]:
+        """Current budgets for diagnostics (tokens are identified by a short hash)"""
+        with self._lock:
+            items = list(self._budgets.items())
+        return [
+            {
+                "provider": budget.provider,
+                "host": budget.host,
+                "token": token_id[:8],
+                "resource": budget.resource,
+                "limit": budget.limit,
+                "remaining": budget.remaining,
+                "reset_at": datetime.fromtimestamp(budget.reset_at, tz=timezone.utc).isoformat(),
+                "exhausted": budget.exhausted(self.reserve),
+            }
+            for (_, token_id, _), budget in sorted(items, key=lambda item: item[0])
+        ]
+
+
+def request_resource(url: str) -> str:
+    """Rate-limit resource a request counts against (GitHub's X-RateLimit-Resource names)"""
+    path = urlparse(url).path
+    if "/search/" in path:
+        return "search"
+    if path.rstrip("/").endswith("/graphql"):
+        return "graphql"
+    return "core"
+
+
+def _parse_headers(status_code: int, headers: Mapping[str, str]) -> Optional[Tuple[str, str, Optional[int], int, float]]:
+    """(provider, resource, limit, remaining, reset_at) from GitHub X-RateLimit-* or GitLab RateLimit-* headers"""
+    if headers.get("X-RateLimit-Remaining") is not None:
+        provider, prefix = "github", "X-RateLimit-"
+    elif headers.get("RateLimit-Remaining") is not None:
+        provider, prefix = "gitlab", "RateLimit-"
+    else:
+        return None
+    try:
+        remaining = int(headers[f"{prefix}Remaining"])
+        limit = int(headers[f"{prefix}Limit"]) if headers.get(f"{prefix}Limit") else None
+        reset_at = float(headers[f"{prefix}Reset"]) if headers.get(f"{prefix}Reset") else time.time() + 60
+    except ValueError:
+        return None
+
+    # Secondary limits (403/429 with Retry-After) are not reflected in Remaining
+    retry_after = headers.get("Retry-After")
+    if status_code in (403, 429) and retry_after and retry_after.isdigit():
+        remaining = 0
+        reset_at = max(reset_at, time.time() + int(retry_after))
+
+    resource = headers.get("X-RateLimit-Resource", "core")
+    return provider, resource, limit, remaining, reset_at
+
+
+def is_rate_limited(status_code: int, headers: Mapping[str, str]) -> bool:
+    """Whether a response was rejected because of a rate limit"""
+    if status_code == 429:
+        return True
+    if status_code != 403:
+        return False
+    return headers.get("X-RateLimit-Remaining") == "0" or headers.get("RateLimit-Remaining") == "0" \
+        or bool(headers.get("Retry-After"))
+
+
+def _create_rate_limit_tracker() -> RateLimitTracker:
+    env_settings = get_env_settings()
+    return RateLimitTracker(reserve=env_settings.rate_limit_reserve)
+
+
+rate_limits = _create_rate_limit_tracker()
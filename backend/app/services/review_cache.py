@@ -0,0 +1,141 @@
+"""
+Persistent cache of pr-agent review results.
+
+A review of the same PR at the same head commit, with the same model, rule set
+instructions and mode, produces an equivalent result, so it is stored once and
+reused instead of running the LLM pipeline again.
+"""
+import dataclasses
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+from urllib.parse import urlparse
+
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_env_settings
+from ..models import ReviewCacheEntry
+from .base_service import PRInfo
+from .llm_service import CodeSuggestion
+
+logger = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass
+class ReviewCacheKey:
+    """Everything a review result depends on"""
+    provider: str
+    repository: str
+    pr_number: int
+    head_sha: str
+    model: str
+    instructions_hash: Optional[str]
+    extended: bool
+
+    @classmethod
+    def for_review(cls, provider: str, pr_url: str, pr_info: PRInfo, model: str,
+                   extra_instructions: Optional[str], extended: bool,
+                   diff_filter_key: Optional[str] = None) -> Optional["ReviewCacheKey"]:
+        """Build the key of a review, or None when the head commit is unknown"""
+        if not pr_info.head_sha:
+            return None
+        # Repository path from the URL: project_name alone is not unique across owners/hosts
+        parsed = urlparse(pr_url)
+        marker = "/-/merge_requests/" if "/-/merge_requests/" in parsed.path else "/pull/"
+        repository = f"{parsed.netloc.lower()}{parsed.path.split(marker)[0]}"
+        # Everything that shapes the prompts besides the diff: rules and a non-default pre-filter
+        shaping = "\n".join(filter(None, [
+            extra_instructions.strip() if extra_instructions else None,
+            f"diff_filter={diff_filter_key}" if diff_filter_key else None,
+        ]))
+        instructions_hash = hashlib.sha256(shaping.encode()).hexdigest() if shaping else None
+        return cls(
+            provider=provider,
+            repository=repository,
+            pr_number=pr_info.pr_number,
+            head_sha=pr_info.head_sha,
+            model=model,
+            instructions_hash=instructions_hash,
+            extended=bool(extended),
+        )
+
+    @property
+    def digest(self) -> str:
+        raw = "|".join(str(v) for v in dataclasses.astuple(self))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+
+def _cache_enabled() -> bool:
+    env_settings = get_env_settings()
+    return env_settings.review_cache_ttl_hours > 0 and env_settings.review_cache_max_entries > 0
+
+
+def _serialize_result(result: dict) -> dict:
+    stored = {k: v for k, v in result.items() if k != "suggestions"}
+    stored["suggestions"] = [dataclasses.asdict(s) for s in result.get("suggestions", [])]
+    return stored
+
+
+def _deserialize_result(stored: dict) -> dict:
+    result = dict(stored)
+    result["suggestions"] = [CodeSuggestion(**s) for s in stored.get("suggestions", [])]
+    return result
+
+
+async def get_cached_review(db: AsyncSession, key: ReviewCacheKey) -> Optional[dict]:
+    """Return the stored review result for the key, or None on a miss or expired entry"""
+    if not _cache_enabled():
+        return None
+
+    entry = await db.scalar(select(ReviewCacheEntry).where(ReviewCacheEntry.cache_key == key.digest))
+    if not entry:
+        return None
+
+    ttl = timedelta(hours=get_env_settings().review_cache_ttl_hours)
+    if entry.created_at and entry.created_at < datetime.utcnow() - ttl:
+        await db.delete(entry)
+        return None
+
+    entry.hit_count = (entry.hit_count or 0) + 1
+    entry.last_used_at = datetime.utcnow()
+    result = _deserialize_result(entry.result)
+    result["cached_at"] = entry.created_at
+    return result
+
+
+async def store_review(db: AsyncSession, key: ReviewCacheKey, result: dict) -> None:
+    """Store a review result under the key and evict expired / least recently used entries"""
+    if not _cache_enabled():
+        return
+
+    # Nothing worth reusing (e.g. every pr-agent tool timed out)
+    if not result.get("suggestions") and result.get("score") is None and not result.get("description"):
+        return
+
+    digest = key.digest
+    entry = await db.scalar(select(ReviewCacheEntry).where(ReviewCacheEntry.cache_key == digest))
+    if entry is None:
+        entry = ReviewCacheEntry(cache_key=digest, **dataclasses.asdict(key))
+        db.add(entry)
+    entry.result = _serialize_result(result)
+    entry.created_at = entry.last_used_at = datetime.utcnow()
+
+    await db.flush()
+    await _evict(db)
+
+
+async def _evict(db: AsyncSession) -> None:
+    env_settings = get_env_settings()
+    cutoff = datetime.utcnow() - timedelta(hours=env_settings.review_cache_ttl_hours)
+    await db.execute(delete(ReviewCacheEntry).where(ReviewCacheEntry.created_at < cutoff))
+
+    stale_ids = (await db.scalars(
+        select(ReviewCacheEntry.id)
+        .order_by(ReviewCacheEntry.last_used_at.desc(), ReviewCacheEntry.id.desc())
+        .offset(env_settings.review_cache_max_entries)
+    )).all()
+    if stale_ids:
+        await db.execute(delete(ReviewCacheEntry).where(ReviewCacheEntry.id.in_(stale_ids)))
+        logger.info(f"[REVIEW CACHE] Evicted {len(stale_ids)} least recently used entries")
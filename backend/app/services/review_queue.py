@@ -0,0 +1,183 @@
+"""
+Persistent review job queue backed by the pr_reviews table.
+
+Reviews in the PENDING state are the queue. A single dispatcher hands them to a
+bounded pool of workers in priority order, with an additional concurrency limit
+per provider, so a burst of submissions is worked through steadily instead of
+launching every pr-agent run at once. Reviews of a provider whose API rate
+limit is nearly used up are held back (other providers' reviews go first) until
+the limit resets.
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..config import get_env_settings
+from ..database import AsyncSessionLocal
+from ..models import PRReview, ReviewStatus
+from .cancellation import cancellations, review_key
+from .rate_limits import rate_limits
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[int], Awaitable[None]]
+
+
+class ReviewQueue:
+    """Dispatches pending reviews to a bounded pool of async workers"""
+
+    def __init__(self, workers: int, provider_limits: Dict[str, int], poll_interval: float = 5.0):
+        self.workers = max(1, workers)
+        self.provider_limits = provider_limits
+        self.poll_interval = poll_interval
+        self._handler: Optional[JobHandler] = None
+        self._running: Dict[int, asyncio.Task] = {}
+        self._running_by_provider: Dict[str, int] = {}
+        self._held_providers: Dict[str, float] = {}  # provider -> rate limit reset time
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    async def start(self, handler: JobHandler):
+        """Requeue interrupted reviews and start dispatching"""
+        self._handler = handler
+        self._wakeup = asyncio.Event()
+        await self._requeue_interrupted()
+        self._dispatcher = asyncio.create_task(self._dispatch_loop())
+        self.notify()
+        logger.info(f"Review queue started with {self.workers} workers, provider limits {self.provider_limits}")
+
+    async def stop(self):
+        """Stop dispatching and cancel running jobs (they are requeued on next start)"""
+        tasks = list(self._running.values())
+        if self._dispatcher:
+            tasks.append(self._dispatcher)
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._dispatcher = None
+
+    def notify(self):
+        """Wake the dispatcher after new jobs were queued or a slot was freed"""
+        if self._wakeup:
+            self._wakeup.set()
+
+    def is_running(self, review_id: int) -> bool:
+        return review_id in self._running
+
+    async def queue_positions(self, db: AsyncSession) -> Dict[int, int]:
+        """Map each waiting review id to its 1-based position in the queue"""
+        positions = {}
+        for review_id, _ in await self._pending_jobs(db):
+            if review_id not in self._running:
+                positions[review_id] = len(positions) + 1
+        return positions
+
+    async def _dispatch_loop(self):
+        while True:
+            # Not wait_for: before Python 3.12 it swallows a cancellation that
+            # arrives as the event is set, and stop() then waits forever
+            wakeup = asyncio.ensure_future(self._wakeup.wait())
+            try:
+                await asyncio.wait({wakeup}, timeout=self.poll_interval)
+            finally:
+                wakeup.cancel()
+            self._wakeup.clear()
+            try:
+                await self._fill_slots()
+            except Exception as e:
+                logger.error(f"[QUEUE] Dispatch failed: {e}", exc_info=True)
+
+    async def _fill_slots(self):
+        if len(self._running) >= self.workers:
+            return
+
+        async with AsyncSessionLocal() as db:
+            pending = await self._pending_jobs(db)
+        held = self._update_held_providers()
+        for review_id, provider in pending:
+            if len(self._running) >= self.workers:
+                break
+            if review_id in self._running:
+                continue
+            limit = self.provider_limits.get(provider)
+            if limit and self._running_by_provider.get(provider, 0) >= limit:
+                continue
+            if provider in held:
+                continue
+            self._launch(review_id, provider)
+
+    def _update_held_providers(self) -> Dict[str, float]:
+        """Providers whose rate limit is nearly exhausted; logs when a hold starts or ends"""
+        held = rate_limits.blocked_providers()
+        for provider, reset_at in held.items():
+            if provider not in self._held_providers:
+                wait = max(0, int(reset_at - time.time()))
+                logger.warning(f"[QUEUE] Holding {provider} reviews for ~{wait}s until the API rate limit resets")
+        for provider in self._held_providers.keys() - held.keys():
+            logger.info(f"[QUEUE] Resuming {provider} reviews")
+        self._held_providers = held
+        return held
+
+    def _launch(self, review_id: int, provider: str):
+        logger.info(f"[QUEUE] Starting review_id={review_id} ({provider})")
+        self._running_by_provider[provider] = self._running_by_provider.get(provider, 0) + 1
+        self._running[review_id] = asyncio.create_task(self._run_job(review_id, provider))
+
+    async def _run_job(self, review_id: int, provider: str):
+        try:
+            with cancellations.track(review_key(review_id)):
+                await self._handler(review_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"[QUEUE] Job for review_id={review_id} failed: {e}", exc_info=True)
+        finally:
+            self._running.pop(review_id, None)
+            self._running_by_provider[provider] = max(0, self._running_by_provider.get(provider, 1) - 1)
+            self.notify()
+
+    async def _pending_jobs(self, db: AsyncSession) -> List[Tuple[int, str]]:
+        result = await db.execute(
+            select(PRReview.id, PRReview.provider)
+            .where(PRReview.status == ReviewStatus.PENDING.value)
+            .order_by(
+                func.coalesce(PRReview.priority, 0).desc(),
+                func.coalesce(PRReview.queued_at, PRReview.created_at).asc(),
+                PRReview.id.asc()
+            )
+        )
+        return [(row.id, row.provider) for row in result]
+
+    async def _requeue_interrupted(self):
+        """Reviews left in 'reviewing' by a previous process are put back in the queue"""
+        async with AsyncSessionLocal() as db:
+            interrupted = (await db.scalars(
+                select(PRReview).where(PRReview.status == ReviewStatus.REVIEWING.value)
+            )).all()
+            for review in interrupted:
+                review.status = ReviewStatus.PENDING.value
+                review.current_stage = None
+                review.queued_at = review.queued_at or datetime.utcnow()
+                review.add_log("Review was interrupted by an application restart - requeued", "warning")
+            if interrupted:
+                await db.commit()
+                logger.info(f"[QUEUE] Requeued {len(interrupted)} interrupted reviews")
+
+
+def _create_review_queue() -> ReviewQueue:
+    env_settings = get_env_settings()
+    return ReviewQueue(
+        workers=env_settings.review_workers,
+        provider_limits={
+            "github": env_settings.review_github_concurrency,
+            "gitlab": env_settings.review_gitlab_concurrency,
+        },
+    )
+
+
+review_queue = _create_review_queue()
@@ -0,0 +1,100 @@
+"""
+LiteLLM handler that streams the completion token by token.
+
+pr-agent's LiteLLMAIHandler waits for the whole completion. For /ask the answer
+is forwarded to the browser as it is generated, so this handler requests a
+streamed completion and reports every text delta to a callback while still
+returning the full text to the pr-agent tool.
+"""
+from typing import Callable, List, Optional, Tuple
+
+import openai
+from litellm import acompletion
+from pr_agent.config_loader import get_settings
+from pr_agent.log import get_logger
+
+from .endpoint_pool import BalancedLiteLLMAIHandler, endpoint_pool
+
+
+class StreamingLiteLLMAIHandler(BalancedLiteLLMAIHandler):
+    """
+    Args:
+        on_token: Called with each text delta as it arrives (optional)
+        on_restart: Called when a new completion starts after tokens were
+            already streamed (pr-agent retrying with a fallback model), so the
+            consumer can discard the partial answer
+    """
+
+    def __init__(self, on_token: Optional[Callable[[str], None]] = None, on_restart: Optional[Callable[[], None]] = None):
+        super().__init__()
+        self.on_token = on_token
+        self.on_restart = on_restart
+        self._streamed = False
+
+    async def chat_completion(self, model: str, system: str, user: str, temperature: float = 0.2, img_path: str = None):
+        if img_path:
+            # Image questions need the link check of the regular handler
+            resp, finish_reason = await super().chat_completion(model, system, user, temperature, img_path)
+            self._emit(resp)
+            return resp, finish_reason
+
+        if 'claude' in model and not system:
+            system = "\n"
+        messages = [{"role": "system", "content": system}, {"role": "user", "content": user}]
+        return await self.complete_messages(model, messages, temperature)
+
+    async def complete_messages(self, model: str, messages: List[dict], temperature: float = 0.2) -> Tuple[str, Optional[str]]:
+        """Stream a completion of a full message list (system prompt, earlier turns, question)"""
+        if not endpoint_pool.active:
+            return await self._stream_completion(model, messages, temperature)
+
+        async def attempt(api_base: str):
+            self.api_base = api_base
+            return await self._stream_completion(model, messages, temperature)
+
+        return await endpoint_pool.call(attempt)
+
+    async def _stream_completion(self, model: str, messages: List[dict], temperature: float) -> Tuple[str, Optional[str]]:
+        if self.azure:
+            model = 'azure/' + model
+        kwargs = {
+            "model": model,
+            "deployment_id": self.deployment_id,
+            "messages": messages,
+            "temperature": temperature,
+            "timeout": get_settings().config.ai_timeout,
+            "api_base": self.api_base,
+            "stream": True,
+        }
+        if self.repetition_penalty:
+            kwargs["repetition_penalty"] = self.repetition_penalty
+
+        if self._streamed and self.on_restart:
+            self.on_restart()
+        parts, finish_reason = [], None
+        try:
+            response = await acompletion(**kwargs)
+            async for chunk in response:
+                if not chunk.choices:
+                    continue
+                choice = chunk.choices[0]
+                text = getattr(choice.delta, "content", None)
+                if text:
+                    parts.append(text)
+                    self._emit(text)
+                finish_reason = choice.finish_reason or finish_reason
+        except (openai.APIError, openai.APITimeoutError, openai.RateLimitError) as e:
+            get_logger().warning("Error during streamed inference: ", e)
+            raise
+        except Exception as e:
+            get_logger().warning("Unknown error during streamed inference: ", e)
+            raise openai.APIError(str(e), request=None, body=None) from e
+
+        if not parts:
+            raise openai.APIError("Empty streamed completion", request=None, body=None)
+        return "".join(parts), finish_reason
+
+    def _emit(self, text: str):
+        if text and self.on_token:
+            self._streamed = True
+            self.on_token(text)
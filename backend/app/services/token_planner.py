@@ -0,0 +1,315 @@
+"""
+Pre-flight token planning and accounting of reviews.
+
+Before the pr-agent tools run, the loaded diff is tokenized with pr-agent's
+tiktoken encoder and the model calls of the review are estimated: how many
+calls each tool makes and how many prompt and completion tokens they take.
+When the diff does not fit one call, compression strategies are applied,
+least lossy first, until it does (or all are used and the diff is reviewed in
+chunks, see diff_sharding):
+
+- drop_deleted_files: deleted files are not reviewed
+- summarize_lockfiles: lockfile changes become a one-line summary
+- strip_context: no extra context lines around the hunks
+
+During the review MeteredLiteLLMAIHandler counts the tokens actually sent and
+received per tool (tokenizing the exact prompts and answers, as pr-agent's
+handler does not return the provider's usage), so the plan can be compared
+with the real usage. The meter also keeps the latency of the calls and the
+models that answered them, to tune the model routing (see model_routing).
+"""
+import copy
+import math
+import posixpath
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Awaitable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+import litellm
+from pr_agent.algo import MAX_TOKENS
+from pr_agent.algo.pr_processing import OUTPUT_BUFFER_TOKENS_SOFT_THRESHOLD
+from pr_agent.algo.token_handler import TokenEncoder
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+from pr_agent.algo.utils import get_max_tokens
+from pr_agent.config_loader import get_settings
+
+from .endpoint_pool import BalancedLiteLLMAIHandler
+
+T = TypeVar("T")
+
+LOCKFILE_NAMES = {
+    "package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml", "bun.lockb",
+    "poetry.lock", "Pipfile.lock", "uv.lock", "pdm.lock", "Cargo.lock", "go.sum",
+    "Gemfile.lock", "composer.lock", "mix.lock", "pubspec.lock", "Podfile.lock", "packages.lock.json",
+}
+
+STRATEGIES = ("drop_deleted_files", "summarize_lockfiles", "strip_context")
+
+# Typical completion size of one call per tool
+COMPLETION_TOKENS = {"review": 1500, "improve": 2000, "describe": 1000}
+REFLECT_COMPLETION_TOKENS = 1000
+
+# pr-agent extends every hunk with extra context lines (patch_extra_lines_*)
+CONTEXT_OVERHEAD_RATIO = 1.25
+
+_PROMPTS = {
+    "review": "pr_review_prompt",
+    "improve": "pr_code_suggestions_prompt",
+    "describe": "pr_description_prompt",
+}
+
+
+def model_context_tokens(model: str) -> Optional[int]:
+    """Context window of a model known to pr-agent or litellm (no network lookups)"""
+    if model in MAX_TOKENS:
+        return MAX_TOKENS[model]
+    info = litellm.model_cost.get(model) or litellm.model_cost.get(model.split("/", 1)[-1]) or {}
+    return info.get("max_input_tokens") or info.get("max_tokens")
+
+
+def count_tokens(text: str) -> int:
+    """Tokens of `text` with pr-agent's encoder for the configured model"""
+    return len(TokenEncoder.get_token_encoder().encode(text or "", disallowed_special=()))
+
+
+def is_lockfile(filename: str) -> bool:
+    return posixpath.basename(filename) in LOCKFILE_NAMES
+
+
+@dataclass
+class TokenPlan:
+    """Estimated model calls and tokens of one review"""
+    max_tokens: int  # Per call, after the model and user limits
+    diff_tokens: int  # Raw patch tokens after compression
+    chunk_tokens: int  # Patch tokens that fit one call
+    chunks: int
+    strategies: List[str] = field(default_factory=list)
+    calls: Dict[str, dict] = field(default_factory=dict)  # tool -> {calls, prompt_tokens, completion_tokens}
+    file_tokens: Dict[str, int] = field(default_factory=dict)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(c["prompt_tokens"] for c in self.calls.values())
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(c["completion_tokens"] for c in self.calls.values())
+
+    @property
+    def total_tokens(self) -> int:
+        return self.prompt_tokens + self.completion_tokens
+
+    def as_dict(self) -> dict:
+        return {
+            "max_tokens": self.max_tokens,
+            "diff_tokens": self.diff_tokens,
+            "chunk_tokens": self.chunk_tokens,
+            "chunks": self.chunks,
+            "strategies": self.strategies,
+            "calls": self.calls,
+            "prompt_tokens": self.prompt_tokens,
+            "completion_tokens": self.completion_tokens,
+        }
+
+
+def compress_diff(diff_files: Sequence[FilePatchInfo], strategy: str) -> List[FilePatchInfo]:
+    """Apply one file-level strategy (copies; the given files are not changed)"""
+    compressed = []
+    for diff_file in diff_files:
+        if strategy == "drop_deleted_files" and diff_file.edit_type == EDIT_TYPE.DELETED:
+            continue
+        if strategy == "summarize_lockfiles" and is_lockfile(diff_file.filename) and diff_file.patch:
+            lines = diff_file.patch.splitlines()
+            added = sum(1 for line in lines if line.startswith("+"))
+            removed = sum(1 for line in lines if line.startswith("-"))
+            diff_file = copy.copy(diff_file)
+            diff_file.patch = (
+                f"@@ -1,0 +1,1 @@\n"
+                f"+# Lockfile updated: {added} lines added, {removed} removed (contents omitted)"
+            )
+        compressed.append(diff_file)
+    return compressed
+
+
+def _prompt_overhead(tool: str, pr_text: str) -> int:
+    """Tokens of a tool's prompt templates plus the PR title and description"""
+    prompt = get_settings().get(_PROMPTS[tool], None)
+    if prompt is None:
+        return count_tokens(pr_text)
+    return count_tokens(f"{prompt.system}\n{prompt.user}\n{pr_text}")
+
+
+def plan_review(diff_files: Sequence[FilePatchInfo], model: str, describe: bool, pr_text: str = "",
+                chunk_tokens: int = 0) -> Tuple[TokenPlan, List[FilePatchInfo]]:
+    """
+    Estimate the review of `diff_files` and compress them until they fit one call
+    (blocking: tokenizes every patch; call inside a pr-agent settings scope).
+
+    Returns the plan and the diff files to review. strip_context, when chosen,
+    is applied to the active settings. chunk_tokens overrides the patch tokens
+    per call derived from the model limit.
+    """
+    settings = get_settings()
+    max_tokens = get_max_tokens(model)
+    tools = ["review", "improve"]
+    if describe:
+        tools.append("describe")
+    overheads = {tool: _prompt_overhead(tool, pr_text) for tool in tools}
+    available = max(1000, max_tokens - OUTPUT_BUFFER_TOKENS_SOFT_THRESHOLD - max(overheads.values()))
+
+    files = list(diff_files)
+    file_tokens = {f.filename: count_tokens(f.patch) for f in files}
+    strategies = []
+    context_ratio = CONTEXT_OVERHEAD_RATIO
+
+    def diff_tokens() -> int:
+        return sum(file_tokens[f.filename] for f in files)
+
+    for strategy in STRATEGIES:
+        if diff_tokens() * context_ratio <= available:
+            break
+        if strategy == "strip_context":
+            settings.set("config.patch_extra_lines_before", 0)
+            settings.set("config.patch_extra_lines_after", 0)
+            settings.set("config.allow_dynamic_context", False)
+            context_ratio = 1.0
+        else:
+            before = diff_tokens()
+            files = compress_diff(files, strategy)
+            if strategy == "summarize_lockfiles":
+                file_tokens.update({f.filename: count_tokens(f.patch) for f in files if is_lockfile(f.filename)})
+            if diff_tokens() == before:
+                continue  # Nothing to compress this way
+        strategies.append(strategy)
+
+    total = diff_tokens()
+    chunk = chunk_tokens if chunk_tokens > 0 else int(available / context_ratio)
+    chunks = max(1, math.ceil(total / chunk))
+    sent_diff = int(total * context_ratio)
+
+    calls = {}
+    for tool in tools:
+        if tool == "describe":
+            # pr-agent's large PR mode describes at most max_ai_calls parts of the diff
+            tool_calls = min(chunks, settings.pr_description.get("max_ai_calls", 4))
+            diff_sent = min(sent_diff, available * tool_calls)
+        else:
+            tool_calls = chunks
+            diff_sent = sent_diff
+        calls[tool] = {
+            "calls": tool_calls,
+            "prompt_tokens": overheads[tool] * tool_calls + diff_sent,
+            "completion_tokens": COMPLETION_TOKENS[tool] * tool_calls,
+        }
+    if settings.pr_code_suggestions.get("self_reflect_on_suggestions", False):
+        # Every suggestions call is followed by a self-reflection call over the same diff
+        calls["improve"]["calls"] += chunks
+        calls["improve"]["prompt_tokens"] += sent_diff + REFLECT_COMPLETION_TOKENS * chunks
+        calls["improve"]["completion_tokens"] += REFLECT_COMPLETION_TOKENS * chunks
+
+    plan = TokenPlan(
+        max_tokens=max_tokens,
+        diff_tokens=total,
+        chunk_tokens=chunk,
+        chunks=chunks,
+        strategies=strategies,
+        calls=calls,
+        file_tokens={f.filename: file_tokens[f.filename] for f in files},
+    )
+    return plan, files
+
+
+class TokenMeter:
+    """
+    Model calls of one review per tool: tokens sent and received, time spent
+    waiting for the model (latency_ms, summed over calls), calls per model,
+    failed calls, and the wall time of the tool runs (duration_ms).
+    """
+
+    def __init__(self):
+        self.tools: Dict[str, dict] = {}
+
+    def _usage(self, tool: str) -> dict:
+        return self.tools.setdefault(tool, {
+            "calls": 0, "prompt_tokens": 0, "completion_tokens": 0,
+            "latency_ms": 0, "failures": 0, "duration_ms": 0, "models": {},
+        })
+
+    def record(self, tool: str, prompt_tokens: int, completion_tokens: int,
+               model: Optional[str] = None, elapsed: float = 0.0):
+        usage = self._usage(tool)
+        usage["calls"] += 1
+        usage["prompt_tokens"] += prompt_tokens
+        usage["completion_tokens"] += completion_tokens
+        usage["latency_ms"] += round(elapsed * 1000)
+        if model:
+            usage["models"][model] = usage["models"].get(model, 0) + 1
+
+    def record_failure(self, tool: str):
+        self._usage(tool)["failures"] += 1
+
+    def record_run(self, tool: str, elapsed: float):
+        self._usage(tool)["duration_ms"] += round(elapsed * 1000)
+
+    @property
+    def prompt_tokens(self) -> int:
+        return sum(u["prompt_tokens"] for u in self.tools.values())
+
+    @property
+    def completion_tokens(self) -> int:
+        return sum(u["completion_tokens"] for u in self.tools.values())
+
+
+_active_meter: ContextVar[Optional[TokenMeter]] = ContextVar("pr_review_app_token_meter", default=None)
+
+
+@contextmanager
+def metering(meter: TokenMeter):
+    """Count the tokens of MeteredLiteLLMAIHandler calls made in this block (and its tasks)"""
+    token = _active_meter.set(meter)
+    try:
+        yield meter
+    finally:
+        _active_meter.reset(token)
+
+
+async def metered_run(tool: str, run: Awaitable[T]) -> T:
+    """Await a tool run, adding its wall time to the active TokenMeter"""
+    started = time.monotonic()
+    try:
+        return await run
+    finally:
+        meter = _active_meter.get()
+        if meter is not None:
+            meter.record_run(tool, time.monotonic() - started)
+
+
+class MeteredLiteLLMAIHandler(BalancedLiteLLMAIHandler):
+    """
+    LiteLLM handler that counts the prompt and completion tokens, latency and
+    model of every call into the active TokenMeter.
+
+    Args:
+        tool: Name the calls are counted under (review, improve, describe, ...)
+    """
+
+    def __init__(self, tool: str = "other"):
+        super().__init__()
+        self.tool = tool
+
+    async def chat_completion(self, model: str, system: str, user: str, temperature: float = 0.2, img_path: str = None):
+        meter = _active_meter.get()
+        started = time.monotonic()
+        try:
+            resp, finish_reason = await super().chat_completion(model, system, user, temperature, img_path)
+        except Exception:
+            # pr-agent moves on to the next model of the chain
+            if meter is not None:
+                meter.record_failure(self.tool)
+            raise
+        if meter is not None:
+            meter.record(self.tool, count_tokens(f"{system}\n{user}"), count_tokens(resp),
+                         model=model, elapsed=time.monotonic() - started)
+        return resp, finish_reason
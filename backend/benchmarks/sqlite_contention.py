@@ -0,0 +1,138 @@
+"""
+Reader latency while several reviews write progress concurrently.
+
+Simulates N reviews appending log lines and committing (like process_review)
+while a reader repeatedly runs the history list query, once with SQLite's
+default journaling and once with the profile from EnvSettings.
+
+Usage (from backend/):
+    python -m benchmarks.sqlite_contention [--writers 4] [--seconds 10]
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from app.config import EnvSettings
+from app.database import Base, create_db_engine
+from app.models import PRReview, ReviewStatus
+
+PROFILES = {
+    # SQLite defaults: rollback journal, fsync on every commit
+    "default": EnvSettings(
+        sqlite_journal_mode="delete",
+        sqlite_synchronous="full",
+        sqlite_busy_timeout_ms=5000,
+        sqlite_cache_size_kib=2000,
+        sqlite_mmap_size_mb=0,
+        sqlite_temp_store="default",
+    ),
+    "tuned": EnvSettings(),
+}
+
+
+def _writer(Session, review_id: int, stop: threading.Event, stats: dict):
+    db = Session()
+    try:
+        review = db.get(PRReview, review_id)
+        while not stop.is_set():
+            review.add_log(f"Processing chunk at {time.time()}", "info")
+            review.current_stage = "getting_llm_review"
+            try:
+                db.commit()
+                stats["commits"] += 1
+            except OperationalError:
+                db.rollback()
+                stats["errors"] += 1
+            time.sleep(0.01)
+    finally:
+        db.close()
+
+
+def _reader(Session, stop: threading.Event, latencies: list, stats: dict):
+    while not stop.is_set():
+        db = Session()
+        started = time.perf_counter()
+        try:
+            (
+                db.query(PRReview)
+                .filter(PRReview.status == ReviewStatus.REVIEWING.value)
+                .order_by(PRReview.created_at.desc(), PRReview.id.desc())
+                .limit(20)
+                .all()
+            )
+            latencies.append((time.perf_counter() - started) * 1000)
+        except OperationalError:
+            stats["errors"] += 1
+        finally:
+            db.close()
+
+
+def run_profile(name: str, env_settings: EnvSettings, writers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        engine = create_db_engine(url, env_settings)
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        db = Session()
+        reviews = [
+            PRReview(pr_url=f"https://github.com/bench/repo/pull/{i}", provider="github",
+                     status=ReviewStatus.REVIEWING.value)
+            for i in range(writers)
+        ]
+        db.add_all(reviews)
+        db.commit()
+        review_ids = [r.id for r in reviews]
+        db.close()
+
+        stop = threading.Event()
+        write_stats = {"commits": 0, "errors": 0}
+        read_stats = {"errors": 0}
+        latencies = []
+        threads = [
+            threading.Thread(target=_writer, args=(Session, review_id, stop, write_stats))
+            for review_id in review_ids
+        ]
+        threads.append(threading.Thread(target=_reader, args=(Session, stop, latencies, read_stats)))
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    latencies.sort()
+    return {
+        "profile": name,
+        "reads": len(latencies),
+        "p50_ms": statistics.median(latencies) if latencies else None,
+        "p95_ms": latencies[int(len(latencies) * 0.95)] if latencies else None,
+        "max_ms": latencies[-1] if latencies else None,
+        "commits_per_s": write_stats["commits"] / seconds,
+        "lock_errors": write_stats["errors"] + read_stats["errors"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=4, help="Concurrent reviews writing progress")
+    parser.add_argument("--seconds", type=float, default=10, help="Duration per profile")
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.seconds:.0f}s per profile")
+    print(f"{'profile':<10}{'reads':>8}{'p50 ms':>10}{'p95 ms':>10}{'max ms':>10}{'commits/s':>12}{'locked':>8}")
+    for name, env_settings in PROFILES.items():
+        r = run_profile(name, env_settings, args.writers, args.seconds)
+        print(f"{r['profile']:<10}{r['reads']:>8}{r['p50_ms']:>10.2f}{r['p95_ms']:>10.2f}"
+              f"{r['max_ms']:>10.2f}{r['commits_per_s']:>12.1f}{r['lock_errors']:>8}")
+
+
+if __name__ == "__main__":
+    main()
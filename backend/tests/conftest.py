@@ -0,0 +1,86 @@
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from pr_agent.config_loader import get_settings
+
+from app import config
+from app.config import DatabaseSettings
+from app.models import AppSettings
+from app.services.client_registry import client_registry
+
+
+class GitLabStub(BaseHTTPRequestHandler):
+    """Just enough of the GitLab API for pr-agent to review merge request 1 of group/project"""
+
+    def do_GET(self):
+        self.server.tokens.append(self.headers.get("PRIVATE-TOKEN"))
+        path = self.path.split("?")[0]
+        self.server.hits[path.rsplit("/", 1)[-1]] += 1
+        if path.endswith("/merge_requests/1/versions"):
+            body = [{"id": 1, "head_commit_sha": "abc", "base_commit_sha": "def", "start_commit_sha": "def"}]
+        elif path.endswith("/merge_requests/1/diffs"):
+            body = [{"old_path": "app.py", "new_path": "app.py", "diff": "@@ -1 +1 @@\n-a\n+b\n"}]
+        elif path.endswith("/merge_requests/1/commits"):
+            body = [{"id": "abc", "message": "Fix the parser"}]
+        elif path.endswith("/merge_requests/1"):
+            body = {
+                "id": 10, "iid": 1, "project_id": 5, "title": "Stub", "description": "", "sha": "abc",
+                "author": {"username": "dev"}, "source_branch": "feature", "target_branch": "main",
+                "web_url": self.server.url + "/group/project/-/merge_requests/1",
+            }
+        elif path.endswith("/repository/merge_base"):
+            body = {"id": self.server.merge_base}
+        elif path.endswith("/repository/compare"):
+            body = {"commits": [], "diffs": self.server.compare_diffs}
+        elif path.endswith("/languages"):
+            body = {"Python": 90.0, "Shell": 10.0}
+        else:
+            body = {"id": 5, "path_with_namespace": "group/project"}
+        data = json.dumps(body).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def gitlab_stub():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GitLabStub)
+    server.tokens = []
+    server.hits = Counter()
+    server.url = f"http://127.0.0.1:{server.server_port}"
+    server.merge_base = None
+    server.compare_diffs = []
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server, server.url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def pr_agent_settings():
+    settings = get_settings()
+    keys = ("GITHUB.USER_TOKEN", "GITHUB.DEPLOYMENT_TYPE", "GITLAB.URL", "GITLAB.PERSONAL_ACCESS_TOKEN")
+    saved = {key: settings.get(key) for key in keys}
+    yield settings
+    for key, value in saved.items():
+        settings.set(key, value)
+    client_registry.clear()
+
+
+@pytest.fixture
+def app_settings(monkeypatch):
+    """Settings of the app (normally read from the database), made up per test"""
+    def use(**fields):
+        settings = DatabaseSettings(AppSettings(**fields))
+        monkeypatch.setattr(config, "_settings_cache", settings)
+        return settings
+    yield use
+    client_registry.clear()
@@ -0,0 +1,154 @@
+import asyncio
+
+import pytest
+
+from app.routers.reviews import cancel_chat
+from app.services.cancellation import (
+    CancellationRegistry, cancellations, chat_key, run_until_disconnected, wait_for_disconnect,
+)
+from app.services.pr_agent_service import PRAgentService
+
+
+class StubRequest:
+    """ASGI request whose receive channel is fed by the test"""
+
+    def __init__(self):
+        self.messages = asyncio.Queue()
+
+    async def receive(self) -> dict:
+        return await self.messages.get()
+
+    def disconnect(self):
+        self.messages.put_nowait({"type": "http.disconnect"})
+
+
+class Generation:
+    """Model answer that never finishes unless cancelled"""
+
+    def __init__(self):
+        self.started = asyncio.Event()
+        self.cancelled = False
+
+    async def __call__(self, *args, **kwargs) -> str:
+        self.started.set()
+        try:
+            await asyncio.Event().wait()
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+
+
+class StubbedChatService(PRAgentService):
+    """Chat service whose answers come from a Generation instead of the model"""
+
+    def __init__(self, generation: Generation):
+        super().__init__()
+        self._answer = generation
+
+
+def test_cancel_stops_the_tracked_task():
+    async def run():
+        registry, generation = CancellationRegistry(), Generation()
+
+        async def chat():
+            with registry.track(chat_key("c1")):
+                await generation()
+
+        task = asyncio.create_task(chat())
+        await generation.started.wait()
+        running = registry.is_running(chat_key("c1"))
+        cancelled = await registry.cancel(chat_key("c1"))
+        return running, cancelled, task.cancelled(), generation.cancelled, registry.is_running(chat_key("c1"))
+
+    assert asyncio.run(run()) == (True, True, True, True, False)
+
+
+def test_cancel_without_a_running_task():
+    async def run():
+        registry = CancellationRegistry()
+        with registry.track(chat_key("done")):
+            pass
+        return await registry.cancel(chat_key("unknown")), await registry.cancel(chat_key("done"))
+
+    assert asyncio.run(run()) == (False, False)
+
+
+def test_cancel_endpoint_stops_a_streamed_chat(app_settings):
+    app_settings()
+
+    async def run():
+        generation = Generation()
+        service = StubbedChatService(generation)
+
+        async def event_stream():
+            # As /ask/stream consumes the answer
+            with cancellations.track(chat_key("c2")):
+                async for _ in service.stream_chat_with_pr("https://github.com/o/r/pull/1", "Why?"):
+                    pass
+
+        stream = asyncio.create_task(event_stream())
+        await generation.started.wait()
+        response = await cancel_chat("c2")
+        await asyncio.wait({stream}, timeout=1)
+        return response, stream.cancelled(), generation.cancelled
+
+    assert asyncio.run(run()) == ({"cancelled": True}, True, True)
+
+
+def test_disconnect_stops_a_streamed_chat(app_settings):
+    app_settings()
+
+    async def run():
+        generation, request = Generation(), StubRequest()
+        service = StubbedChatService(generation)
+
+        async def consume():
+            async for _ in service.stream_chat_with_pr("https://github.com/o/r/pull/1", "Why?", request):
+                pass
+
+        stream = asyncio.create_task(consume())
+        await generation.started.wait()
+        request.disconnect()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(stream, timeout=1)
+        return generation.cancelled
+
+    assert asyncio.run(run()) is True
+
+
+def test_disconnect_cancels_the_generation():
+    async def run():
+        generation, request = Generation(), StubRequest()
+        work = asyncio.create_task(run_until_disconnected(request, generation()))
+        await generation.started.wait()
+        request.messages.put_nowait({"type": "http.request", "body": b""})
+        request.disconnect()
+        with pytest.raises(asyncio.CancelledError):
+            await asyncio.wait_for(work, timeout=1)
+        return generation.cancelled
+
+    assert asyncio.run(run()) is True
+
+
+def test_answer_is_returned_while_the_client_is_connected():
+    async def run():
+        async def answer():
+            return "Because"
+
+        return await run_until_disconnected(StubRequest(), answer()), await run_until_disconnected(None, answer())
+
+    assert asyncio.run(run()) == ("Because", "Because")
+
+
+def test_wait_for_disconnect_ignores_other_messages():
+    async def run():
+        request = StubRequest()
+        watcher = asyncio.create_task(wait_for_disconnect(request))
+        request.messages.put_nowait({"type": "http.request", "body": b"", "more_body": False})
+        await asyncio.sleep(0.01)
+        still_waiting = not watcher.done()
+        request.disconnect()
+        await asyncio.wait_for(watcher, timeout=1)
+        return still_waiting
+
+    assert asyncio.run(run()) is True
@@ -0,0 +1,33 @@
+from pr_agent.git_providers import _GIT_PROVIDERS
+
+from app.services.client_registry import (
+    SharedGithubProvider, SharedGitLabProvider, get_github_client, get_gitlab_client,
+)
+
+
+def test_github_provider_uses_the_shared_client(pr_agent_settings):
+    pr_agent_settings.set("GITHUB.DEPLOYMENT_TYPE", "user")
+    pr_agent_settings.set("GITHUB.USER_TOKEN", "ghp_test")
+
+    first, second = SharedGithubProvider(), SharedGithubProvider()
+
+    assert first.github_client is second.github_client
+    assert first.github_client is get_github_client("ghp_test", first.base_url)
+
+
+def test_gitlab_provider_uses_the_shared_client(pr_agent_settings, gitlab_stub):
+    server, url = gitlab_stub
+    pr_agent_settings.set("GITLAB.URL", url)
+    pr_agent_settings.set("GITLAB.PERSONAL_ACCESS_TOKEN", "glpat-test")
+    mr_url = f"{url}/group/project/-/merge_requests/1"
+
+    first, second = SharedGitLabProvider(mr_url), SharedGitLabProvider(mr_url)
+
+    assert first.gl is second.gl is get_gitlab_client(url, "glpat-test")
+    assert first.mr.title == "Stub"
+    assert set(server.tokens) == {"glpat-test"}
+
+
+def test_pr_agent_looks_up_the_shared_providers():
+    assert _GIT_PROVIDERS["github"] is SharedGithubProvider
+    assert _GIT_PROVIDERS["gitlab"] is SharedGitLabProvider
@@ -0,0 +1,71 @@
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+
+from app.services import diff_filter
+from app.services.diff_filter import DiffFilter, content_skip_reason, filter_diff, matches_glob
+
+
+def new_file_patch(*lines: str) -> str:
+    return f"@@ -0,0 +1,{len(lines)} @@\n" + "\n".join(f"+{line}" for line in lines)
+
+
+def diff_file(path: str, patch: str) -> FilePatchInfo:
+    return FilePatchInfo("", "", patch, path, edit_type=EDIT_TYPE.ADDED)
+
+
+def test_go_generated_header_is_skipped():
+    patch = new_file_patch("// Code generated by protoc-gen-go. DO NOT EDIT.", "", "package api")
+    assert content_skip_reason(patch).startswith("generated")
+
+
+def test_at_generated_header_is_skipped():
+    patch = new_file_patch("/**", " * @generated SignedSource<<abc>>", " */", "export const x = 1;")
+    assert content_skip_reason(patch).startswith("generated")
+
+
+def test_generated_header_after_the_first_lines_is_ignored():
+    patch = new_file_patch(*["x = 1"] * 10, "# @generated")
+    assert content_skip_reason(patch) is None
+
+
+def test_header_outside_the_diff_is_ignored():
+    patch = "@@ -40,2 +40,3 @@\n context\n+// Code generated by hand. DO NOT EDIT.\n context"
+    assert content_skip_reason(patch) is None
+
+
+def test_marker_inside_code_is_not_a_header():
+    patch = new_file_patch(
+        "def strip_autogenerated_ids(rows):",
+        "    return [r for r in rows if not r.autogenerated]",
+    )
+    assert content_skip_reason(patch) is None
+
+
+def test_comment_mentioning_generated_values_is_not_a_header():
+    patch = new_file_patch("# The default settings are auto-generated on first start", "DEFAULTS = {}")
+    assert content_skip_reason(patch) is None
+
+
+def test_diff_filter_module_is_not_skipped():
+    with open(diff_filter.__file__, encoding="utf-8") as f:
+        source = f.read().splitlines()
+    patch = new_file_patch(*source)
+    assert DiffFilter().skip_reason(diff_file("backend/app/services/diff_filter.py", patch)) is None
+
+
+def test_minified_bundle_is_skipped():
+    patch = new_file_patch("var a=" + "1," * 800 + "2;")
+    assert content_skip_reason(patch) == "minified"
+
+
+def test_glob_patterns_and_keep_patterns():
+    assert matches_glob("web/package-lock.json", "package-lock.json")
+    assert matches_glob("a/vendor/lib/x.go", "vendor/*")
+    assert not matches_glob("src/vendored.py", "vendor/*")
+
+    files = [diff_file("yarn.lock", new_file_patch("x")), diff_file("src/app.py", new_file_patch("x = 1"))]
+    kept, skipped = filter_diff(files, DiffFilter())
+    assert [f.filename for f in kept] == ["src/app.py"]
+    assert skipped[0][:2] == ("yarn.lock", "matches yarn.lock")
+
+    kept, _ = filter_diff(files, DiffFilter(patterns=["!yarn.lock"]))
+    assert len(kept) == 2
@@ -0,0 +1,91 @@
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+
+from app.services.diff_sharding import DiffShard, merge_shard_results, plan_shards
+from app.services.llm_service import CodeSuggestion
+
+
+def diff_files(*paths):
+    return [FilePatchInfo("", "", "@@ -1 +1 @@\n-a\n+b", path, edit_type=EDIT_TYPE.MODIFIED) for path in paths]
+
+
+def suggestion(path, line, text, severity="warning"):
+    return CodeSuggestion(path, line, line, severity, "bug", None, None, text, None)
+
+
+def test_diff_within_the_budget_is_one_shard():
+    shards = plan_shards(diff_files("b.py", "a.py"), {"a.py": 100, "b.py": 200}, budget=1000)
+
+    assert [(s.files, s.tokens) for s in shards] == [(["a.py", "b.py"], 300)]
+
+
+def test_files_are_packed_in_directory_order_under_the_budget():
+    tokens = {"src/a.py": 400, "src/b.py": 400, "src/c.py": 300, "docs/x.md": 500, "setup.py": 100}
+
+    shards = plan_shards(diff_files(*tokens), tokens, budget=1000)
+
+    assert [s.files for s in shards] == [["setup.py", "docs/x.md", "src/a.py"], ["src/b.py", "src/c.py"]]
+    assert [s.tokens for s in shards] == [1000, 700]
+    assert all(s.tokens <= 1000 for s in shards)
+    assert sorted(f for s in shards for f in s.files) == sorted(tokens)
+
+
+def test_file_over_the_budget_gets_a_shard_of_its_own():
+    tokens = {"a.py": 300, "b.py": 5000, "c.py": 300}
+
+    shards = plan_shards(diff_files(*tokens), tokens, budget=1000)
+
+    assert [(s.files, s.tokens) for s in shards] == [(["a.py"], 300), (["b.py"], 5000), (["c.py"], 300)]
+
+
+def test_no_files_no_shards():
+    assert plan_shards([], {}, budget=1000) == []
+
+
+def test_duplicate_suggestions_across_shards_are_dropped():
+    first = {"suggestions": [suggestion("a.py", 3, "Check for None"), suggestion("a.py", 9, "Close the file")]}
+    second = {"suggestions": [
+        suggestion("a.py", 3, "  check   for none ", severity="error"),  # Same finding, other wording
+        suggestion("a.py", 4, "Check for None"),  # Same text, other line
+    ]}
+
+    merged = merge_shard_results([first, second], [DiffShard(["a.py"], 10), DiffShard(["a.py"], 10)])
+
+    assert [(s.line_start, s.suggestion, s.severity) for s in merged["suggestions"]] == [
+        (3, "Check for None", "warning"), (9, "Close the file", "warning"), (4, "Check for None", "warning"),
+    ]
+
+
+def test_score_is_weighted_by_shard_size_and_effort_is_the_highest():
+    results = [
+        {"score": 90, "effort": 2},
+        {"score": 60, "effort": 4},
+        {"score": None, "effort": None},  # Review part of a shard failed
+    ]
+    shards = [DiffShard(["a.py"], 3000), DiffShard(["b.py"], 1000), DiffShard(["c.py"], 5000)]
+
+    merged = merge_shard_results(results, shards)
+
+    assert merged["score"] == round((90 * 3000 + 60 * 1000) / 4000)
+    assert merged["effort"] == 4
+
+
+def test_labels_are_collected_once_and_description_is_kept():
+    results = [
+        {"security_concerns": "SQL built from user input", "can_be_split": [{"title": "Parser"}]},
+        {"security_concerns": None, "can_be_split": []},
+        {"security_concerns": " SQL built from user input ", "can_be_split": [{"title": "CLI"}]},
+    ]
+    shards = [DiffShard(["a.py"], 1), DiffShard(["b.py"], 1), DiffShard(["c.py"], 1)]
+
+    merged = merge_shard_results(results, shards, description="Adds a parser")
+
+    assert merged["security_concerns"] == "SQL built from user input"
+    assert merged["can_be_split"] == [{"title": "Parser"}, {"title": "CLI"}]
+    assert merged["description"] == "Adds a parser"
+
+
+def test_shards_without_findings_merge_to_an_empty_review():
+    merged = merge_shard_results([{}, {"suggestions": []}], [DiffShard(["a.py"], 1), DiffShard(["b.py"], 1)])
+
+    assert merged == {"score": None, "effort": None, "security_concerns": None, "can_be_split": None,
+                      "suggestions": [], "description": None}
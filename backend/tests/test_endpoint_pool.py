@@ -0,0 +1,162 @@
+import asyncio
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import openai
+import pytest
+
+from app.services.endpoint_pool import EndpointPool, NoEndpointAvailable
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible chat endpoint answering with the server's status"""
+
+    def do_GET(self):
+        self._answer(b"ok")
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        self.server.hits += 1
+        time.sleep(self.server.delay)
+        self._answer(json.dumps({
+            "id": "stub",
+            "object": "chat.completion",
+            "created": 0,
+            "model": "stub",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": self.server.name}, "finish_reason": "stop"}],
+        }).encode())
+
+    def _answer(self, body: bytes):
+        status = self.server.status
+        if status >= 500:
+            body = b'{"error": {"message": "server error"}}'
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def stub_servers():
+    servers = []
+
+    def start(name: str, status: int = 200, delay: float = 0.0):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        server.name, server.status, server.delay, server.hits = name, status, delay, 0
+        server.url = f"http://127.0.0.1:{server.server_port}"
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+async def complete(api_base: str) -> str:
+    client = openai.AsyncOpenAI(base_url=api_base, api_key="stub", max_retries=0)
+    try:
+        response = await client.chat.completions.create(model="stub", messages=[{"role": "user", "content": "hi"}])
+    finally:
+        await client.close()
+    return response.choices[0].message.content
+
+
+def test_calls_are_balanced_by_weight(stub_servers):
+    heavy = stub_servers("heavy", delay=0.2)
+    light = stub_servers("light", delay=0.2)
+    pool = EndpointPool(health_interval=0)
+    pool.configure([{"url": heavy.url, "weight": 3}, {"url": light.url, "weight": 1}])
+
+    async def run():
+        return await asyncio.gather(*(pool.call(complete) for _ in range(8)))
+
+    answers = asyncio.run(run())
+
+    assert answers.count("heavy") == heavy.hits == 6
+    assert answers.count("light") == light.hits == 2
+    assert all(e["outstanding"] == 0 for e in pool.snapshot())
+
+
+def test_failing_endpoint_fails_over_and_is_taken_out(stub_servers):
+    broken = stub_servers("broken", status=500)
+    healthy = stub_servers("healthy")
+    pool = EndpointPool(health_interval=0)
+    pool.configure([{"url": broken.url}, {"url": healthy.url}])
+
+    async def run():
+        return [await pool.call(complete) for _ in range(4)]
+
+    assert asyncio.run(run()) == ["healthy"] * 4
+    # Only the first call reached the broken server, the others skipped it
+    assert broken.hits == 1
+    assert healthy.hits == 4
+    state = {e["url"]: e for e in pool.snapshot()}
+    assert state[broken.url]["healthy"] is False
+    assert state[broken.url]["failures"] == 1
+    assert state[healthy.url]["healthy"] is True
+
+
+def test_call_fails_when_every_endpoint_is_broken(stub_servers):
+    first = stub_servers("first", status=503)
+    second = stub_servers("second", status=500)
+    pool = EndpointPool(health_interval=0)
+    pool.configure([{"url": first.url}, {"url": second.url}])
+
+    with pytest.raises(openai.InternalServerError):
+        asyncio.run(pool.call(complete))
+    assert first.hits == second.hits == 1
+
+
+def test_health_check_marks_endpoints_down_and_up(stub_servers):
+    flaky = stub_servers("flaky", status=502)
+    healthy = stub_servers("healthy")
+    pool = EndpointPool(health_interval=0)
+    pool.configure([{"url": flaky.url}, {"url": healthy.url}])
+
+    asyncio.run(pool.check_health())
+    state = {e["url"]: e for e in pool.snapshot()}
+    assert state[flaky.url]["healthy"] is False
+    assert state[flaky.url]["last_error"] == "HTTP 502"
+    assert state[healthy.url]["healthy"] is True
+
+    flaky.status = 200
+    asyncio.run(pool.check_health())
+    state = {e["url"]: e for e in pool.snapshot()}
+    assert state[flaky.url]["healthy"] is True
+    assert state[flaky.url]["failures"] == 0
+
+
+def test_configure_from_settings_ignores_hosted_providers():
+    class Settings:
+        ai_endpoints = [{"url": "http://a:11434/", "weight": 2}, {"url": "http://b:11434", "enabled": False}]
+        ai_provider = "ollama"
+
+    pool = EndpointPool(health_interval=0)
+    pool.configure_from_settings(Settings)
+    assert [(e["url"], e["weight"]) for e in pool.snapshot()] == [("http://a:11434", 2)]
+
+    Settings.ai_provider = "anthropic"
+    pool.configure_from_settings(Settings)
+    assert not pool.active
+
+
+def test_call_without_endpoints_raises_a_dedicated_error():
+    pool = EndpointPool(health_interval=0)
+    calls = []
+
+    async def attempt(api_base):
+        calls.append(api_base)
+
+    with pytest.raises(NoEndpointAvailable) as raised:
+        asyncio.run(pool.call(attempt))
+    # Not an API error: pr-agent's retries (on openai.APIError) must not repeat it
+    assert not isinstance(raised.value, openai.APIError)
+    assert calls == []
@@ -0,0 +1,118 @@
+import io
+import os
+import threading
+
+import pytest
+import requests
+from requests.adapters import HTTPAdapter
+
+from app.services import http_cache
+from app.services.http_cache import ConditionalCacheAdapter, ResponseCache
+
+URL = "https://api.github.com/repos/o/r/pulls/1/files"
+ETAG = '"v1"'
+
+
+class StubTransport(HTTPAdapter):
+    """Answers in place of the network: 304 when the request revalidates the current ETag"""
+
+    def __init__(self):
+        super().__init__()
+        self.requests = []
+        self.cache_control = ""
+        self._lock = threading.Lock()
+
+    def send(self, request, **kwargs):
+        with self._lock:
+            self.requests.append(dict(request.headers))
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.headers["ETag"] = ETAG
+        if self.cache_control:
+            response.headers["Cache-Control"] = self.cache_control
+        if request.headers.get("If-None-Match") == ETAG:
+            response.status_code = 304
+            response._content = b""
+        else:
+            response.status_code = 200
+            response.headers["Content-Type"] = "application/json"
+            response._content = b'[{"filename": "a.py"}]'
+        response.raw = io.BytesIO(response._content)
+        return response
+
+
+class StubbedCacheAdapter(ConditionalCacheAdapter, StubTransport):
+    """The cache adapter sending through StubTransport"""
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = ResponseCache(str(tmp_path / "http_cache"), max_bytes=1024 * 1024)
+    monkeypatch.setattr(http_cache, "response_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def session():
+    adapter = StubbedCacheAdapter()
+    session = requests.Session()
+    session.mount("https://", adapter)
+    return session, adapter
+
+
+def test_revalidated_response_is_served_from_the_cache(cache, session):
+    session, adapter = session
+
+    first = session.get(URL)
+    second = session.get(URL)
+
+    assert "If-None-Match" not in adapter.requests[0]
+    assert adapter.requests[1]["If-None-Match"] == ETAG
+    assert second.status_code == 200
+    assert second.json() == first.json() == [{"filename": "a.py"}]
+    assert second.headers["Content-Type"] == "application/json"
+    assert (cache.stores, cache.hits) == (1, 1)
+
+
+def test_missing_body_is_fetched_again_without_validators(cache, session):
+    session, adapter = session
+    session.get(URL)
+    for name in os.listdir(cache.directory):
+        if name.endswith(".body"):
+            os.unlink(os.path.join(cache.directory, name))
+
+    response = session.get(URL)
+
+    assert response.status_code == 200
+    assert response.json() == [{"filename": "a.py"}]
+    assert "If-None-Match" not in adapter.requests[-1]
+    assert cache.hits == 0
+
+
+def test_no_store_responses_are_not_cached(cache, session):
+    session, adapter = session
+    adapter.cache_control = "private, no-store"
+
+    session.get(URL)
+    session.get(URL)
+
+    assert "If-None-Match" not in adapter.requests[1]
+    assert cache.stores == 0
+
+
+def test_concurrent_hits_are_all_counted(cache, session):
+    session, adapter = session
+    session.get(URL)
+
+    def fetch():
+        for _ in range(50):
+            assert session.get(URL).status_code == 200
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cache.hits == 400
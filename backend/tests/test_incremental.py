@@ -0,0 +1,87 @@
+import re
+
+from app.services.base_service import PRDiff
+from app.services.incremental import ChangeSet, only_files_regex, parse_patch
+
+
+def diff(path, patch="", old_path=None, new_file=False, deleted_file=False, renamed_file=False):
+    return PRDiff(path, old_path or path, path, patch, new_file, deleted_file, renamed_file)
+
+
+# Old lines 1-10; line 3 modified, two lines inserted after old line 6
+PATCH = "\n".join([
+    "@@ -2,3 +2,3 @@",
+    " line 2",
+    "-line 3",
+    "+line three",
+    " line 4",
+    "@@ -6,2 +6,4 @@",
+    " line 6",
+    "+new a",
+    "+new b",
+    " line 7",
+])
+
+
+def test_lines_before_a_change_keep_their_numbers():
+    assert parse_patch(PATCH).remap(1, 2) == (1, 2)
+
+
+def test_modified_lines_are_dropped():
+    delta = parse_patch(PATCH)
+    assert delta.remap(3, 3) is None
+    assert delta.remap(2, 4) is None
+
+
+def test_lines_after_an_insertion_are_shifted():
+    delta = parse_patch(PATCH)
+    assert delta.remap(4, 5) == (4, 5)
+    assert delta.remap(7, 7) == (9, 9)
+    assert delta.remap(10, 10) == (12, 12)
+
+
+def test_ranges_with_lines_inserted_inside_are_dropped():
+    assert parse_patch(PATCH).remap(6, 7) is None
+
+
+def test_insertion_right_after_a_range_keeps_it():
+    assert parse_patch(PATCH).remap(5, 6) == (5, 6)
+
+
+def test_removed_lines_shift_the_rest_up():
+    delta = parse_patch("@@ -3,2 +2,0 @@\n-line 3\n-line 4")
+    assert delta.remap(1, 2) == (1, 2)
+    assert delta.remap(3, 3) is None
+    assert delta.remap(5, 6) == (3, 4)
+
+
+def test_missing_patch_or_line_numbers_count_as_changed():
+    assert parse_patch("").remap(1, 1) is None
+    assert parse_patch(PATCH).remap(None, None) is None
+
+
+def test_change_set_of_added_deleted_and_renamed_files():
+    changes = ChangeSet.from_diffs([
+        diff("src/new.py", "@@ -0,0 +1 @@\n+x", new_file=True),
+        diff("src/old.py", "@@ -1 +0,0 @@\n-x", deleted_file=True),
+        diff("src/moved.py", old_path="src/before.py", renamed_file=True),
+        diff("src/edited.py", PATCH),
+        diff("src/renamed_and_edited.py", PATCH, old_path="src/was.py", renamed_file=True),
+    ])
+
+    assert changes.paths == ["src/new.py", "src/moved.py", "src/edited.py", "src/renamed_and_edited.py"]
+    assert changes.remap("src/old.py", 1, 1) is None
+    assert changes.remap("src/before.py", 5, 8) == ("src/moved.py", 5, 8)
+    assert changes.remap("src/edited.py", 7, 7) == ("src/edited.py", 9, 9)
+    assert changes.remap("src/edited.py", 3, 3) is None
+    assert changes.remap("src/was.py", 10, 10) == ("src/renamed_and_edited.py", 12, 12)
+    # Untouched files keep their suggestions as they are
+    assert changes.remap("src/other.py", 4, 6) == ("src/other.py", 4, 6)
+
+
+def test_only_files_regex_ignores_every_other_path():
+    pattern = re.compile(only_files_regex(["a.py", "dir/b.py"]))
+    assert not pattern.match("a.py")
+    assert not pattern.match("dir/b.py")
+    assert pattern.match("c.py")
+    assert pattern.match("a.pyc")
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from app.services.inflight import InflightReviews
+
+
+class Work:
+    """A pr-agent run that finishes when released"""
+
+    def __init__(self, result=None, error=None):
+        self.result = result or {"score": 80, "suggestions": ["a"]}
+        self.error = error
+        self.runs = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> dict:
+        self.runs += 1
+        self.started.set()
+        await self.release.wait()
+        if self.error:
+            raise self.error
+        return self.result
+
+
+def test_concurrent_identical_reviews_run_once():
+    async def run():
+        inflight, work, joined = InflightReviews(), Work(), []
+
+        async def on_join(review_id):
+            joined.append(review_id)
+
+        leader = asyncio.create_task(inflight.run_once("key", 1, work))
+        await work.started.wait()
+        follower = asyncio.create_task(inflight.run_once("key", 2, work, on_join))
+        await asyncio.sleep(0)
+        work.release.set()
+        results = await asyncio.gather(leader, follower)
+        return work.runs, joined, results, inflight.running("key")
+
+    runs, joined, (leader_result, follower_result), running = asyncio.run(run())
+
+    assert runs == 1
+    assert joined == [1]
+    assert follower_result == leader_result
+    # The follower saves the suggestions into its own review
+    assert follower_result["suggestions"] is not leader_result["suggestions"]
+    assert running is None
+
+
+def test_reviews_with_other_keys_run_side_by_side():
+    async def run():
+        inflight, work = InflightReviews(), Work()
+        work.release.set()
+        await asyncio.gather(inflight.run_once("a", 1, work), inflight.run_once("b", 2, work))
+        return work.runs
+
+    assert asyncio.run(run()) == 2
+
+
+def test_follower_runs_itself_when_the_leader_is_cancelled():
+    async def run():
+        inflight, leader_work, follower_work = InflightReviews(), Work(), Work()
+        follower_work.release.set()
+
+        leader = asyncio.create_task(inflight.run_once("key", 1, leader_work))
+        await leader_work.started.wait()
+        follower = asyncio.create_task(inflight.run_once("key", 2, follower_work))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower, follower_work.runs, inflight.running("key")
+
+    result, follower_runs, running = asyncio.run(run())
+
+    assert result == {"score": 80, "suggestions": ["a"]}
+    assert follower_runs == 1
+    assert running is None
+
+
+def test_leader_error_is_raised_to_the_leader_and_the_follower_runs_itself():
+    async def run():
+        inflight, follower_work = InflightReviews(), Work(result={"score": 60, "suggestions": []})
+        leader_work = Work(error=RuntimeError("model unavailable"))
+        follower_work.release.set()
+
+        leader = asyncio.create_task(inflight.run_once("key", 1, leader_work))
+        await leader_work.started.wait()
+        follower = asyncio.create_task(inflight.run_once("key", 2, follower_work))
+        await asyncio.sleep(0)
+        leader_work.release.set()
+        with pytest.raises(RuntimeError, match="model unavailable"):
+            await leader
+        return await follower, follower_work.runs
+
+    result, follower_runs = asyncio.run(run())
+
+    # The follower is not failed by the leader's error but reviews on its own
+    assert result == {"score": 60, "suggestions": []}
+    assert follower_runs == 1
+
+
+def test_follower_cancelled_while_waiting_leaves_the_leader_running():
+    async def run():
+        inflight, work = InflightReviews(), Work()
+
+        leader = asyncio.create_task(inflight.run_once("key", 1, work))
+        await work.started.wait()
+        follower = asyncio.create_task(inflight.run_once("key", 2, work))
+        await asyncio.sleep(0)
+        follower.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await follower
+        work.release.set()
+        return await leader, work.runs
+
+    result, runs = asyncio.run(run())
+
+    assert result["score"] == 80
+    assert runs == 1
@@ -0,0 +1,54 @@
+import pytest
+from sqlalchemy import inspect, text
+
+from app.database import Base, create_db_engine
+from app.migrations import HOT_QUERIES, MIGRATIONS, explain_hot_queries, run_migrations
+
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'migrations.db'}")
+    yield engine
+    engine.dispose()
+
+
+def applied_versions(engine):
+    with engine.connect() as conn:
+        return [row[0] for row in conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))]
+
+
+def test_new_database_gets_every_table_and_migration(engine):
+    run_migrations(engine)
+
+    assert set(Base.metadata.tables) <= set(inspect(engine).get_table_names())
+    assert applied_versions(engine) == [version for version, _, _ in MIGRATIONS]
+
+
+def test_hot_queries_are_index_backed(engine):
+    run_migrations(engine)
+
+    results = explain_hot_queries(engine)
+    assert [r["query"] for r in results] == [name for name, _, _ in HOT_QUERIES]
+    for result in results:
+        assert result["uses_index"], f"{result['query']} is not index-backed: {result['plan']}"
+
+
+def test_indexes_are_added_to_an_existing_database(engine):
+    # A database created before the migrations existed: tables without the indexes
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.tables.values():
+            for index in table.indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+    assert not all(r["uses_index"] for r in explain_hot_queries(engine))
+
+    run_migrations(engine)
+
+    assert all(r["uses_index"] for r in explain_hot_queries(engine))
+
+
+def test_migrations_are_applied_once(engine):
+    run_migrations(engine)
+    run_migrations(engine)
+
+    assert applied_versions(engine) == [version for version, _, _ in MIGRATIONS]
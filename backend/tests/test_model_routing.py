@@ -0,0 +1,77 @@
+import pytest
+from pr_agent.config_loader import get_settings
+
+from app.services.model_routing import ModelRouting
+from app.services.pr_agent_service import PRAgentService
+
+TOOL_MODELS = {"review": ["qwen2.5-coder:32b", "llama3:70b"], "describe": ["llama3:8b"]}
+
+
+def test_rule_set_overrides_replace_the_chain_of_a_tool():
+    routing = ModelRouting.resolve(TOOL_MODELS, {"describe": ["phi3"], "improve": ["deepseek-coder:33b"]})
+
+    assert routing.chain("review") == ["qwen2.5-coder:32b", "llama3:70b"]
+    assert routing.chain("describe") == ["phi3"]
+    assert routing.chain("improve") == ["deepseek-coder:33b"]
+
+
+def test_empty_overrides_keep_the_settings_chain():
+    routing = ModelRouting.resolve(TOOL_MODELS, {"review": [" ", ""], "describe": None})
+
+    assert routing.chains == TOOL_MODELS
+
+
+def test_chains_are_cleaned_and_unknown_tools_dropped():
+    routing = ModelRouting.resolve({"review": [" llama3:70b ", "llama3:70b", None, "phi3"], "chat": ["phi3"]})
+
+    assert routing.chains == {"review": ["llama3:70b", "phi3"]}
+
+
+def test_tools_without_a_chain_use_the_default_model():
+    routing = ModelRouting.resolve(None)
+
+    assert routing.chain("review") == []
+    assert routing.fingerprint is None
+    assert routing.describe() == ""
+
+
+@pytest.mark.parametrize("overrides", [
+    {"describe": ["phi3"]},
+    {"improve": ["llama3:8b"]},
+    {"review": ["llama3:70b", "qwen2.5-coder:32b"]},  # Same models, other order
+])
+def test_overrides_change_the_fingerprint(overrides):
+    assert ModelRouting.resolve(TOOL_MODELS, overrides).fingerprint != ModelRouting.resolve(TOOL_MODELS).fingerprint
+
+
+def test_fingerprint_ignores_the_order_of_the_settings():
+    reordered = {"describe": TOOL_MODELS["describe"], "review": TOOL_MODELS["review"]}
+
+    assert ModelRouting.resolve(reordered).fingerprint == ModelRouting.resolve(TOOL_MODELS).fingerprint
+
+
+def test_routed_model_id_includes_the_tool_models(app_settings):
+    app_settings(ai_provider="ollama", ai_model="llama3", tool_models=TOOL_MODELS)
+    service = PRAgentService()
+
+    default_id = service.routed_model_id(ModelRouting.resolve(None))
+    routed_id = service.routed_model_id(service.model_routing())
+    overridden_id = service.routed_model_id(service.model_routing({"describe": ["phi3"]}))
+
+    assert default_id == "ollama:llama3"
+    assert len({default_id, routed_id, overridden_id}) == 3
+
+
+def test_tools_run_with_their_chain_or_the_default_model(app_settings):
+    app_settings(ai_provider="ollama", ai_model="llama3", tool_models=TOOL_MODELS)
+    service = PRAgentService()
+    routing = service.model_routing()
+
+    with service._settings_scope("https://github.com/o/r/pull/1"):
+        models = {}
+        for tool in ("review", "improve"):
+            with service._tool_scope(tool, routing):
+                models[tool] = (get_settings().config.model, list(get_settings().config.fallback_models))
+
+    assert models["review"] == ("ollama/qwen2.5-coder:32b", ["ollama/llama3:70b"])
+    assert models["improve"] == ("ollama/llama3", ["ollama/llama3"])
@@ -0,0 +1,34 @@
+from app.services.pr_snapshot import PRSnapshot
+
+
+def fetch_snapshot(settings, url: str) -> PRSnapshot:
+    settings.set("GITLAB.URL", url)
+    settings.set("GITLAB.PERSONAL_ACCESS_TOKEN", "glpat-test")
+    return PRSnapshot.fetch(f"{url}/group/project/-/merge_requests/1", "gitlab")
+
+
+def test_views_fetch_languages_and_commit_messages_once(pr_agent_settings, gitlab_stub):
+    server, url = gitlab_stub
+    snapshot = fetch_snapshot(pr_agent_settings, url)
+
+    # One view per pr-agent tool
+    views = [snapshot.view() for _ in range(3)]
+    languages = [view.get_languages() for view in views]
+    commit_messages = [view.get_commit_messages() for view in views]
+
+    assert languages == [{"Python": 90.0, "Shell": 10.0}] * 3
+    assert all("Fix the parser" in messages for messages in commit_messages)
+    assert server.hits["languages"] == 1
+    assert server.hits["commits"] == 1
+
+
+def test_views_of_a_chunk_share_the_cached_metadata(pr_agent_settings, gitlab_stub):
+    server, url = gitlab_stub
+    snapshot = fetch_snapshot(pr_agent_settings, url)
+    snapshot.diff_files = []
+
+    snapshot.view().get_languages()
+    with snapshot.only(["a.py"]):
+        snapshot.view(["a.py"]).get_languages()
+
+    assert server.hits["languages"] == 1
@@ -0,0 +1,123 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services.base_service import ComparisonUnavailable
+from app.services.client_registry import SharedGitLabProvider, get_github_client
+from app.services.github_service import COMPARE_MAX_FILES, GitHubService
+from app.services.gitlab_service import GitLabService
+
+PR_URL = "https://github.com/owner/repo/pull/7"
+
+
+def test_metadata_fetch_requests_only_the_merge_request(app_settings, gitlab_stub):
+    server, url = gitlab_stub
+    app_settings(gitlab_url=url, gitlab_token="glpat-test")
+
+    info = GitLabService().get_pr_info(f"{url}/group/project/-/merge_requests/1")
+
+    assert (info.title, info.pr_number, info.head_sha) == ("Stub", 1, "abc")
+    assert sum(server.hits.values()) == 1
+    assert server.hits["1"] == 1
+
+
+def test_diffs_of_the_metadata_are_fetched_when_iterated(app_settings, gitlab_stub):
+    server, url = gitlab_stub
+    app_settings(gitlab_url=url, gitlab_token="glpat-test")
+    info = GitLabService().get_pr_info(f"{url}/group/project/-/merge_requests/1")
+    assert server.hits["diffs"] == 0
+
+    assert [diff.filename for diff in info.diffs] == ["app.py"]
+    assert server.hits["diffs"] == 1
+
+
+def test_pr_agent_provider_fetches_more_than_the_header(pr_agent_settings, gitlab_stub):
+    # What the metadata stage cost when it went through pr-agent's provider
+    server, url = gitlab_stub
+    pr_agent_settings.set("GITLAB.URL", url)
+    pr_agent_settings.set("GITLAB.PERSONAL_ACCESS_TOKEN", "glpat-test")
+
+    SharedGitLabProvider(f"{url}/group/project/-/merge_requests/1")
+
+    assert sum(server.hits.values()) > 1
+    assert server.hits["versions"] == 1
+
+
+class GitHubCompareStub(BaseHTTPRequestHandler):
+    """GitHub compare endpoint answering with the server's comparison"""
+
+    def do_GET(self):
+        data = json.dumps(self.server.comparison).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def github_service(app_settings):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), GitHubCompareStub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    app_settings(github_token="ghp_test")
+    service = GitHubService()
+    service.github = get_github_client("ghp_test", f"http://127.0.0.1:{server.server_port}")
+    yield server, service
+    server.shutdown()
+    server.server_close()
+
+
+def github_file(name, status="modified"):
+    return {"filename": name, "status": status, "patch": "@@ -1 +1 @@\n-a\n+b"}
+
+
+def test_github_compare_of_a_later_commit(github_service):
+    server, service = github_service
+    server.comparison = {"status": "ahead", "files": [github_file("a.py"), github_file("b.py", "added")]}
+
+    diffs = service.get_changed_files(PR_URL, "aaaaaaaa1", "bbbbbbbb2")
+
+    assert [(d.filename, d.new_file) for d in diffs] == [("a.py", False), ("b.py", True)]
+
+
+@pytest.mark.parametrize("status", ["diverged", "behind"])
+def test_github_compare_after_a_force_push_falls_back(github_service, status):
+    server, service = github_service
+    server.comparison = {"status": status, "files": [github_file("a.py")]}
+
+    with pytest.raises(ComparisonUnavailable):
+        service.get_changed_files(PR_URL, "aaaaaaaa1", "bbbbbbbb2")
+
+
+def test_github_compare_with_a_truncated_file_list_falls_back(github_service):
+    server, service = github_service
+    server.comparison = {"status": "ahead", "files": [github_file(f"f{i}.py") for i in range(COMPARE_MAX_FILES)]}
+
+    with pytest.raises(ComparisonUnavailable):
+        service.get_changed_files(PR_URL, "aaaaaaaa1", "bbbbbbbb2")
+
+
+def test_gitlab_compare_of_a_later_commit(app_settings, gitlab_stub):
+    server, url = gitlab_stub
+    app_settings(gitlab_url=url, gitlab_token="glpat-test")
+    server.merge_base = "aaaaaaaa1"
+    server.compare_diffs = [{"old_path": "a.py", "new_path": "a.py", "diff": "@@ -1 +1 @@\n-a\n+b\n"}]
+
+    diffs = GitLabService().get_changed_files(f"{url}/group/project/-/merge_requests/1", "aaaaaaaa1", "bbbbbbbb2")
+
+    assert [d.filename for d in diffs] == ["a.py"]
+
+
+def test_gitlab_compare_after_a_rebase_falls_back(app_settings, gitlab_stub):
+    server, url = gitlab_stub
+    app_settings(gitlab_url=url, gitlab_token="glpat-test")
+    server.merge_base = "cccccccc3"
+
+    with pytest.raises(ComparisonUnavailable):
+        GitLabService().get_changed_files(f"{url}/group/project/-/merge_requests/1", "aaaaaaaa1", "bbbbbbbb2")
+    assert server.hits["compare"] == 0
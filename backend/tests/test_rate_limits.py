@@ -0,0 +1,102 @@
+import time
+
+import pytest
+
+from app.services.rate_limits import RateLimitTracker, request_resource
+
+TOKEN = {"Authorization": "token ghp_test"}
+OTHER_TOKEN = {"Authorization": "token ghp_other"}
+API = "https://api.github.com"
+
+
+def github_headers(remaining, resource="core", reset_in=600, limit=5000):
+    return {
+        "X-RateLimit-Limit": str(limit),
+        "X-RateLimit-Remaining": str(remaining),
+        "X-RateLimit-Reset": str(int(time.time() + reset_in)),
+        "X-RateLimit-Resource": resource,
+    }
+
+
+@pytest.fixture
+def tracker():
+    return RateLimitTracker(reserve=10)
+
+
+@pytest.mark.parametrize("url, resource", [
+    (f"{API}/repos/o/r/pulls/1", "core"),
+    (f"{API}/search/issues?q=x", "search"),
+    (f"{API}/graphql", "graphql"),
+    ("https://gitlab.example.com/api/v4/projects/1", "core"),
+])
+def test_request_resource(url, resource):
+    assert request_resource(url) == resource
+
+
+def test_record_keeps_one_budget_per_host_token_and_resource(tracker):
+    tracker.record(f"{API}/repos/o/r", TOKEN, 200, github_headers(4000))
+    tracker.record(f"{API}/repos/o/r/pulls", TOKEN, 200, github_headers(3999))
+    tracker.record(f"{API}/search/code", TOKEN, 200, github_headers(25, "search", limit=30))
+    tracker.record(f"{API}/repos/o/r", OTHER_TOKEN, 200, github_headers(100))
+    tracker.record(f"{API}/repos/o/r", TOKEN, 200, {})  # No rate limit headers
+
+    budgets = {(b["token"], b["resource"]): b["remaining"] for b in tracker.snapshot()}
+    assert len(budgets) == 3
+    assert sorted(budgets.values()) == [25, 100, 3999]
+
+
+def test_requests_wait_for_an_exhausted_budget(tracker):
+    tracker.record(f"{API}/repos/o/r", TOKEN, 200, github_headers(0, reset_in=120))
+
+    assert 110 < tracker.wait_time(f"{API}/repos/o/r/pulls/1", TOKEN) <= 120
+    # Other tokens and hosts have their own budget
+    assert tracker.wait_time(f"{API}/repos/o/r/pulls/1", OTHER_TOKEN) == 0
+    assert tracker.wait_time("https://github.example.com/api/v3/repos/o/r", TOKEN) == 0
+
+
+def test_budget_within_the_reserve_does_not_refuse_requests(tracker):
+    tracker.record(f"{API}/repos/o/r", TOKEN, 200, github_headers(5))
+
+    assert tracker.wait_time(f"{API}/repos/o/r", TOKEN) == 0
+    assert "github" in tracker.blocked_providers()
+
+
+def test_exhausted_search_budget_does_not_block_core_requests(tracker):
+    tracker.record(f"{API}/search/issues", TOKEN, 200, github_headers(0, "search", limit=30))
+    tracker.record(f"{API}/graphql", TOKEN, 200, github_headers(0, "graphql"))
+    tracker.record(f"{API}/repos/o/r", TOKEN, 200, github_headers(4000))
+
+    assert tracker.wait_time(f"{API}/repos/o/r/pulls/1", TOKEN) == 0
+    assert tracker.wait_time(f"{API}/search/issues?q=bug", TOKEN) > 0
+    assert tracker.wait_time(f"{API}/graphql", TOKEN) > 0
+    assert tracker.blocked_providers() == {}
+
+
+def test_gitlab_budget_covers_every_request(tracker):
+    url = "https://gitlab.example.com/api/v4/projects/1"
+    headers = {"RateLimit-Limit": "2000", "RateLimit-Remaining": "0", "RateLimit-Reset": str(int(time.time() + 60))}
+    tracker.record(url, {"PRIVATE-TOKEN": "glpat"}, 200, headers)
+
+    assert tracker.wait_time("https://gitlab.example.com/api/v4/search?scope=projects", {"PRIVATE-TOKEN": "glpat"}) > 0
+    assert set(tracker.blocked_providers()) == {"gitlab"}
+
+
+def test_secondary_limit_blocks_until_retry_after(tracker):
+    tracker.record(f"{API}/repos/o/r", TOKEN, 403, {**github_headers(4000, reset_in=5), "Retry-After": "90"})
+
+    assert 80 < tracker.wait_time(f"{API}/repos/o/r", TOKEN) <= 90
+
+
+def test_budgets_past_their_reset_are_not_blocked(tracker):
+    tracker.record(f"{API}/repos/o/r", TOKEN, 200, github_headers(0, reset_in=-5))
+
+    assert tracker.wait_time(f"{API}/repos/o/r", TOKEN) == 0
+    assert tracker.blocked_providers() == {}
+
+
+def test_blocked_providers_reports_the_latest_reset(tracker):
+    tracker.record(f"{API}/repos/o/r", TOKEN, 200, github_headers(0, reset_in=100))
+    tracker.record(f"{API}/repos/o/r", OTHER_TOKEN, 200, github_headers(3, reset_in=300))
+
+    reset_at = tracker.blocked_providers()["github"]
+    assert 290 < reset_at - time.time() <= 300
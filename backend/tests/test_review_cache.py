@@ -0,0 +1,165 @@
+import asyncio
+import dataclasses
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.config import get_env_settings
+from app.database import Base, create_async_db_engine, create_db_engine
+from app.models import ReviewCacheEntry
+from app.routers.reviews import _review_cache_key
+from app.services.base_service import PRInfo
+from app.services.diff_filter import DiffFilter
+from app.services.llm_service import CodeSuggestion
+from app.services.review_cache import ReviewCacheKey, get_cached_review, store_review
+
+PR_URL = "https://github.com/owner/repo/pull/7"
+RESULT = {"score": 80, "suggestions": [CodeSuggestion("a.py", 1, 2, "warning", "bug", None, None, "Check for None", None)]}
+
+
+def pr_info(head_sha="abc123") -> PRInfo:
+    return PRInfo("repo", 7, "Title", "dev", "feature", "main", "", PR_URL, [], head_sha=head_sha)
+
+
+def cache_key(provider="github", pr_url=PR_URL, head_sha="abc123", model="llama3", instructions=None,
+              extended=False, diff_filter_key=None) -> ReviewCacheKey:
+    return ReviewCacheKey.for_review(provider, pr_url, pr_info(head_sha), model, instructions, extended, diff_filter_key)
+
+
+@pytest.fixture
+def cache_limits(monkeypatch):
+    def use(ttl_hours=1, max_entries=10):
+        monkeypatch.setenv("REVIEW_CACHE_TTL_HOURS", str(ttl_hours))
+        monkeypatch.setenv("REVIEW_CACHE_MAX_ENTRIES", str(max_entries))
+        get_env_settings.cache_clear()
+    use()
+    yield use
+    monkeypatch.undo()
+    get_env_settings.cache_clear()
+
+
+@pytest.fixture
+def run_with_db(tmp_path):
+    url = f"sqlite:///{tmp_path / 'cache.db'}"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+
+    def run(scenario):
+        async def main():
+            engine = create_async_db_engine(url)
+            try:
+                async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                    return await scenario(db)
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    return run
+
+
+@pytest.mark.parametrize("changed", [
+    {"model": "llama3:70b"},
+    {"instructions": "Focus on security"},
+    {"extended": True},
+    {"head_sha": "def456"},
+    {"provider": "gitlab"},
+    {"diff_filter_key": "1:*.sql"},
+    {"pr_url": "https://github.com/other-owner/repo/pull/7"},
+])
+def test_any_changed_key_component_is_a_different_key(changed):
+    assert cache_key(**changed).digest != cache_key().digest
+
+
+def test_equivalent_reviews_share_a_key():
+    assert cache_key(instructions="  Focus on security\n").digest == cache_key(instructions="Focus on security").digest
+    assert cache_key(pr_url="https://GitHub.com/owner/repo/pull/7").digest == cache_key().digest
+
+
+def test_review_without_head_commit_has_no_key():
+    assert cache_key(head_sha=None) is None
+
+
+def test_only_complete_first_reviews_are_cached():
+    def key(extended=False, only_files=None, info=pr_info()):
+        return _review_cache_key("github", PR_URL, info, "llama3", None, extended, only_files, DiffFilter())
+
+    assert key() == cache_key()
+    # Extensions are asked for to get new suggestions, not the stored ones
+    assert key(extended=True) is None
+    assert key(only_files=["a.py"]) is None
+    assert key(info=None) is None
+
+
+def test_stored_result_is_returned_until_it_expires(run_with_db, cache_limits):
+    key = cache_key()
+
+    async def scenario(db):
+        await store_review(db, key, RESULT)
+        await db.commit()
+        hit = await get_cached_review(db, key)
+        other = await get_cached_review(db, cache_key(head_sha="def456"))
+
+        entry = await db.scalar(select(ReviewCacheEntry))
+        entry.created_at = datetime.utcnow() - timedelta(hours=2)
+        await db.commit()
+        expired = await get_cached_review(db, key)
+        await db.commit()
+        return hit, other, expired, await db.scalar(select(ReviewCacheEntry))
+
+    hit, other, expired, remaining = run_with_db(scenario)
+
+    assert hit["score"] == 80
+    assert hit["suggestions"] == RESULT["suggestions"]
+    assert other is None
+    assert expired is None
+    assert remaining is None
+
+
+def test_least_recently_used_entries_are_evicted(run_with_db, cache_limits):
+    cache_limits(max_entries=2)
+    first, second, third = (cache_key(head_sha=sha) for sha in ("a1", "b2", "c3"))
+
+    async def scenario(db):
+        await store_review(db, first, RESULT)
+        await store_review(db, second, RESULT)
+        await get_cached_review(db, first)
+        await store_review(db, third, RESULT)
+        await db.commit()
+        return [await get_cached_review(db, key) is not None for key in (first, second, third)]
+
+    assert run_with_db(scenario) == [True, False, True]
+
+
+def test_storing_drops_expired_entries(run_with_db, cache_limits):
+    async def scenario(db):
+        await store_review(db, cache_key(head_sha="a1"), RESULT)
+        entry = await db.scalar(select(ReviewCacheEntry))
+        entry.created_at = datetime.utcnow() - timedelta(hours=2)
+        await store_review(db, cache_key(head_sha="b2"), RESULT)
+        await db.commit()
+        return list(await db.scalars(select(ReviewCacheEntry.head_sha)))
+
+    assert run_with_db(scenario) == ["b2"]
+
+
+@pytest.mark.parametrize("limits", [{"ttl_hours": 0}, {"max_entries": 0}])
+def test_disabled_cache_stores_nothing(run_with_db, cache_limits, limits):
+    cache_limits(**limits)
+
+    async def scenario(db):
+        await store_review(db, cache_key(), RESULT)
+        await db.commit()
+        return await db.scalar(select(ReviewCacheEntry))
+
+    assert run_with_db(scenario) is None
+
+
+def test_empty_result_is_not_stored(run_with_db, cache_limits):
+    async def scenario(db):
+        await store_review(db, cache_key(), {"suggestions": [], "score": None})
+        await db.commit()
+        return await db.scalar(select(ReviewCacheEntry))
+
+    assert run_with_db(scenario) is None
@@ -0,0 +1,78 @@
+import asyncio
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database import Base, create_async_db_engine, create_db_engine
+from app.models import PRReview, ReviewLog, ReviewStatus
+from app.review_events import review_events
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'events.db'}"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return url
+
+
+def drain(queue: asyncio.Queue) -> list:
+    items = []
+    while not queue.empty():
+        items.append(queue.get_nowait())
+    return items
+
+
+def run_with_session(database_url, scenario):
+    async def run():
+        engine = create_async_db_engine(database_url)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        try:
+            async with sessions() as db:
+                review = PRReview(pr_url="https://github.com/o/r/pull/1", provider="github")
+                db.add(review)
+                await db.commit()
+                review_id = review.id
+                queue = review_events.subscribe(review_id)
+                try:
+                    return await scenario(db, review, queue)
+                finally:
+                    review_events.unsubscribe(review_id, queue)
+        finally:
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+def test_events_are_published_after_commit_with_log_ids(database_url):
+    async def scenario(db, review, queue):
+        review.status = ReviewStatus.REVIEWING.value
+        review.current_stage = "Fetching PR"
+        review.add_log("Review started")
+        await db.flush()
+        before_commit = drain(queue)
+        await db.commit()
+        log_ids = list(await db.scalars(select(ReviewLog.id).where(ReviewLog.review_id == review.id)))
+        return before_commit, drain(queue), log_ids
+
+    before_commit, published, log_ids = run_with_session(database_url, scenario)
+
+    assert before_commit == []
+    assert [item["event"] for item in published] == ["status", "stage", "log"]
+    assert published[0]["data"] == {"status": "reviewing"}
+    assert published[1]["data"] == {"current_stage": "Fetching PR"}
+    assert published[2]["data"]["message"] == "Review started"
+    assert [published[2]["data"]["id"]] == log_ids
+
+
+def test_rolled_back_events_are_not_published(database_url):
+    async def scenario(db, review, queue):
+        review.status = ReviewStatus.FAILED.value
+        review.add_log("Review failed", "error")
+        await db.flush()
+        await db.rollback()
+        await db.commit()
+        return drain(queue)
+
+    assert run_with_session(database_url, scenario) == []
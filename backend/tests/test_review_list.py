@@ -0,0 +1,122 @@
+import asyncio
+import base64
+from datetime import datetime, timedelta
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database import Base, create_async_db_engine, create_db_engine
+from app.models import PRReview, ReviewStatus
+from app.routers import reviews as reviews_router
+from app.routers.reviews import _decode_cursor, _encode_cursor, list_reviews
+
+START = datetime(2026, 5, 1, 12, 0, 0)
+# Several reviews share a creation time, as reviews of one batch do
+CREATED_OFFSETS = [0, 1, 1, 1, 2, 3, 3, 4]
+
+
+@pytest.fixture
+def run_with_reviews(tmp_path):
+    url = f"sqlite:///{tmp_path / 'list.db'}"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    reviews_router._invalidate_totals()
+
+    def run(scenario):
+        async def main():
+            engine = create_async_db_engine(url)
+            try:
+                async with async_sessionmaker(engine, expire_on_commit=False)() as db:
+                    for number, offset in enumerate(CREATED_OFFSETS, 1):
+                        status = ReviewStatus.COMPLETED if number % 2 else ReviewStatus.FAILED
+                        db.add(PRReview(
+                            pr_url=f"https://github.com/o/r/pull/{number}", provider="github",
+                            status=status.value, created_at=START + timedelta(minutes=offset),
+                        ))
+                    await db.commit()
+                    return await scenario(db)
+            finally:
+                await engine.dispose()
+        return asyncio.run(main())
+    yield run
+    reviews_router._invalidate_totals()
+
+
+def newest_first(numbers):
+    """Review ids in list order: newest first, the higher id first on equal times"""
+    return sorted(numbers, key=lambda n: (CREATED_OFFSETS[n - 1], n), reverse=True)
+
+
+async def all_pages(db, per_page, status=None):
+    pages, cursor = [], None
+    while True:
+        response = await list_reviews(per_page=per_page, status=status, cursor=cursor, db=db)
+        pages.append([item.id for item in response.items])
+        cursor = response.next_cursor
+        if cursor is None:
+            return pages, response.total
+
+
+def test_cursor_round_trip():
+    review = PRReview(id=42, created_at=datetime(2026, 5, 1, 12, 30, 15, 123456))
+
+    assert _decode_cursor(_encode_cursor(review)) == (review.created_at, 42)
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor",
+    base64.urlsafe_b64encode(b"2026-05-01T12:00:00").decode(),
+    base64.urlsafe_b64encode(b"yesterday|5").decode(),
+    base64.urlsafe_b64encode(b"2026-05-01T12:00:00|five").decode(),
+])
+def test_invalid_cursor_is_a_bad_request(cursor):
+    with pytest.raises(HTTPException) as raised:
+        _decode_cursor(cursor)
+    assert raised.value.status_code == 400
+
+
+@pytest.mark.parametrize("per_page", [1, 2, 3, 8, 20])
+def test_paging_returns_every_review_once(run_with_reviews, per_page):
+    pages, total = run_with_reviews(lambda db: all_pages(db, per_page))
+
+    assert [review_id for page in pages for review_id in page] == newest_first(range(1, 9))
+    assert all(len(page) == per_page for page in pages[:-1])
+    assert total == 8
+
+
+def test_cursor_breaks_ties_of_equal_creation_times_by_id(run_with_reviews):
+    async def scenario(db):
+        # The page ends inside the group of reviews 2-4, created in the same minute
+        first = await list_reviews(per_page=4, db=db)
+        second = await list_reviews(per_page=4, cursor=first.next_cursor, db=db)
+        return [item.id for item in first.items], [item.id for item in second.items]
+
+    first, second = run_with_reviews(scenario)
+
+    assert first == [8, 7, 6, 5]
+    assert second == [4, 3, 2, 1]
+
+
+def test_paging_with_a_status_filter(run_with_reviews):
+    pages, total = run_with_reviews(lambda db: all_pages(db, 2, status=ReviewStatus.FAILED.value))
+
+    assert [review_id for page in pages for review_id in page] == newest_first([2, 4, 6, 8])
+    assert total == 4
+
+
+def test_total_is_counted_again_after_the_ttl(run_with_reviews, monkeypatch):
+    monkeypatch.setattr(reviews_router, "TOTAL_CACHE_TTL", 0.2)
+
+    async def scenario(db):
+        before = (await list_reviews(db=db)).total
+        db.add(PRReview(pr_url="https://github.com/o/r/pull/9", provider="github", created_at=START))
+        await db.commit()
+        cached = (await list_reviews(db=db)).total
+        filtered = (await list_reviews(status=ReviewStatus.PENDING.value, db=db)).total
+        await asyncio.sleep(0.3)
+        recounted = (await list_reviews(db=db)).total
+        return before, cached, filtered, recounted
+
+    assert run_with_reviews(scenario) == (8, 8, 1, 9)
@@ -0,0 +1,132 @@
+import asyncio
+import time
+
+import pytest
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from app.database import Base, create_async_db_engine, create_db_engine
+from app.models import PRReview, ReviewLog, ReviewStatus
+from app.services import review_queue as review_queue_module
+from app.services.rate_limits import RateLimitTracker
+from app.services.review_queue import ReviewQueue
+
+GITHUB_URL = "https://github.com/o/r/pull/{}"
+GITLAB_URL = "https://gitlab.com/g/p/-/merge_requests/{}"
+
+
+@pytest.fixture
+def database_url(tmp_path):
+    url = f"sqlite:///{tmp_path / 'queue.db'}"
+    engine = create_db_engine(url)
+    Base.metadata.create_all(bind=engine)
+    engine.dispose()
+    return url
+
+
+@pytest.fixture
+def tracker(monkeypatch):
+    tracker = RateLimitTracker(reserve=10)
+    monkeypatch.setattr(review_queue_module, "rate_limits", tracker)
+    return tracker
+
+
+def run_queue(database_url, monkeypatch, reviews, scenario):
+    """Store `reviews` ((status, provider) pairs, ids from 1) and run `scenario(queue, sessions, handler, handled)`"""
+    async def run():
+        engine = create_async_db_engine(database_url)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        monkeypatch.setattr(review_queue_module, "AsyncSessionLocal", sessions)
+        async with sessions() as db:
+            for number, (status, provider) in enumerate(reviews, 1):
+                url = (GITHUB_URL if provider == "github" else GITLAB_URL).format(number)
+                db.add(PRReview(pr_url=url, provider=provider, status=status.value))
+            await db.commit()
+
+        handled = []
+
+        async def handler(review_id: int):
+            handled.append(review_id)
+            async with sessions() as db:
+                review = await db.get(PRReview, review_id)
+                review.status = ReviewStatus.COMPLETED.value
+                await db.commit()
+
+        queue = ReviewQueue(workers=2, provider_limits={"github": 1, "gitlab": 1}, poll_interval=0.05)
+        try:
+            return await scenario(queue, sessions, handler, handled)
+        finally:
+            await queue.stop()
+            await engine.dispose()
+    return asyncio.run(run())
+
+
+async def wait_until(condition, timeout: float = 2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        await asyncio.sleep(0.01)
+
+
+def test_interrupted_reviews_are_requeued_after_a_restart(database_url, monkeypatch, tracker):
+    reviews = [
+        (ReviewStatus.REVIEWING, "github"),  # Running when the previous process stopped
+        (ReviewStatus.PENDING, "gitlab"),
+        (ReviewStatus.COMPLETED, "github"),
+        (ReviewStatus.FAILED, "gitlab"),
+    ]
+
+    async def scenario(queue, sessions, handler, handled):
+        await queue.start(handler)
+        await wait_until(lambda: len(handled) == 2)
+        await asyncio.sleep(0.1)  # Nothing else is dispatched
+        async with sessions() as db:
+            requeued = await db.get(PRReview, 1)
+            logs = list(await db.scalars(select(ReviewLog.message).where(ReviewLog.review_id == 1)))
+            statuses = list(await db.scalars(select(PRReview.status).order_by(PRReview.id)))
+            return sorted(handled), requeued.queued_at, logs, statuses
+
+    handled, queued_at, logs, statuses = run_queue(database_url, monkeypatch, reviews, scenario)
+
+    assert handled == [1, 2]
+    assert queued_at is not None
+    assert logs == ["Review was interrupted by an application restart - requeued"]
+    assert statuses == ["completed", "completed", "completed", "failed"]
+
+
+def test_reviews_of_a_rate_limited_provider_are_held(database_url, monkeypatch, tracker):
+    def github_budget(remaining):
+        tracker.record("https://api.github.com/repos/o/r", {"Authorization": "token ghp_test"}, 200, {
+            "X-RateLimit-Limit": "5000", "X-RateLimit-Remaining": str(remaining),
+            "X-RateLimit-Reset": str(int(time.time() + 600)), "X-RateLimit-Resource": "core",
+        })
+
+    reviews = [(ReviewStatus.PENDING, "github"), (ReviewStatus.PENDING, "gitlab")]
+
+    async def scenario(queue, sessions, handler, handled):
+        github_budget(remaining=5)
+        await queue.start(handler)
+        await wait_until(lambda: handled == [2])
+        await asyncio.sleep(0.1)
+        while_held = list(handled)
+        async with sessions() as db:
+            positions = await queue.queue_positions(db)
+
+        github_budget(remaining=4000)  # The limit was reset
+        await wait_until(lambda: len(handled) == 2)
+        return while_held, positions, handled
+
+    while_held, positions, handled = run_queue(database_url, monkeypatch, reviews, scenario)
+
+    assert while_held == [2]
+    assert positions == {1: 1}
+    assert handled == [2, 1]
+
+
+def test_queue_stops_while_the_dispatcher_is_woken(database_url, monkeypatch, tracker):
+    async def scenario(queue, sessions, handler, handled):
+        await queue.start(handler)
+        await asyncio.sleep(0)
+        queue.notify()
+        await asyncio.wait_for(queue.stop(), timeout=1)
+
+    run_queue(database_url, monkeypatch, [], scenario)
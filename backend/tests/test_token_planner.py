@@ -0,0 +1,169 @@
+import asyncio
+import copy
+
+import pytest
+from pr_agent.algo.types import EDIT_TYPE, FilePatchInfo
+from pr_agent.config_loader import get_settings, global_settings
+from starlette_context import request_cycle_context
+
+from app.services.endpoint_pool import BalancedLiteLLMAIHandler
+from app.services.token_planner import (
+    MeteredLiteLLMAIHandler, TokenMeter, count_tokens, metered_run, metering, plan_review,
+)
+
+# With a tiny model limit every call has the minimum of 1000 tokens for the
+# patches: 800 with pr-agent's extra context lines, 1000 without
+MODEL = "gpt-4"
+
+
+@pytest.fixture
+def settings():
+    """A private copy of pr-agent's settings, as a review has"""
+    with request_cycle_context({"settings": copy.deepcopy(global_settings)}):
+        settings = get_settings()
+        settings.set("config.max_model_tokens", 100)
+        settings.set("pr_code_suggestions.self_reflect_on_suggestions", False)
+        yield settings
+
+
+def diff_file(filename: str, tokens: int, edit_type=EDIT_TYPE.MODIFIED) -> FilePatchInfo:
+    """A file whose patch is about `tokens` tokens long"""
+    patch = "@@ -1,1 +1,1 @@\n" + "".join(f"+value_{i} = {i}\n" for i in range(tokens // 8))
+    return FilePatchInfo("", "", patch, filename, edit_type=edit_type)
+
+
+def plan(*files, chunk_tokens: int = 0):
+    return plan_review(list(files), MODEL, describe=False, chunk_tokens=chunk_tokens)
+
+
+def test_diff_that_fits_is_not_compressed(settings):
+    files = [diff_file("a.py", 300), diff_file("old.py", 100, EDIT_TYPE.DELETED)]
+
+    token_plan, reviewed = plan(*files)
+
+    assert token_plan.strategies == []
+    assert reviewed == files
+    assert token_plan.chunks == 1
+    assert token_plan.diff_tokens == sum(count_tokens(f.patch) for f in files)
+    assert settings.config.patch_extra_lines_before == global_settings.config.patch_extra_lines_before
+
+
+def test_strategies_stop_once_the_diff_fits(settings):
+    lockfile = diff_file("web/package-lock.json", 50)
+    files = [diff_file("a.py", 500), diff_file("old.py", 500, EDIT_TYPE.DELETED), lockfile]
+
+    token_plan, reviewed = plan(*files)
+
+    assert token_plan.strategies == ["drop_deleted_files"]
+    assert [f.filename for f in reviewed] == ["a.py", "web/package-lock.json"]
+    assert reviewed[1].patch == lockfile.patch
+    assert settings.config.patch_extra_lines_before == global_settings.config.patch_extra_lines_before
+
+
+def test_strategies_apply_least_lossy_first(settings):
+    lockfile = diff_file("yarn.lock", 2000)
+    files = [diff_file("a.py", 600), diff_file("old.py", 500, EDIT_TYPE.DELETED), lockfile]
+
+    token_plan, reviewed = plan(*files)
+
+    assert token_plan.strategies == ["drop_deleted_files", "summarize_lockfiles"]
+    assert [f.filename for f in reviewed] == ["a.py", "yarn.lock"]
+    assert "Lockfile updated" in reviewed[1].patch
+    # The given files are left as they were
+    assert lockfile.patch.count("\n") > 200
+    assert token_plan.file_tokens == {f.filename: count_tokens(f.patch) for f in reviewed}
+    assert token_plan.chunks == 1
+
+
+def test_strategy_with_nothing_to_compress_is_skipped(settings):
+    token_plan, _ = plan(diff_file("a.py", 600), diff_file("Cargo.lock", 2000))
+
+    assert token_plan.strategies == ["summarize_lockfiles"]
+
+
+def test_strip_context_is_applied_to_the_settings(settings):
+    token_plan, _ = plan(diff_file("a.py", 900))
+
+    assert token_plan.strategies == ["strip_context"]
+    assert token_plan.chunks == 1
+    assert settings.config.patch_extra_lines_before == 0
+    assert settings.config.patch_extra_lines_after == 0
+    assert settings.config.allow_dynamic_context is False
+
+
+def test_diff_still_over_the_budget_is_reviewed_in_chunks(settings):
+    files = [diff_file("a.py", 1500), diff_file("b.py", 1500), diff_file("old.py", 900, EDIT_TYPE.DELETED)]
+
+    token_plan, reviewed = plan(*files)
+
+    assert token_plan.strategies == ["drop_deleted_files", "strip_context"]
+    assert [f.filename for f in reviewed] == ["a.py", "b.py"]
+    assert token_plan.chunk_tokens == 1000
+    assert token_plan.chunks == -(-token_plan.diff_tokens // 1000)
+    assert token_plan.chunks > 1
+    assert token_plan.calls["review"]["calls"] == token_plan.calls["improve"]["calls"] == token_plan.chunks
+
+
+def test_chunk_tokens_override_the_model_limit(settings):
+    token_plan, _ = plan(diff_file("a.py", 300), diff_file("b.py", 300), chunk_tokens=200)
+
+    assert token_plan.strategies == []
+    assert token_plan.chunks == -(-token_plan.diff_tokens // 200)
+
+
+class AnsweringHandler(BalancedLiteLLMAIHandler):
+    """Model handler answering without calling a model"""
+    answer = "Looks good to me"
+
+    async def chat_completion(self, model, system, user, temperature=0.2, img_path=None):
+        if model == "broken":
+            raise RuntimeError("model unavailable")
+        return self.answer, "stop"
+
+
+class StubbedMeteredHandler(MeteredLiteLLMAIHandler, AnsweringHandler):
+    pass
+
+
+def test_metered_handler_records_the_calls_of_each_tool(settings):
+    meter = TokenMeter()
+
+    async def run():
+        review, improve = StubbedMeteredHandler("review"), StubbedMeteredHandler("improve")
+        with metering(meter):
+            # Calls made in tasks are counted too
+            await asyncio.gather(
+                review.chat_completion("model-a", "system", "user prompt"),
+                review.chat_completion("model-b", "system", "user prompt"),
+                improve.chat_completion("model-a", "system", "other prompt"),
+            )
+            with pytest.raises(RuntimeError):
+                await improve.chat_completion("broken", "system", "other prompt")
+        # Outside of metering nothing is counted
+        await review.chat_completion("model-a", "system", "user prompt")
+
+    asyncio.run(run())
+
+    prompt, answer = count_tokens("system\nuser prompt"), count_tokens(AnsweringHandler.answer)
+    assert meter.tools["review"]["calls"] == 2
+    assert meter.tools["review"]["prompt_tokens"] == 2 * prompt
+    assert meter.tools["review"]["completion_tokens"] == 2 * answer
+    assert meter.tools["review"]["models"] == {"model-a": 1, "model-b": 1}
+    assert meter.tools["improve"]["calls"] == 1
+    assert meter.tools["improve"]["failures"] == 1
+    assert meter.prompt_tokens == 2 * prompt + count_tokens("system\nother prompt")
+    assert meter.completion_tokens == 3 * answer
+
+
+def test_metered_run_adds_the_wall_time_of_the_tool():
+    meter = TokenMeter()
+
+    async def run():
+        with metering(meter):
+            await metered_run("describe", asyncio.sleep(0.05))
+            await metered_run("describe", asyncio.sleep(0.05))
+
+    asyncio.run(run())
+
+    assert meter.tools["describe"]["duration_ms"] >= 100
+    assert meter.tools["describe"]["calls"] == 0
@@ -22,6 +22,23 @@ const ChatDrawer = ({ isOpen, onClose, reviewId, prTitle, activeSuggestion, onCl
         scrollToBottom();
     }, [messages, isLoading]);
 
+    // The conversation is kept on the server; follow-up questions build on it
+    useEffect(() => {
+        if (!reviewId) return;
+        let cancelled = false;
+        reviewService.getChatHistory(reviewId)
+            .then((data) => {
+                if (cancelled) return;
+                setMessages(data.items.map((m) => ({
+                    text: m.content,
+                    isBot: m.role === 'assistant',
+                    timestamp: m.created_at ? new Date(m.created_at) : new Date()
+                })));
+            })
+            .catch((err) => console.error('Failed to load chat history:', err));
+        return () => { cancelled = true; };
+    }, [reviewId]);
+
     const buildContextFromSuggestion = () => {
         if (!activeSuggestion) return '';
 
@@ -54,11 +71,16 @@ const ChatDrawer = ({ isOpen, onClose, reviewId, prTitle, activeSuggestion, onCl
         setIsLoading(false);
     };
 
-    const handleClearChat = () => {
+    const handleClearChat = async () => {
         if (isLoading) {
             handleCancel();
         }
         setMessages([]);
+        try {
+            await reviewService.clearChatHistory(reviewId);
+        } catch (err) {
+            console.error('Failed to clear chat history:', err);
+        }
     };
 
     const handleSend = async (e) => {
@@ -7,6 +7,8 @@ import PRDescriptionViewer from './PRDescriptionViewer';
 import ChatDrawer from './ChatDrawer';
 import { exportPRToHTML } from '../utils/exportUtils';
 import { useSidebar } from './Layout';
+
+const TERMINAL_STATUSES = ['completed', 'failed', 'cancelled'];
 import {
     ArrowLeft,
     GitMerge,
@@ -42,6 +44,7 @@ const PRDetail = () => {
     const [review, setReview] = useState(null);
     const [loading, setLoading] = useState(true);
     const [extending, setExtending] = useState(false);
+    const [cancelling, setCancelling] = useState(false);
     const [isChatOpen, setIsChatOpen] = useState(false);
     const [activeTab, setActiveTab] = useState('description');
     const prevStatusRef = useRef(null);
@@ -94,13 +97,58 @@ const PRDetail = () => {
 
     useEffect(() => {
         loadReview();
-        const interval = setInterval(() => {
-            if (review?.status !== 'completed' && review?.status !== 'failed') {
-                loadReview();
+    }, [id]);
+
+    const isActive = !!review && !TERMINAL_STATUSES.includes(review.status);
+
+    // Follow progress through the server-sent events stream while the review is running
+    useEffect(() => {
+        if (!isActive) return;
+
+        // Only log entries newer than the loaded ones are sent
+        const lastLogId = Math.max(0, ...(review.processing_logs || []).map((log) => log.id || 0));
+        const source = new EventSource(reviewService.getReviewEventsUrl(id, lastLogId));
+        const finish = () => {
+            source.close();
+            // Reload once to pick up suggestions and final metadata
+            loadReview();
+        };
+
+        source.addEventListener('snapshot', (e) => {
+            const { status, current_stage, queue_position } = JSON.parse(e.data);
+            if (TERMINAL_STATUSES.includes(status)) {
+                finish();
+                return;
             }
-        }, 3000);
-        return () => clearInterval(interval);
-    }, [id, review?.status]);
+            setReview((prev) => (prev ? { ...prev, status, current_stage, queue_position } : prev));
+        });
+        source.addEventListener('log', (e) => {
+            const entry = JSON.parse(e.data);
+            setReview((prev) => {
+                if (!prev) return prev;
+                const logs = prev.processing_logs || [];
+                // Replayed events may already be part of the loaded review
+                if (entry.id && logs.some((log) => log.id === entry.id)) {
+                    return prev;
+                }
+                return { ...prev, processing_logs: [...logs, entry] };
+            });
+        });
+        source.addEventListener('stage', (e) => {
+            const { current_stage } = JSON.parse(e.data);
+            setReview((prev) => (prev ? { ...prev, current_stage } : prev));
+        });
+        source.addEventListener('status', (e) => {
+            const { status } = JSON.parse(e.data);
+            if (TERMINAL_STATUSES.includes(status)) {
+                finish();
+                return;
+            }
+            setReview((prev) => (prev ? { ...prev, status, queue_position: null } : prev));
+        });
+
+        return () => source.close();
+    }, [id, isActive]);
 
     const loadReview = async () => {
         try {
@@ -113,6 +161,21 @@ const PRDetail = () => {
         }
     };
 
+    const handleCancel = async () => {
+        if (!review || cancelling) return;
+
+        setCancelling(true);
+        try {
+            await reviewService.cancelReview(id);
+            await loadReview();
+        } catch (err) {
+            console.error('Failed to cancel review:', err);
+            alert('Failed to cancel the review. Please try again.');
+        } finally {
+            setCancelling(false);
+        }
+    };
+
     const handleExtend = async () => {
         if (!review || extending) return;
 
@@ -245,13 +308,24 @@ const PRDetail = () => {
                                             </span>
                                             <div className={`inline-flex items-center gap-1.5 px-2 py-0.5 rounded-md text-[10px] font-bold uppercase tracking-wider border ${review.status === 'completed' ? 'bg-green-50 dark:bg-green-900/20 text-green-700 dark:text-green-400 border-green-100 dark:border-green-900/30' :
                                                 review.status === 'failed' ? 'bg-red-50 dark:bg-red-900/20 text-red-700 dark:text-red-400 border-red-100 dark:border-red-900/30' :
+                                                review.status === 'cancelled' ? 'bg-slate-50 dark:bg-slate-800/50 text-slate-600 dark:text-slate-400 border-slate-100 dark:border-slate-800' :
                                                     'bg-primary-50 dark:bg-primary-900/20 text-primary-700 dark:text-primary-400 border-primary-100 dark:border-primary-900/30'
                                                 }`}>
                                                 {review.status === 'completed' ? <CheckCircle2 className="w-3 h-3" /> :
-                                                    review.status === 'failed' ? <XCircle className="w-3 h-3" /> :
+                                                    review.status === 'failed' || review.status === 'cancelled' ? <XCircle className="w-3 h-3" /> :
                                                         <Loader2 className="w-3 h-3 animate-spin" />}
                                                 {review.status}
                                             </div>
+                                            {isActive && (
+                                                <button
+                                                    onClick={handleCancel}
+                                                    disabled={cancelling}
+                                                    className="inline-flex items-center gap-1 px-2 py-0.5 rounded-md text-[10px] font-bold uppercase tracking-wider border border-slate-200 dark:border-slate-700 text-slate-600 dark:text-slate-300 hover:bg-slate-50 dark:hover:bg-slate-800 disabled:opacity-50 transition-all"
+                                                >
+                                                    {cancelling ? <Loader2 className="w-3 h-3 animate-spin" /> : <XCircle className="w-3 h-3" />}
+                                                    Cancel
+                                                </button>
+                                            )}
                                         </div>
 
                                         <div className="flex flex-wrap items-center gap-y-2.5 gap-x-5 text-xs text-slate-500 dark:text-slate-400 font-medium">
@@ -369,7 +443,7 @@ const PRDetail = () => {
                                             <p className="text-xs text-slate-500 dark:text-slate-400">Explore these optional code suggestions:</p>
                                         </div>
 
-                                        {review.status === 'completed' && (
+                                        {(review.status === 'completed' || review.status === 'cancelled') && (
                                             <div className="flex items-center gap-2">
                                                 <button
                                                     onClick={() => exportPRToHTML(review)}
@@ -89,6 +89,14 @@ const PRHistory = () => {
                     border: 'border-red-100 dark:border-red-900/30',
                     label: 'Failed'
                 };
+            case 'cancelled':
+                return {
+                    icon: <XCircle className="h-4 w-4 text-slate-400 dark:text-slate-500" />,
+                    bg: 'bg-slate-50 dark:bg-slate-800/50',
+                    text: 'text-slate-600 dark:text-slate-400',
+                    border: 'border-slate-100 dark:border-slate-800',
+                    label: 'Cancelled'
+                };
             default:
                 return {
                     icon: <Clock className="h-4 w-4 text-slate-400 dark:text-slate-500" />,
@@ -13,13 +13,24 @@ import {
     FileText
 } from 'lucide-react';
 
+const TOOLS = [
+    { key: 'review', label: 'Review' },
+    { key: 'improve', label: 'Code Suggestions' },
+    { key: 'describe', label: 'Description' }
+];
+
+const EMPTY_FORM = {
+    name: '', description: '', instructions: '', ignorePatterns: '', skipGenerated: true,
+    toolModels: { review: '', improve: '', describe: '' }
+};
+
 const RuleSets = () => {
     const [ruleSets, setRuleSets] = useState([]);
     const [loading, setLoading] = useState(true);
     const [error, setError] = useState(null);
     const [showModal, setShowModal] = useState(false);
     const [editingRuleSet, setEditingRuleSet] = useState(null);
-    const [formData, setFormData] = useState({ name: '', description: '', instructions: '' });
+    const [formData, setFormData] = useState(EMPTY_FORM);
     const [saving, setSaving] = useState(false);
     const [deleteConfirm, setDeleteConfirm] = useState(null);
 
@@ -47,11 +58,14 @@ const RuleSets = () => {
             setFormData({
                 name: ruleSet.name,
                 description: ruleSet.description || '',
-                instructions: ruleSet.instructions
+                instructions: ruleSet.instructions,
+                ignorePatterns: (ruleSet.ignore_patterns || []).join('\n'),
+                skipGenerated: ruleSet.skip_generated ?? true,
+                toolModels: Object.fromEntries(TOOLS.map(({ key }) => [key, (ruleSet.tool_models?.[key] || []).join(', ')]))
             });
         } else {
             setEditingRuleSet(null);
-            setFormData({ name: '', description: '', instructions: '' });
+            setFormData(EMPTY_FORM);
         }
         setShowModal(true);
     };
@@ -59,17 +73,26 @@ const RuleSets = () => {
     const handleCloseModal = () => {
         setShowModal(false);
         setEditingRuleSet(null);
-        setFormData({ name: '', description: '', instructions: '' });
+        setFormData(EMPTY_FORM);
     };
 
     const handleSubmit = async (e) => {
         e.preventDefault();
         setSaving(true);
+        const { ignorePatterns, skipGenerated, toolModels, ...fields } = formData;
+        const payload = {
+            ...fields,
+            ignore_patterns: ignorePatterns.split('\n').map((p) => p.trim()).filter(Boolean),
+            skip_generated: skipGenerated,
+            tool_models: Object.fromEntries(TOOLS.map(({ key }) => [
+                key, toolModels[key].split(',').map((m) => m.trim()).filter(Boolean)
+            ]))
+        };
         try {
             if (editingRuleSet) {
-                await ruleSetService.updateRuleSet(editingRuleSet.id, formData);
+                await ruleSetService.updateRuleSet(editingRuleSet.id, payload);
             } else {
-                await ruleSetService.createRuleSet(formData);
+                await ruleSetService.createRuleSet(payload);
             }
             handleCloseModal();
             loadRuleSets();
@@ -279,6 +302,52 @@ const RuleSets = () => {
                                 </p>
                             </div>
 
+                            <div>
+                                <label className="block text-sm font-semibold text-slate-700 dark:text-slate-300 mb-1.5">
+                                    Ignored Files (Optional)
+                                </label>
+                                <textarea
+                                    value={formData.ignorePatterns}
+                                    onChange={(e) => setFormData({ ...formData, ignorePatterns: e.target.value })}
+                                    placeholder="One glob per line, e.g.&#10;*.svg&#10;migrations/*&#10;!yarn.lock"
+                                    rows={3}
+                                    className="w-full px-3 py-2 bg-slate-50 dark:bg-slate-800/50 border border-slate-200 dark:border-slate-700 rounded-lg text-sm font-mono text-slate-900 dark:text-slate-100 placeholder:text-slate-400 focus:outline-none focus:border-primary-500 focus:ring-2 focus:ring-primary-50 dark:focus:ring-primary-900/20 resize-none"
+                                />
+                                <label className="mt-2 flex items-center gap-2 text-sm text-slate-700 dark:text-slate-300">
+                                    <input
+                                        type="checkbox"
+                                        checked={formData.skipGenerated}
+                                        onChange={(e) => setFormData({ ...formData, skipGenerated: e.target.checked })}
+                                        className="rounded border-slate-300 dark:border-slate-700 text-primary-600 focus:ring-primary-500"
+                                    />
+                                    Skip lockfiles, minified bundles and generated code
+                                </label>
+                                <p className="mt-1.5 text-xs text-slate-500 dark:text-slate-400">
+                                    Matching files are left out before the diff is sent to the AI; prefix a glob with ! to keep files skipped by default
+                                </p>
+                            </div>
+
+                            <div>
+                                <label className="block text-sm font-semibold text-slate-700 dark:text-slate-300 mb-1.5">
+                                    Models per Task (Optional)
+                                </label>
+                                <div className="grid grid-cols-1 md:grid-cols-3 gap-3">
+                                    {TOOLS.map(({ key, label }) => (
+                                        <input
+                                            key={key}
+                                            type="text"
+                                            value={formData.toolModels[key]}
+                                            onChange={(e) => setFormData({ ...formData, toolModels: { ...formData.toolModels, [key]: e.target.value } })}
+                                            placeholder={label}
+                                            className="w-full px-3 py-2 bg-slate-50 dark:bg-slate-800/50 border border-slate-200 dark:border-slate-700 rounded-lg text-sm text-slate-900 dark:text-slate-100 placeholder:text-slate-400 focus:outline-none focus:border-primary-500 focus:ring-2 focus:ring-primary-50 dark:focus:ring-primary-900/20"
+                                        />
+                                    ))}
+                                </div>
+                                <p className="mt-1.5 text-xs text-slate-500 dark:text-slate-400">
+                                    Comma-separated models (then fallbacks) replacing the ones in Settings for this rule set; leave empty to keep them
+                                </p>
+                            </div>
+
                             <div className="flex items-center justify-end gap-3 pt-2">
                                 <button
                                     type="button"
@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { Settings as SettingsIcon, Save, Loader2, CheckCircle, AlertCircle, Shield, Github, GitBranch, Cpu } from 'lucide-react';
+import { Settings as SettingsIcon, Save, Loader2, CheckCircle, AlertCircle, Shield, Github, GitBranch, Cpu, Plus, Trash2 } from 'lucide-react';
 import { settingsService } from '../services/api';
 
 const SectionHeader = ({ icon: Icon, title, description }) => (
@@ -72,7 +72,9 @@ const Settings = () => {
         ai_model: 'qwen3:8b',
         ai_api_key: '',
         ai_base_url: 'http://localhost:11434',
-        max_tokens: 128000
+        max_tokens: 128000,
+        ai_endpoints: [],
+        tool_models: { review: [], improve: [], describe: [] }
     });
 
     useEffect(() => {
@@ -82,7 +84,11 @@ const Settings = () => {
     const loadSettings = async () => {
         try {
             const data = await settingsService.getSettings();
-            setSettings(data);
+            setSettings({
+                ...data,
+                ai_endpoints: data.ai_endpoints || [],
+                tool_models: { review: [], improve: [], describe: [], ...data.tool_models }
+            });
         } catch (err) {
             setError('Failed to load settings. Please try again.');
             console.error(err);
@@ -113,6 +119,24 @@ const Settings = () => {
         setSettings({ ...settings, [field]: e.target.value });
     };
 
+    const updateEndpoint = (index, changes) => {
+        const ai_endpoints = settings.ai_endpoints.map((endpoint, i) => (i === index ? { ...endpoint, ...changes } : endpoint));
+        setSettings({ ...settings, ai_endpoints });
+    };
+
+    const addEndpoint = () => {
+        setSettings({ ...settings, ai_endpoints: [...settings.ai_endpoints, { url: '', weight: 1, enabled: true }] });
+    };
+
+    const handleToolModels = (tool) => (e) => {
+        const models = e.target.value.split(',').map((model) => model.trim());
+        setSettings({ ...settings, tool_models: { ...settings.tool_models, [tool]: models } });
+    };
+
+    const removeEndpoint = (index) => {
+        setSettings({ ...settings, ai_endpoints: settings.ai_endpoints.filter((_, i) => i !== index) });
+    };
+
     if (loading) {
         return (
             <div className="flex flex-col justify-center items-center h-96 animate-fade-in">
@@ -300,6 +324,93 @@ const Settings = () => {
                                         helpText="Limits the amount of code sent to the AI"
                                     />
                                 </div>
+
+                                {(settings.ai_provider === 'ollama' || settings.ai_provider === 'openai') && (
+                                    <div className="space-y-2">
+                                        <div className="flex items-center justify-between">
+                                            <label className="block text-xs font-bold text-slate-700 dark:text-slate-300">
+                                                Inference Servers (Optional)
+                                            </label>
+                                            <button
+                                                type="button"
+                                                onClick={addEndpoint}
+                                                className="flex items-center gap-1 px-2 py-1 text-xs font-bold text-primary-600 dark:text-primary-400 hover:bg-primary-50 dark:hover:bg-primary-900/20 rounded transition-colors"
+                                            >
+                                                <Plus className="w-3.5 h-3.5" />
+                                                Add server
+                                            </button>
+                                        </div>
+                                        {settings.ai_endpoints.map((endpoint, index) => (
+                                            <div key={index} className="flex items-center gap-2">
+                                                <input
+                                                    type="checkbox"
+                                                    checked={endpoint.enabled}
+                                                    onChange={(e) => updateEndpoint(index, { enabled: e.target.checked })}
+                                                    title="Enabled"
+                                                    className="rounded border-slate-300 dark:border-slate-700 text-primary-600 focus:ring-primary-500"
+                                                />
+                                                <input
+                                                    type="url"
+                                                    value={endpoint.url}
+                                                    onChange={(e) => updateEndpoint(index, { url: e.target.value })}
+                                                    placeholder={settings.ai_provider === 'ollama' ? "http://gpu-host:11434" : "http://gpu-host:8000/v1"}
+                                                    className="flex-1 px-3 py-2 bg-slate-50 dark:bg-slate-800/50 border border-slate-200 dark:border-slate-700 rounded-lg text-sm text-slate-900 dark:text-slate-100 placeholder:text-slate-400 focus:outline-none focus:border-primary-500"
+                                                />
+                                                <input
+                                                    type="number"
+                                                    value={endpoint.weight}
+                                                    min={1}
+                                                    onChange={(e) => updateEndpoint(index, { weight: Math.max(1, parseInt(e.target.value, 10) || 1) })}
+                                                    title="Weight"
+                                                    className="w-20 px-3 py-2 bg-slate-50 dark:bg-slate-800/50 border border-slate-200 dark:border-slate-700 rounded-lg text-sm text-slate-900 dark:text-slate-100 focus:outline-none focus:border-primary-500"
+                                                />
+                                                <button
+                                                    type="button"
+                                                    onClick={() => removeEndpoint(index)}
+                                                    className="p-2 hover:bg-red-50 dark:hover:bg-red-900/20 rounded-lg transition-colors"
+                                                    title="Remove"
+                                                >
+                                                    <Trash2 className="w-4 h-4 text-red-500" />
+                                                </button>
+                                            </div>
+                                        ))}
+                                        <p className="text-[11px] text-slate-500 dark:text-slate-400">
+                                            When set, model calls are spread over these servers (higher weight takes more load) instead of the URL above; a server that stops answering is skipped until it recovers
+                                        </p>
+                                    </div>
+                                )}
+
+                                <div className="space-y-2">
+                                    <label className="block text-xs font-bold text-slate-700 dark:text-slate-300">
+                                        Models per Task (Optional)
+                                    </label>
+                                    <div className="grid grid-cols-1 md:grid-cols-3 gap-5">
+                                        <InputField
+                                            label="Review"
+                                            id="tool_models_review"
+                                            value={settings.tool_models.review.join(', ')}
+                                            onChange={handleToolModels('review')}
+                                            placeholder={settings.ai_model}
+                                        />
+                                        <InputField
+                                            label="Code Suggestions"
+                                            id="tool_models_improve"
+                                            value={settings.tool_models.improve.join(', ')}
+                                            onChange={handleToolModels('improve')}
+                                            placeholder={settings.ai_model}
+                                        />
+                                        <InputField
+                                            label="Description"
+                                            id="tool_models_describe"
+                                            value={settings.tool_models.describe.join(', ')}
+                                            onChange={handleToolModels('describe')}
+                                            placeholder={settings.ai_model}
+                                        />
+                                    </div>
+                                    <p className="text-[11px] text-slate-500 dark:text-slate-400">
+                                        Comma-separated: the first model is used, the next ones when it fails. Empty uses the model above; a small fast model is usually enough for descriptions
+                                    </p>
+                                </div>
                             </div>
                         </section>
                         )}
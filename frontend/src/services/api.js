@@ -31,6 +31,16 @@ export const reviewService = {
         return response.data;
     },
 
+    // URL of the server-sent events stream with live review progress;
+    // log entries after the `after` log id are replayed first
+    getReviewEventsUrl: (id, after = 0) => `${API_URL}/reviews/${id}/events?after=${after}`,
+
+    // Cancel a queued or running review
+    cancelReview: async (id) => {
+        const response = await api.post(`/reviews/${id}/cancel`);
+        return response.data;
+    },
+
     // Delete a review
     deleteReview: async (id) => {
         const response = await api.delete(`/reviews/${id}`);
@@ -48,6 +58,18 @@ export const reviewService = {
         const config = signal ? { signal } : {};
         const response = await api.post(`/reviews/ask`, { question, review_id: id }, config);
         return response.data;
+    },
+
+    // Earlier questions and answers about a review
+    getChatHistory: async (id) => {
+        const response = await api.get(`/reviews/${id}/chat`);
+        return response.data;
+    },
+
+    // Start a new conversation about a review
+    clearChatHistory: async (id) => {
+        const response = await api.delete(`/reviews/${id}/chat`);
+        return response.data;
     }
 };
 